@@ -0,0 +1,180 @@
+"""Offline benchmarks, on the fixtures in benchmarks/fixtures: no downloads.
+
+    python benchmarks/run.py [--output results.json] [--thresholds thresholds.json]
+
+Fixtures are copied in a temporary data folder (and caches are written there). Results
+are printed (or written to --output) as JSON: every metric with its value, unit and
+threshold. The exit status is 1 if a metric is worse than its threshold.
+
+Thresholds (benchmarks/thresholds.json) have a "max" for times and a "min" for throughput,
+with a wide margin: they catch regressions, not noise."""
+import argparse
+import contextlib
+import glob
+import io
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES = os.path.join(ROOT, "benchmarks", "fixtures")
+THRESHOLDS = os.path.join(ROOT, "benchmarks", "thresholds.json")
+sys.path.insert(0, ROOT)
+
+from pygopvp import gamemaster, utils  # noqa: E402
+from pygopvp.batch import BatchBattle  # noqa: E402
+from pygopvp.battle import Battle  # noqa: E402
+from pygopvp.csvreader import read_export  # noqa: E402
+from pygopvp.model import Pokemon  # noqa: E402
+from pygopvp.rankings import generate_from_rankings  # noqa: E402
+
+Metrics = Dict[str, Dict[str, Any]]
+
+
+def _timeit(func: Callable[[], Any]) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def _fresh_cache() -> None:
+    utils.write_cache()
+    for filepath in glob.glob(os.path.join(utils.DATA_DIR, "_cache.sqlite3*")):
+        os.unlink(filepath)
+    utils.start_cache()
+
+
+def bench_startup(metrics: Metrics) -> None:
+    """Seconds `pygopvp --help` adds to a bare interpreter startup, best of 5"""
+
+    def best(args):
+        env = dict(os.environ, PYTHONPATH=ROOT)
+        return min(
+            _timeit(lambda: subprocess.run(args, check=True, stdout=subprocess.DEVNULL, env=env))
+            for _ in range(5)
+        )
+
+    python = best([sys.executable, "-c", "pass"])
+    pygopvp = best([sys.executable, "-m", "pygopvp", "--help"])
+    metrics["startup"] = {"value": pygopvp - python, "unit": "s"}
+
+
+def bench_gamemaster(metrics: Metrics) -> None:
+    def load():
+        gamemaster._unload()
+        return gamemaster.POKEMONS
+
+    for filepath in glob.glob(os.path.join(gamemaster.DATA_DIR, "_gamemaster-*.pickle")):
+        os.unlink(filepath)
+    metrics["gamemaster_load_cold"] = {"value": _timeit(load), "unit": "s"}
+    metrics["gamemaster_load_warm"] = {"value": min(_timeit(load) for _ in range(5)), "unit": "s"}
+
+
+def bench_find_max(metrics: Metrics) -> None:
+    names = sorted(gamemaster.POKEMONS)
+
+    def find_all():
+        for name in names:
+            Pokemon.find_max(name, utils.LEAGUES[0].cp)
+
+    _fresh_cache()
+    cold = _timeit(find_all)
+    warm = min(_timeit(find_all) for _ in range(3))
+    metrics["find_max_cold"] = {"value": 1000 * cold / len(names), "unit": "ms"}
+    metrics["find_max_warm"] = {"value": 1000 * warm / len(names), "unit": "ms"}
+
+
+def bench_battles(metrics: Metrics, pokemons: List[Pokemon], opponents: List[Pokemon]) -> None:
+    specs = [pokemon.spec() for pokemon in pokemons]
+    opponent_specs = [opponent.spec() for opponent in opponents]
+    # single battle latency: the median of every matchup, best of 3 runs
+    latencies = []
+    for a in specs[:10]:
+        for b in opponent_specs[:10]:
+            latencies.append(min(_timeit(Battle([a, b]).resolve) for _ in range(3)))
+    metrics["battle_latency"] = {"value": 1e6 * statistics.median(latencies), "unit": "us"}
+    batch = BatchBattle((a, b, 1) for a in specs for b in opponent_specs)
+    spent = _timeit(batch.resolve)
+    metrics["matrix_battles"] = {"value": len(batch) / spent, "unit": "battles/s"}
+    metrics["matrix_turns"] = {"value": sum(batch.turns) / spent, "unit": "turns/s"}
+
+
+def bench_cli(metrics: Metrics) -> None:
+    from pygopvp.cli import rank, team
+
+    league = utils.LEAGUES[0]
+    for name, main in (
+        ("rank", lambda: rank.main(league, "overall", 1, 10, 30, processes=1)),
+        ("team", lambda: team.main(league, "overall", 1, 10, 30, processes=1)),
+    ):
+        _fresh_cache()
+        with contextlib.redirect_stdout(io.StringIO()):
+            metrics[name] = {"value": _timeit(main), "unit": "s"}
+
+
+def check(metrics: Metrics, thresholds: Dict[str, Dict[str, float]]) -> List[str]:
+    """Add the thresholds to `metrics`, return the metrics worse than them"""
+    failed = []
+    for name, metric in metrics.items():
+        threshold = thresholds.get(name, {})
+        metric.update(threshold)
+        if "max" in threshold and metric["value"] > threshold["max"]:
+            failed.append(name)
+        if "min" in threshold and metric["value"] < threshold["min"]:
+            failed.append(name)
+        metric["ok"] = name not in failed
+    return failed
+
+
+def run() -> Metrics:
+    metrics = {}  # type: Metrics
+    bench_startup(metrics)
+    bench_gamemaster(metrics)
+    bench_find_max(metrics)
+    pokemons = [pokemon for pokemon in read_export() if pokemon.fast and pokemon.charged]
+    opponents = generate_from_rankings(utils.LEAGUES[0].cp, top=30)
+    bench_battles(metrics, pokemons, opponents)
+    bench_cli(metrics)
+    return metrics
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser("benchmarks/run.py")
+    parser.add_argument("--output", "-o", help="Write the results here (default: stdout)")
+    parser.add_argument("--thresholds", "-t", default=THRESHOLDS, help="Thresholds JSON file")
+    args = parser.parse_args()
+    with open(args.thresholds, encoding="utf8") as fp:
+        thresholds = json.load(fp)
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        shutil.copytree(FIXTURES, os.path.join(tmpdir, "data"))
+        os.chdir(tmpdir)
+        try:
+            metrics = run()
+        finally:
+            utils.write_cache()
+            gamemaster._unload()
+            os.chdir(cwd)
+    failed = check(metrics, thresholds)
+    result = {"metrics": metrics, "failed": failed}
+    if args.output:
+        with open(args.output, "w", encoding="utf8") as fp:
+            json.dump(result, fp, indent=2)
+    else:
+        json.dump(result, sys.stdout, indent=2)
+        print()
+    for name in failed:
+        metric = metrics[name]
+        text = "Regression: {} = {:.4g} {}".format(name, metric["value"], metric["unit"])
+        print(text, file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,53 +1,117 @@
 import argparse
 
-from pygopvp.cli.battle import main as battle_func
-from pygopvp.cli.counter import main as counter_func
-from pygopvp.cli.moves import main as moves_func
-from pygopvp.cli.rank import main as rank_func
-from pygopvp.cli.team import main as team_func
 from pygopvp.cli.utils import league, pokename
-from pygopvp.cli.vsall import main as vsall_func
-from pygopvp.gamemaster import _update_miners
 from pygopvp.model import Move
 
+# Subcommand modules are imported only when the subcommand is chosen
+
 
 def team_main(args):
-    return team_func(args.league, args.opponents, args.shields, args.num, args.nopponents)
+    from pygopvp.cli.team import main as team_func
+
+    return team_func(
+        args.league, args.opponents, args.shields, args.num, args.nopponents, args.processes
+    )
 
 
 def vsall_main(args):
-    return vsall_func(args.name, args.cp, args.opponents, args.shields, args.num, args.nopponents)
+    from pygopvp.cli.vsall import main as vsall_func
+
+    return vsall_func(
+        args.name,
+        args.cp,
+        args.opponents,
+        args.shields,
+        args.num,
+        args.nopponents,
+        args.matrix,
+        args.processes,
+    )
 
 
 def counter_main(args):
+    from pygopvp.cli.counter import main as counter_func
+
     moves = []
     if args.fast:
         moves.append(args.fast)
     if args.charged:
         moves.extend(args.charged)
-    return counter_func(args.opponent, args.cp, args.shields, args.num, moves)
+    return counter_func(
+        args.opponent, args.cp, args.shields, args.num, moves, args.matrix, args.processes
+    )
 
 
 def rank_main(args):
-    return rank_func(args.league, args.opponents, args.shields, args.num, args.nopponents)
+    from pygopvp.cli.rank import main as rank_func
+
+    return rank_func(
+        args.league,
+        args.opponents,
+        args.shields,
+        args.num,
+        args.nopponents,
+        args.matrix,
+        args.processes,
+        args.trials,
+        args.seed,
+    )
 
 
 def moves_main(args):
-    return moves_func(args.name, args.cp, args.opponents, args.shields, args.nopponents)
+    from pygopvp.cli.moves import main as moves_func
+
+    return moves_func(
+        args.name, args.cp, args.opponents, args.shields, args.nopponents, args.processes
+    )
 
 
 def battle_main(args):
+    from pygopvp.cli.battle import main as battle_func
+
     moves = []
     if args.fast:
         moves.append(args.fast)
     if args.charged:
         moves.extend(args.charged)
-    return battle_func(args.name, args.cp, args.opponent, args.ocp, moves, args.shields)
+    return battle_func(
+        args.name,
+        args.cp,
+        args.opponent,
+        args.ocp,
+        moves,
+        args.shields,
+        args.optimal,
+        args.jsonl,
+        args.max_nodes,
+    )
 
 
 def gamemaster_update(args):
-    _update_miners()
-    print("Gamemaster updated from PokeMiners")
+    from pygopvp.gamemaster import _update_miners
+
+    changed = _update_miners()
+    if not changed:
+        print("Gamemaster already up to date")
+        return
+    print("Gamemaster updated from PokeMiners, changed:")
+    for kind in ("POKEMON", "MOVE"):
+        names = [key.split(":", 1)[1] for key in changed if key.startswith(kind + ":")]
+        if names:
+            print("  {}: {}".format(kind.title(), ", ".join(names)))
+    others = [key for key in changed if not key.startswith(("POKEMON:", "MOVE:"))]
+    if others:
+        print("  Other: {}".format(", ".join(others)))
+
+
+def precompute_main(args):
+    import time
+
+    from pygopvp.spreads import precompute
+
+    start = time.perf_counter()
+    count = precompute(processes=args.processes)
+    print("{} spreads computed in {:.1f}s".format(count, time.perf_counter() - start))
 
 
 def shields(s: str):
@@ -59,6 +123,12 @@ def shields(s: str):
 
 def main():
     parser = argparse.ArgumentParser("pygopvp")
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Print calls and time of each stage, battles/s and turns/s at the end",
+    )
+    parser.add_argument("--profile-output", metavar="FILE", help="Write the --profile data as JSON")
     subparsers = parser.add_subparsers(help="Modules:")
     # team_advisor
     parser_team = subparsers.add_parser("team", help="Find the best team for a list of opponents")
@@ -70,6 +140,9 @@ def main():
         "-nopponents", "-o", default=30, type=int, help="Max number of opponents"
     )
     parser_team.add_argument("--num", "-n", default=10, type=int, help="Number of results")
+    parser_team.add_argument(
+        "--processes", "-p", type=int, help="Number of processes (default: CPU count)"
+    )
     # counter_advisor
     parser_counter = subparsers.add_parser(
         "counter", help="Find the best counter against an opponent"
@@ -81,6 +154,15 @@ def main():
     parser_counter.add_argument("--charged", "-c", nargs="*", type=Move.charged_from_name)
     parser_counter.add_argument("-shields", "-s", default=1, type=shields)
     parser_counter.add_argument("--num", "-n", default=10, type=int, help="Number of results")
+    parser_counter.add_argument(
+        "--matrix",
+        "-m",
+        action="store_true",
+        help="Every shield scenario (0, 1 or 2 for each side), ignores --shields",
+    )
+    parser_counter.add_argument(
+        "--processes", "-p", type=int, help="Number of processes (default: CPU count)"
+    )
     # rank
     parser_rank = subparsers.add_parser("rank", help="Rank your pokemons")
     parser_rank.set_defaults(func=rank_main)
@@ -91,6 +173,23 @@ def main():
         "-nopponents", "-o", default=30, type=int, help="Max number of opponents"
     )
     parser_rank.add_argument("-num", "-n", default=10, type=int, help="Number of results")
+    parser_rank.add_argument(
+        "--matrix",
+        "-m",
+        action="store_true",
+        help="Every shield scenario (0, 1 or 2 for each side), ignores --shields",
+    )
+    parser_rank.add_argument(
+        "--processes", "-p", type=int, help="Number of processes (default: CPU count)"
+    )
+    parser_rank.add_argument(
+        "--trials",
+        "-t",
+        default=0,
+        type=int,
+        help="Monte Carlo trials, with buffs activated by chance (default: none)",
+    )
+    parser_rank.add_argument("--seed", default=0, type=int, help="Seed of the Monte Carlo trials")
     # moves
     parser_moves = subparsers.add_parser("moves", help="Suggest best moveset for your pokemon")
     parser_moves.set_defaults(func=moves_main)
@@ -101,6 +200,9 @@ def main():
     parser_moves.add_argument(
         "-nopponents", "-o", default=30, type=int, help="Max number of opponents"
     )
+    parser_moves.add_argument(
+        "--processes", "-p", type=int, help="Number of processes (default: CPU count)"
+    )
     # battle
     parser_battle = subparsers.add_parser("battle", help="Simulate a battle")
     parser_battle.set_defaults(func=battle_main)
@@ -111,6 +213,17 @@ def main():
     parser_battle.add_argument("--fast", "-f", type=Move.fast_from_name)
     parser_battle.add_argument("--charged", "-c", nargs="*", type=Move.charged_from_name)
     parser_battle.add_argument("--shields", "-s", default=1, type=shields, help="How many shields")
+    parser_battle.add_argument(
+        "--optimal",
+        action="store_true",
+        help="Also the best moves and shields of both pokemons, found by search",
+    )
+    parser_battle.add_argument(
+        "--max-nodes",
+        type=int,
+        help="Nodes searched by --optimal (default: 10000), 0 for no limit",
+    )
+    parser_battle.add_argument("--jsonl", help="Write the battle events to this JSON Lines file")
     # vsall
     parser_vsall = subparsers.add_parser("vsall", help="Rank a single pokemon vs others")
     parser_vsall.set_defaults(func=vsall_main)
@@ -122,15 +235,46 @@ def main():
     parser_vsall.add_argument(
         "-nopponents", "-o", default=10000, type=int, help="Max number of opponents"
     )
+    parser_vsall.add_argument(
+        "--matrix",
+        "-m",
+        action="store_true",
+        help="Every shield scenario (0, 1 or 2 for each side), ignores --shields",
+    )
+    parser_vsall.add_argument(
+        "--processes", "-p", type=int, help="Number of processes (default: CPU count)"
+    )
+    # precompute
+    parser_precompute = subparsers.add_parser(
+        "precompute", help="Precompute the best IVs of every pokemon for every league"
+    )
+    parser_precompute.set_defaults(func=precompute_main)
+    parser_precompute.add_argument(
+        "--processes", "-p", type=int, help="Number of processes (default: CPU count)"
+    )
     # gamemaster update
     parser_gmupdate = subparsers.add_parser("gamemaster", help="Update gamemaster")
     parser_gmupdate.set_defaults(func=gamemaster_update)
     # parse
     args = parser.parse_args()
-    if "func" in args:
-        args.func(args)
-    else:
+    if "func" not in args:
         parser.print_help()
+        return
+    if not (args.profile or args.profile_output):
+        args.func(args)
+        return
+    from pygopvp import instrument
+
+    instrument.enable()
+    try:
+        args.func(args)
+    finally:
+        instrument.disable()
+        if args.profile:
+            instrument.report()
+        if args.profile_output:
+            instrument.dump(args.profile_output)
 
 
-main()
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""Resolve many battles together, with the same rules as `battle.Battle`"""
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from .battle import BattleRules
+from .model import Pokemon, PokemonSpec
+
+Lane = Tuple[Union[Pokemon, PokemonSpec], Union[Pokemon, PokemonSpec], Union[int, Sequence[int]]]
+
+
+class BatchBattle(BattleRules):
+    """Many independent battles (lanes) resolved turn by turn, all together.
+
+    The state is kept in flat lists: side `s` of lane `i` is at index `2 * i + s` and its
+    opponent at `s ^ 1`. Finished lanes are dropped from the next turns.
+    The rules are the ones of `Battle` (see `BattleRules`), so are the results.
+
+    Every turn is a single pass over the active lanes, see `resolve`: the damage of fast
+    moves is kept by side and computed again only when buffs can change."""
+
+    def __init__(self, lanes: Iterable[Lane], roll_buffs=False):
+        specs = []  # type: List[PokemonSpec]
+        shields = []  # type: List[int]
+        for a, b, lane_shields in lanes:
+            for pokemon in (a, b):
+                if not isinstance(pokemon, PokemonSpec):
+                    pokemon = pokemon.spec()
+                specs.append(pokemon)
+            if isinstance(lane_shields, int):
+                lane_shields = [lane_shields, lane_shields]
+            shields.extend((lane_shields[0], lane_shields[1]))
+        self.size = len(specs) >> 1
+        self.errors = {}  # type: Dict[int, Exception]
+        super().__init__(specs, shields, roll_buffs)
+        # by side: energy of the cheapest charged move (None without charged moves)
+        self.charged_cost = [
+            min((-c.energyDelta for c in spec.charged if c), default=None) for spec in specs
+        ]  # type: List[Optional[int]]
+        # damage of the fast move with the current buffs, None without a fast move
+        self.fast_damage = [None] * len(specs)  # type: List[Optional[int]]
+        for a, spec in enumerate(specs):
+            if spec.fast:
+                self.fast_damage[a] = self.calculateDamage(a, spec.fast)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def resolve(self, fast_forward=True) -> None:
+        """Resolve every lane, errors are kept in `errors` by lane.
+
+        Each turn, lanes where both sides can only use the fast move (or wait) are resolved
+        in a pass over all of them (see `fast_turns`). The others go through
+        `perform_turn`, for the choice of charged moves and shields, and their fast damage
+        is updated as buffs may have changed.
+        With `fast_forward` idle turns are skipped, see `Battle.fast_forward`"""
+        hp = self.hp
+        elapsed = self.elapsed
+        specs = self.specs
+        for lane in range(self.size):
+            elapsed[lane] += 1000
+        active = list(range(self.size))
+        while active:
+            for lane in self.fast_turns(active, fast_forward):
+                try:
+                    self.perform_turn(lane)
+                except Exception as e:  # same as a failed Battle.resolve
+                    self.errors[lane] = e
+                    continue
+                for a in (2 * lane, 2 * lane + 1):
+                    self.fast_damage[a] = self.calculateDamage(a, specs[a].fast)
+            still_active = []
+            for lane in active:
+                if lane in self.errors:
+                    continue
+                elapsed[lane] += self.TURN_DURATION
+                if hp[2 * lane] <= 0 or hp[2 * lane + 1] <= 0:
+                    elapsed[lane] += self.TURN_DURATION
+                else:
+                    still_active.append(lane)
+            active = still_active
+
+    def fast_turns(self, lanes: Iterable[int], fast_forward=True) -> List[int]:
+        """Perform a turn of every lane where no side can use a charged move.
+
+        As `perform_turn`: a side waits or uses its fast move, both moves hit. Idle turns
+        are skipped first with `fast_forward`. Return the other lanes, in order."""
+        hp = self.hp
+        energy = self.energy
+        waitTurns = self.waitTurns
+        cost = self.charged_cost
+        damage = self.fast_damage
+        specs = self.specs
+        MAX_ENERGY = self.MAX_ENERGY
+        others = []
+        for lane in lanes:
+            first = 2 * lane
+            second = first + 1
+            if damage[first] is None or damage[second] is None:
+                others.append(lane)  # perform_turn fails as Battle
+                continue
+            if fast_forward:
+                self._fast_forward(lane, (damage[first], damage[second]))
+            if (
+                waitTurns[first] < 1 and cost[first] is not None and energy[first] >= cost[first]
+            ) or (
+                waitTurns[second] < 1
+                and cost[second] is not None
+                and energy[second] >= cost[second]
+            ):
+                others.append(lane)
+                continue
+            self.turns[lane] += 1
+            for a in (first, second):
+                if waitTurns[a] >= 1:
+                    waitTurns[a] -= 1
+                    continue
+                fast = specs[a].fast
+                energy[a] = min(energy[a] + fast.energyDelta, MAX_ENERGY)
+                waitTurns[a] = fast.waitTurns
+                hp[a ^ 1] -= min(damage[a], hp[a ^ 1])
+        return others
+
+    def hp_left(self, lane: int, i: int) -> int:
+        """HP of pokemon `i` (0 or 1) at the end of `lane`"""
+        return self.hp[2 * lane + i]
+
+    def seconds(self, lane: int) -> float:
+        return self.elapsed[lane] / 1000
+
+    def rate(self, lane: int, i: int) -> int:
+        """Rate a pokemon in a lane, as `Battle.rate`"""
+        return self.rating(2 * lane + i)
+
@@ -1,324 +1,601 @@
+import json
+import random
+from array import array
+from functools import lru_cache
 from math import floor
-from typing import Iterable, List
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, TextIO, Tuple, Union
 
-from .gamemaster import BUFFS, EFFECTIVE, SETTINGS
-from .model import Move, Pokemon
+from . import gamemaster
+from .model import Move, Pokemon, PokemonSpec
+
+# Bump when the battle rules (see BattleRules) change the results:
+# stored battle outcomes are keyed by it, see matchups
+ENGINE_VERSION = 2
 
 
 class BL:
-    """Holds and generate battle log"""
+    """Battle log: events are recorded in a preallocated buffer, text is formatted when read.
 
-    def __init__(self, battle: "Battle"):
-        self.logs: List[str] = []
-        self.battle = battle
+    Each event is a row of `FIELDS` ints: the kind (see `KINDS`), the turn, the pokemon,
+    the move (index in `moves`, -1 if none), the damage or buff amount, the stat of the buff
+    (see `STATS`) and then HP and energy of both pokemons, after the event."""
 
-    def _p_name(self, a):
-        return self.battle.pokemons[a].title()
+    FIELDS = (
+        "kind", "turn", "pokemon", "move", "value", "stat", "hp0", "energy0", "hp1", "energy1"
+    )
+    KINDS = ("start", "damage", "shield", "buff", "end_turn")
+    STATS = ("attack", "defense")
 
-    def _p_str(self, a):
-        pkmn = self.battle.pokemons[a]
-        return "{!s}(HP: {}, energy: {})".format(pkmn.name.title(), pkmn.hp, pkmn.energy)
+    def __init__(self, battle: "Battle", capacity=256):
+        self.battle = battle
+        self.size = 0
+        self.moves = []  # type: List[Move]
+        self.__move_index = {}  # type: Dict[Move, int]
+        self.__buffer = array("i", bytes(4 * len(self.FIELDS) * capacity))
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __record(self, kind: int, a=-1, move: Optional[Move] = None, value=0, stat=-1) -> None:
+        width = len(self.FIELDS)
+        buffer = self.__buffer
+        i = self.size * width
+        if i + width > len(buffer):
+            buffer.extend(bytes(4 * len(buffer)))
+        if move is None:
+            moveI = -1
+        elif move in self.__move_index:
+            moveI = self.__move_index[move]
+        else:
+            moveI = self.__move_index[move] = len(self.moves)
+            self.moves.append(move)
+        battle = self.battle
+        buffer[i] = kind
+        buffer[i + 1] = self.battle.turn
+        buffer[i + 2] = a
+        buffer[i + 3] = moveI
+        buffer[i + 4] = value
+        buffer[i + 5] = stat
+        buffer[i + 6] = battle.hp[0]
+        buffer[i + 7] = battle.energy[0]
+        buffer[i + 8] = battle.hp[1]
+        buffer[i + 9] = battle.energy[1]
+        self.size += 1
 
-    def shield(self, a: int, move: Move):
-        self.logs.append(
-            "{:>2} {} uses {} but shield is used: deals 1 damange and loses {} energy".format(
-                self.battle.turn, self._p_name(a), move, -move.energyDelta
-            )
-        )
+    def start(self):
+        self.__record(0)
 
     def damage(self, a: int, move: Move, dmg: int):
-        self.logs.append(
-            "{:>2} {} uses {}: deals {} damage and gains {} energy".format(
-                self.battle.turn, self._p_str(a), move, dmg, move.energyDelta
-            )
-        )
+        self.__record(1, a, move, dmg)
 
-    def start(self):
-        self.logs.append(
-            "Start: {!r} vs {!r}".format(self.battle.pokemons[0], self.battle.pokemons[1])
-        )
-
-    def end_turn(self):
-        self.logs.append(
-            "{:>2} End of turn: {} vs {}".format(self.battle.turn, self._p_str(0), self._p_str(1))
-        )
+    def shield(self, a: int, move: Move):
+        self.__record(2, a, move, 1)
 
     def buff(self, a: int, stat: str, amount: int):
-        texts = [None, "rose", "rose sharply", "fell sharply", "fell"]
-        self.logs.append(
-            "{:>2} {} {} {}".format(self.battle.turn, self._p_str(a), stat, texts[amount])
-        )
+        self.__record(3, a, None, amount, self.STATS.index(stat))
+
+    def end_turn(self):
+        self.__record(4)
+
+    def rows(self) -> Iterator[Tuple[int, ...]]:
+        """Recorded events, as tuples of ints (see `FIELDS`)"""
+        width = len(self.FIELDS)
+        for i in range(0, self.size * width, width):
+            yield tuple(self.__buffer[i : i + width])
+
+    def events(self) -> Iterator[Dict[str, Any]]:
+        """Recorded events, as dicts with the kind, the move id and the stat by name"""
+        for row in self.rows():
+            event = dict(zip(self.FIELDS, row))
+            event["kind"] = self.KINDS[row[0]]
+            event["move"] = self.moves[row[3]].moveId if row[3] >= 0 else None
+            event["stat"] = self.STATS[row[5]] if row[5] >= 0 else None
+            yield event
+
+    def to_jsonl(self, fp: TextIO) -> None:
+        """Write the events to `fp`, a JSON object for each line"""
+        for event in self.events():
+            fp.write(json.dumps(event) + "\n")
 
+    @property
+    def logs(self) -> List[str]:
+        """The events, as text"""
+        return [self.format(row) for row in self.rows()]
 
-class DummyBL:
-    """To fake BL when not needed"""
+    def format(self, row: Tuple[int, ...]) -> str:
+        kind, turn, a, moveI, value, stat = row[:6]
+        specs = self.battle.specs
 
-    def __call__(self, *args, **kwargs):
-        pass
+        def p_str(i):
+            return "{!s}(HP: {}, energy: {})".format(
+                specs[i].name.title(), row[6 + 2 * i], row[7 + 2 * i]
+            )
 
-    def __getattr__(self, name):
-        if name == "log":
-            return ()
-        return self
+        if kind == 0:
+            return "Start: {!r} vs {!r}".format(specs[0], specs[1])
+        if kind == 1:
+            move = self.moves[moveI]
+            return "{:>2} {} uses {}: deals {} damage and gains {} energy".format(
+                turn, p_str(a), move, value, move.energyDelta
+            )
+        if kind == 2:
+            move = self.moves[moveI]
+            text = "{:>2} {} uses {} but shield is used: deals 1 damange and loses {} energy"
+            return text.format(turn, specs[a].title(), move, -move.energyDelta)
+        if kind == 3:
+            texts = [None, "rose", "rose sharply", "fell sharply", "fell"]
+            return "{:>2} {} {} {}".format(turn, p_str(a), self.STATS[stat], texts[value])
+        return "{:>2} End of turn: {} vs {}".format(turn, p_str(0), p_str(1))
 
 
 class FakeMove(Move):
-    def __init__(self, name="Fake"):
-        self.moveId = name
-        self.energyDelta = 0
-        self.type = None
-        self.power = 0
-        self.durationTurns = 1
-        self.buffs = None
+    def __new__(cls, name="Fake"):
+        return cls._build(name, 0, None, 0, 0, None)
 
 
 WAIT_TURN = FakeMove("Wait")
 
 
-class Battle:
-    MAX_ENERGY = int(SETTINGS["maxEnergy"])
-    TURN_DURATION = int(SETTINGS["turnDurationSeconds"] * 1000)
-    CHARGING_DURATION = 9500
+class DamageTable:
+    """Damage of the moves of `attacker` against `defender`.
 
-    def __init__(self, pokemons: Iterable[Pokemon], shields=(1, 1), battlelog=False):
-        self.pokemons = [pokemon.copy() for pokemon in pokemons]
-        if isinstance(shields, int):
-            shields = [shields, shields]
-        self.startSchields = list(shields)
-        self.reset()
-        self.waitTurns = [0, 0]
-        if battlelog:
-            self.bl = BL(self)
-            self.bl.start()
-        else:
-            self.bl = DummyBL()  # type: ignore
+    A table by move, attack stage of the attacker and defense stage of the defender
+    (as indexes of `PokemonSpec.attacks` and `defenses`), every entry is computed on
+    first use. See `damage_table` to share it between battles."""
 
-    def reset(self) -> None:
-        self.turn = 0
-        self.mseconds = 0
-        self.shields = self.startSchields
-        for pokemon in self.pokemons:
-            pokemon.reset()
-
-    def __repr__(self):
-        return "Battle({!r}, shields={}".format(self.pokemons, self.startSchields)
-
-    def __str__(self):
-        return "{!s} vs {!s}".format(self.pokemons[0], self.pokemons[1])
+    __slots__ = ("attacker", "defender", "__rows")
 
-    def remaining_shields(self, b: int):
-        return self.shields[b]
+    def __init__(self, attacker: PokemonSpec, defender: PokemonSpec):
+        self.attacker = attacker
+        self.defender = defender
+        self.__rows = {}  # type: Dict[Move, List[List[Optional[int]]]]
 
-    def consume_shield(self, b: int):
-        self.shields[b] -= 1
+    def damage(self, move: Move, attBuffI: int, defBuffI: int) -> int:
+        try:
+            row = self.__rows[move][attBuffI]
+        except KeyError:
+            rows = [[None] * len(self.defender.defenses) for _ in self.attacker.attacks]
+            row = self.__rows.setdefault(move, rows)[attBuffI]
+        damage = row[defBuffI]
+        if damage is None:
+            damage = row[defBuffI] = self.compute(move, attBuffI, defBuffI)
+        return damage
 
-    def calculateDamage(self, a, move: Move) -> int:
-        b = a ^ 1
+    def compute(self, move: Move, attBuffI: int, defBuffI: int) -> int:
+        """Damage of `move`, without the table"""
         if move.is_fast:
-            attackMultiplier = SETTINGS["fastAttackBonusMultiplier"]
+            attackMultiplier = gamemaster.SETTINGS["fastAttackBonusMultiplier"]
         else:
-            attackMultiplier = SETTINGS["chargeAttackBonusMultiplier"]
-        damage = (
+            attackMultiplier = gamemaster.SETTINGS["chargeAttackBonusMultiplier"]
+        return (
             floor(
                 move.power
-                * move.stab_multiplier(self.pokemons[a].types)
-                * (self.pokemons[a].attack / self.pokemons[b].defense)
-                * self.typeMultiplier(b, move)
+                * move.stab_multiplier(self.attacker.types)
+                * (self.attacker.attacks[attBuffI] / self.defender.defenses[defBuffI])
+                * gamemaster.DEFENDER_EFFECTIVE[move.typeOrdinal][self.defender.defenderIndex]
                 * 0.5
                 * attackMultiplier
             )
             + 1
         )
-        return damage
 
-    @staticmethod
-    def calculateBaseMoveDamage(move: Move, attacker: Pokemon):
-        if move.is_fast:
-            attackMultiplier = SETTINGS["fastAttackBonusMultiplier"]
-        else:
-            attackMultiplier = SETTINGS["chargeAttackBonusMultiplier"]
-        if move.type in attacker.types:
-            attackMultiplier *= SETTINGS["sameTypeAttackBonusMultiplier"]
-        damage = move.power * attackMultiplier + 1
-        return damage
 
-    def typeMultiplier(self, b: int, move: Move) -> float:
-        multiplier = 1
-        for ptype in self.pokemons[b].types:
-            multiplier *= EFFECTIVE[move.type][ptype]
-        return multiplier
+@lru_cache(maxsize=4096)
+def damage_table(attacker: PokemonSpec, defender: PokemonSpec) -> DamageTable:
+    """The `DamageTable` of a matchup, shared by every battle between the same specs"""
+    return DamageTable(attacker, defender)
 
-    def can_continue(self):
-        if not all(self.pokemons) or len(self.pokemons) != 2:
-            return False
-        if self.pokemons[0].hp <= 0 or self.pokemons[1].hp <= 0:
-            return False
-        # TODO: timer
-        return True
+
+gamemaster.on_unload(damage_table.cache_clear)
+
+
+def stat_stage(stage: int, delta: int) -> int:
+    """Buff index after a change of `delta` stages, within the gamemaster limits"""
+    value = max(gamemaster.BUFFS["minimumStatStage"], stage + delta)
+    return min(gamemaster.BUFFS["maximumStatStage"], value)
+
+
+class Combatant:
+    """A pokemon in a battle: its state is read from the battle, other attributes from its spec"""
+
+    __slots__ = ("battle", "index", "spec")
+
+    def __init__(self, battle: "BattleRules", index: int):
+        self.battle = battle
+        self.index = index
+        self.spec = battle.specs[index]
 
     @property
-    def seconds(self):
-        return self.mseconds / 1000
+    def hp(self) -> int:
+        return self.battle.hp[self.index]
+
+    @hp.setter
+    def hp(self, value: int) -> None:
+        self.battle.hp[self.index] = value
+
+    @property
+    def energy(self) -> int:
+        return self.battle.energy[self.index]
+
+    @energy.setter
+    def energy(self, value: int) -> None:
+        self.battle.energy[self.index] = value
+
+    @property
+    def attBuffI(self) -> int:
+        return self.battle.attBuffI[self.index]
+
+    @attBuffI.setter
+    def attBuffI(self, value: int) -> None:
+        self.battle.attBuffI[self.index] = value
+
+    @property
+    def defBuffI(self) -> int:
+        return self.battle.defBuffI[self.index]
+
+    @defBuffI.setter
+    def defBuffI(self, value: int) -> None:
+        self.battle.defBuffI[self.index] = value
+
+    @property
+    def attack(self) -> float:
+        return self.spec.attacks[self.attBuffI]
+
+    @property
+    def defense(self) -> float:
+        return self.spec.defenses[self.defBuffI]
+
+    def __getattr__(self, name):
+        if name.startswith("__"):  # e.g. while unpickling, before spec is set
+            raise AttributeError(name)
+        return getattr(self.spec, name)
+
+    def __repr__(self) -> str:
+        return "Combatant({!r}, hp={}, energy={})".format(self.spec, self.hp, self.energy)
+
+    def __str__(self) -> str:
+        return str(self.spec)
+
+
+class BattleRules:
+    """The rules of a battle, shared by `Battle` and `batch.BatchBattle`.
+
+    The state is kept in flat lists, by side: side `a` of lane `a >> 1` fights against
+    side `a ^ 1`. A `Battle` is a single lane, sides 0 and 1."""
+
+    CHARGING_DURATION = 9500
+    # the battle log, None when disabled
+    bl = None  # type: Optional[BL]
+
+    def __init__(self, specs: List[PokemonSpec], shields: List[int], roll_buffs=False):
+        # from gamemaster, read here and not at import time
+        self.MAX_ENERGY = int(gamemaster.SETTINGS["maxEnergy"])
+        self.TURN_DURATION = int(gamemaster.SETTINGS["turnDurationSeconds"] * 1000)
+        self.specs = specs
+        self.startSchields = shields
+        self.damages = [
+            damage_table(spec, specs[a ^ 1]) for a, spec in enumerate(specs)
+        ]  # type: List[DamageTable]
+        # buffs activated by chance (see roll_buff), else always
+        self.roll_buffs = roll_buffs
+        self.reset()
+
+    def reset(self) -> None:
+        """Reset HP, energy, buffs, shields and time of every side"""
+        specs = self.specs
+        self.hp = [spec.startHp for spec in specs]
+        self.energy = [0] * len(specs)
+        self.waitTurns = [0] * len(specs)
+        self.attBuffI = [spec.attBuffI for spec in specs]
+        self.defBuffI = [spec.defBuffI for spec in specs]
+        self.shields = list(self.startSchields)
+        # by lane
+        self.turns = [0] * (len(specs) >> 1)
+        self.elapsed = [0] * (len(specs) >> 1)
+        self.buffRolls = {}  # type: Dict[Tuple[int, str], float]
+
+    def calculateDamage(self, a: int, move: Move) -> int:
+        return self.damages[a].damage(move, self.attBuffI[a], self.defBuffI[a ^ 1])
+
+    def rating(self, a: int) -> int:
+        """Rate side `a`, same as pvpoke"""
+        b = a ^ 1
+        startHpA = self.specs[a].startHp
+        startHpB = self.specs[b].startHp
+        return floor(
+            (500 * ((startHpB - self.hp[b]) / startHpB)) + (500 * (self.hp[a] / startHpA))
+        )
 
     def perform_move(self, a: int, move: Move) -> None:
-        if move == WAIT_TURN:
+        if move is WAIT_TURN:
             return
         b = a ^ 1
-        attacker = self.pokemons[a]
-        defender = self.pokemons[b]
+        hp = self.hp
         damage = self.calculateDamage(a, move)
-        attacker.energy += move.energyDelta
-        attacker.energy = min(attacker.energy, self.MAX_ENERGY)
+        self.energy[a] = min(self.energy[a] + move.energyDelta, self.MAX_ENERGY)
         self.waitTurns[a] = move.waitTurns
         if move.is_fast:
-            defender.hp -= min(damage, defender.hp)
-            self.bl.damage(a, move, damage)
+            hp[b] -= min(damage, hp[b])
+            if self.bl is not None:
+                self.bl.damage(a, move, damage)
             return
         # charged
-        self.mseconds += self.CHARGING_DURATION
-        if self.remaining_shields(b) > 0:
-            self.consume_shield(b)
-            defender.hp -= 1
-            self.bl.shield(a, move)
+        self.elapsed[a >> 1] += self.CHARGING_DURATION
+        if self.shields[b] > 0:
+            self.shields[b] -= 1
+            hp[b] -= 1
+            if self.bl is not None:
+                self.bl.shield(a, move)
             self.apply_buffs(a, move)
             return
-        defender.hp -= min(damage, defender.hp)
-        self.bl.damage(a, move, damage)
+        hp[b] -= min(damage, hp[b])
+        if self.bl is not None:
+            self.bl.damage(a, move, damage)
         self.apply_buffs(a, move)
 
-    @staticmethod
-    def __calc_buff(start: int, delta: int) -> int:
-        value = start + delta
-        value = max(BUFFS["minimumStatStage"], value)
-        value = min(BUFFS["maximumStatStage"], value)
-        return value
+    def roll_buff(self, a: int, move: Move) -> bool:
+        """Roll the activation chance of `move` buffs, used by side `a`.
+
+        Always activated without `roll_buffs`, else the roll state is kept by the battle,
+        one for each side and move"""
+        if not self.roll_buffs:
+            return True
+        key = (a, move.moveId)
+        if key not in self.buffRolls:
+            self.buffRolls[key] = random.random()
+        activated, self.buffRolls[key] = move.buffs.roll(self.buffRolls[key])
+        return activated
 
     def apply_buffs(self, a: int, move: Move) -> None:
         if not move.buffs:
             return
         buff = move.buffs
-        if buff.a_att or buff.a_def:
-            attacker = self.pokemons[a]
-            if buff.a_att:
-                attacker.attBuffI = self.__calc_buff(attacker.attBuffI, buff.a_att)
-                self.bl.buff(a, "attack", buff.a_att)
-            if buff.a_def:
-                attacker.defBuffI = self.__calc_buff(attacker.defBuffI, buff.a_def)
-                self.bl.buff(a, "defense", buff.a_def)
-        if buff.b_att or buff.b_deff:
-            b = a ^ 1
-            defender = self.pokemons[b]
-            if buff.b_att:
-                defender.attBuffI = self.__calc_buff(defender.attBuffI, buff.b_att)
-                self.bl.buff(b, "attack", buff.b_att)
-            if buff.a_def:
-                defender.defBuffI = self.__calc_buff(defender.defBuffI, buff.b_def)
-                self.bl.buff(b, "defense", buff.b_def)
-
-    def perform_turn(self) -> None:
-        if self.pokemons[1].attack > self.pokemons[0].attack:
-            a = 1
+        if buff.chance < 1 and not self.roll_buff(a, move):
+            return
+        stages = (self.attBuffI, self.defBuffI)
+        for target, stat, amount in buff.changes:
+            side = a ^ target
+            stages[stat][side] = stat_stage(stages[stat][side], amount)
+            if self.bl is not None:
+                self.bl.buff(side, BL.STATS[stat], amount)
+
+    def perform_turn(self, lane=0) -> None:
+        hp = self.hp
+        waitTurns = self.waitTurns
+        first = 2 * lane
+        attBuffI = self.attBuffI
+        if (
+            self.specs[first + 1].attacks[attBuffI[first + 1]]
+            > self.specs[first].attacks[attBuffI[first]]
+        ):
+            a = first + 1
         else:
-            a = 0
+            a = first
         # a = attack priority
         b = a ^ 1
-        self.turn += 1
-        if self.waitTurns[a] >= 1:
-            self.waitTurns[a] -= 1
+        self.turns[lane] += 1
+        if waitTurns[a] >= 1:
+            waitTurns[a] -= 1
             movea = WAIT_TURN  # type: Move
         else:
             movea = decide_move(self, a)
-        if self.waitTurns[b] >= 1:
+        if waitTurns[b] >= 1:
             moveb = WAIT_TURN  # type: Move
-            self.waitTurns[b] -= 1
+            waitTurns[b] -= 1
         else:
             moveb = decide_move(self, b)
         b_moved = False
         if moveb.is_charged and movea.is_fast:
             self.perform_move(b, moveb)
             b_moved = True
-            if not self.can_continue():
+            if hp[first] <= 0 or hp[first + 1] <= 0:
                 return
         self.perform_move(a, movea)
         if movea.is_charged:
-            if not self.can_continue():
+            if hp[first] <= 0 or hp[first + 1] <= 0:
                 return
         if not b_moved:
             self.perform_move(b, moveb)
         # check for charged and waitTurns
         if movea.is_charged and moveb.is_fast:
-            self.waitTurns[b] = 0
+            waitTurns[b] = 0
         elif moveb.is_charged and movea.is_fast:
-            self.waitTurns[a] = 0
+            waitTurns[a] = 0
+
+    def fast_forward(self, lane=0) -> int:
+        """Skip the next turns of `lane` where both pokemons can only use their fast move.
+
+        Stops before a charged move becomes available or a KO. Fast moves have no buffs,
+        so damage stays the same: the final state is the same of performing every turn.
+        Return the number of turns skipped."""
+        first = 2 * lane
+        damages = [self.calculateDamage(a, self.specs[a].fast) for a in (first, first + 1)]
+        return self._fast_forward(lane, damages)
+
+    def _fast_forward(self, lane: int, damages: Sequence[int]) -> int:
+        """As `fast_forward`, with the damage of the fast move of both sides"""
+        first = 2 * lane
+        specs = self.specs
+        hp = self.hp
+        turns = min(
+            _idle_turns(specs[a], self.energy[a], self.waitTurns[a], damages[a - first], hp[a ^ 1])
+            for a in (first, first + 1)
+        )
+        if turns <= 1:
+            return 0
+        for a in (first, first + 1):
+            fast = specs[a].fast
+            period = fast.waitTurns + 1
+            fires = _fires(turns, self.waitTurns[a], period)
+            if fires:
+                self.energy[a] = min(self.energy[a] + fires * fast.energyDelta, self.MAX_ENERGY)
+                hp[a ^ 1] -= fires * damages[a - first]
+                last = self.waitTurns[a] + 1 + (fires - 1) * period
+                self.waitTurns[a] = fast.waitTurns - (turns - last)
+            else:
+                self.waitTurns[a] -= turns
+        self.turns[lane] += turns
+        self.elapsed[lane] += turns * self.TURN_DURATION
+        return turns
+
+
+class Battle(BattleRules):
+    def __init__(
+        self,
+        pokemons: Iterable[Union[Pokemon, PokemonSpec]],
+        shields=(1, 1),
+        battlelog=False,
+        roll_buffs=False,
+    ):
+        specs = [
+            pokemon if isinstance(pokemon, PokemonSpec) else pokemon.spec() for pokemon in pokemons
+        ]
+        if isinstance(shields, int):
+            shields = [shields, shields]
+        super().__init__(specs, list(shields), roll_buffs)
+        self.pokemons = [Combatant(self, a) for a in range(len(specs))]
+        if battlelog:
+            self.bl = BL(self)
+            self.bl.start()
+
+    @property
+    def turn(self) -> int:
+        return self.turns[0]
+
+    @turn.setter
+    def turn(self, value: int) -> None:
+        self.turns[0] = value
+
+    @property
+    def mseconds(self) -> int:
+        return self.elapsed[0]
 
-    def resolve(self) -> None:
-        self.mseconds += 1000
+    @mseconds.setter
+    def mseconds(self, value: int) -> None:
+        self.elapsed[0] = value
+
+    def __repr__(self):
+        return "Battle({!r}, shields={}".format(self.pokemons, self.startSchields)
+
+    def __str__(self):
+        return "{!s} vs {!s}".format(self.pokemons[0], self.pokemons[1])
+
+    def remaining_shields(self, b: int):
+        return self.shields[b]
+
+    def consume_shield(self, b: int):
+        self.shields[b] -= 1
+
+    @staticmethod
+    def calculateBaseMoveDamage(move: Move, attacker: Union[Pokemon, PokemonSpec]):
+        if move.is_fast:
+            attackMultiplier = gamemaster.SETTINGS["fastAttackBonusMultiplier"]
+        else:
+            attackMultiplier = gamemaster.SETTINGS["chargeAttackBonusMultiplier"]
+        if move.type in attacker.types:
+            attackMultiplier *= gamemaster.SETTINGS["sameTypeAttackBonusMultiplier"]
+        damage = move.power * attackMultiplier + 1
+        return damage
+
+    def typeMultiplier(self, b: int, move: Move) -> float:
+        return gamemaster.DEFENDER_EFFECTIVE[move.typeOrdinal][self.specs[b].defenderIndex]
+
+    def can_continue(self):
+        if len(self.hp) != 2:
+            return False
+        if self.hp[0] <= 0 or self.hp[1] <= 0:
+            return False
+        # TODO: timer
+        return True
+
+    @property
+    def seconds(self):
+        return self.mseconds / 1000
+
+    def resolve(self, fast_forward=True) -> None:
+        """Resolve the battle, with `fast_forward` (if no battle log) idle turns are skipped"""
+        fast_forward = fast_forward and self.bl is None
+        elapsed = self.elapsed
+        elapsed[0] += 1000
         while True:
+            if fast_forward:
+                self.fast_forward()
             self.perform_turn()
-            self.mseconds += self.TURN_DURATION
+            elapsed[0] += self.TURN_DURATION
             if not self.can_continue():
-                self.mseconds += self.TURN_DURATION
+                elapsed[0] += self.TURN_DURATION
                 break
-        self.bl.end_turn()
+        if self.bl is not None:
+            self.bl.end_turn()
 
     def rate(self, i: int) -> int:
         """Rate a pokemon in a battle, same as pvpoke"""
-        pokea = self.pokemons[i]
-        pokeb = self.pokemons[i ^ 1]
-        return floor(
-            (500 * ((pokeb.startHp - pokeb.hp) / pokeb.startHp))
-            + (500 * (pokea.hp / pokea.startHp))
-        )
-
-
-def _enablet_charged(attacker: Pokemon) -> List[Move]:
-    enabled_charged = []  # type: List[Move]
-    for charged in attacker.charged:
-        if not charged:
-            continue
-        if attacker.energy >= -charged.energyDelta:
-            enabled_charged.append(charged)
-    return enabled_charged
+        return self.rating(i)
+
+
+def _idle_turns(
+    attacker: PokemonSpec,
+    energy: int,
+    waitTurns: int,
+    damage: int,
+    hpDefender: int,
+) -> int:
+    """How many next turns `attacker` uses only its fast move, without a KO"""
+    # fires without a KO
+    fires = (hpDefender - 1) // damage
+    costs = [-charged.energyDelta for charged in attacker.charged if charged]
+    if costs:
+        # fires with energy lower than every charged move
+        if energy >= min(costs):
+            return waitTurns
+        if attacker.fast.energyDelta > 0:
+            fires = min(fires, (min(costs) - energy - 1) // attacker.fast.energyDelta + 1)
+    return waitTurns + fires * (attacker.fast.waitTurns + 1)
+
+
+def _fires(turns: int, waitTurns: int, period: int) -> int:
+    """How many times a move every `period` turns is used in `turns`, after `waitTurns`"""
+    if turns <= waitTurns:
+        return 0
+    return (turns - waitTurns - 1) // period + 1
 
 
-def decide_move(battle: Battle, a: int, consume_shield=True) -> Move:
+def decide_move(battle: BattleRules, a: int, consume_shield=True) -> Move:
     b = a ^ 1
-    attacker = battle.pokemons[a]
-    defender = battle.pokemons[b]
+    attacker = battle.specs[a]
+    energy = battle.energy[a]
     # no available charged
-    enabled_charged = _enablet_charged(attacker)
+    enabled_charged = [c for c in attacker.charged if c and energy >= -c.energyDelta]
     if not enabled_charged:
         return attacker.fast
     # is a fast move enought to ko?
-    if battle.calculateDamage(a, attacker.fast) >= defender.hp:
+    if battle.calculateDamage(a, attacker.fast) >= battle.hp[b]:
         return attacker.fast
     # at least 1 available charged
-    chargeds = sorted(attacker.charged, key=lambda charged: charged.energyDelta)
     # if poke has only 1 charged, use it
-    if len(chargeds) == 1:
+    if len(attacker.charged) == 1:
         return enabled_charged[0]
     if consume_shield:
         # we want to consume defender shields asap
         if battle.shields[b] > 0:
             return enabled_charged[0]
-    best_charged = find_best_charged(battle, a)
-    if attacker.charged[best_charged] in enabled_charged:
-        return attacker.charged[best_charged]
+    best_charged = attacker.charged[find_best_charged(battle, a)]
+    if best_charged in enabled_charged:
+        return best_charged
     # check if attacker is going ko soon
-    if battle.calculateDamage(b, defender.fast) * 2 >= attacker.hp:
+    if battle.calculateDamage(b, battle.specs[b].fast) * 2 >= battle.hp[a]:
         return enabled_charged[0]
     # TODO not best charged if attacker can ko before his ko
     return attacker.fast
 
 
-def find_best_charged(battle: Battle, a: int) -> int:
+def find_best_charged(battle: BattleRules, a: int) -> int:
     """Find the index of the best charged move for attacker by:
 
     1. Damage per energy
     2. Energy use
     3. With buff"""
-    attacker = battle.pokemons[a]
-    chargeds = attacker.charged
+    chargeds = battle.specs[a].charged
     # calculate damage per energy
     dpes = [battle.calculateDamage(a, chargeds[i]) / chargeds[i].energyDelta for i in (0, 1)]
     dpes = [-dpe for dpe in dpes]  # adjust sign
@@ -1,10 +1,13 @@
 from ..battle import Battle
 from ..csvreader import read_export
 from ..model import Pokemon
+from ..solver import MAX_NODES, SearchLimit, Solver
 from .utils import add_moves
 
 
-def main(a_name, a_cp, b_name, b_cp, b_moves, shields):
+def main(
+    a_name, a_cp, b_name, b_cp, b_moves, shields, optimal=False, jsonl=None, max_nodes=None
+):
     # A (mine)
     pokemons = read_export()
     # Filter incomplete pokemon
@@ -20,3 +23,28 @@ def main(a_name, a_cp, b_name, b_cp, b_moves, shields):
     battle = Battle([pokemon, opponent], shields, battlelog=True)
     battle.resolve()
     print("\n".join(battle.bl.logs))
+    if jsonl:
+        with open(jsonl, "w", encoding="utf8") as fp:
+            battle.bl.to_jsonl(fp)
+    if not optimal:
+        return
+    if max_nodes is None:
+        max_nodes = MAX_NODES
+    solver = Solver([pokemon, opponent], shields, max_nodes or None)
+    rating = solver.solve(battle.rate(0))
+    if not solver.exact:
+        print(
+            "Optimal play not found in {} nodes, rating between {} and {}".format(
+                max_nodes, *solver.rating_range
+            )
+        )
+        return
+    print("Optimal play, rating: {}".format(rating))
+    names = [pokemon.name.title(), opponent.name.title()]
+    try:
+        line = solver.line()
+    except SearchLimit:
+        print("Optimal moves not found in {} nodes".format(max_nodes))
+        return
+    for turn, a, move, shielded in line:
+        print("{:>2} {} uses {}{}".format(turn, names[a], move, ", shielded" if shielded else ""))
@@ -1,27 +1,38 @@
 from typing import Iterable, List, Tuple
 
-from ..battle import Battle
 from ..csvreader import read_export
+from ..matchups import ShieldMatrix, matchup_matrix, shield_matrix
 from ..model import Pokemon
 from ..utils import compatible_leagues
-from .utils import add_moves, filter_pokemons
+from .utils import add_moves, filter_pokemons, print_matrix
 
 
 def order_matches(
-    opponent: Pokemon, pokemons: Iterable[Pokemon], shields: int
+    opponent: Pokemon, pokemons: Iterable[Pokemon], shields: int, processes=None
 ) -> List[Tuple[Pokemon, int]]:
-    pokemons = iter(pokemons)
-    bests = []
-    ratings = []
-    for pokemon in pokemons:
-        battle = Battle([pokemon, opponent], shields)
-        battle.resolve()
-        bests.append(pokemon)
-        ratings.append(battle.rate(0))
+    bests = list(pokemons)
+    matrix = matchup_matrix(bests, [opponent], shields, processes)
+    if matrix.errors:
+        raise matrix.errors[min(matrix.errors)]
+    ratings = [matrix.rating(p, 0) for p in range(len(bests))]
     return list(sorted(zip(bests, ratings), key=lambda i: i[1], reverse=True))
 
 
-def main(opponent_name, opponent_cp, shields, limit, moves):
+def order_matches_matrix(
+    opponent: Pokemon, pokemons: Iterable[Pokemon], processes=None
+) -> List[Tuple[Pokemon, int, List[List[int]]]]:
+    """As `order_matches` in every shield scenario, ratings are the average of the matrix"""
+    pokemons = list(pokemons)
+    matrix = shield_matrix(pokemons, [opponent], processes)
+    results = []
+    for p, pokemon in enumerate(pokemons):
+        ratings = matrix.ratings(p, 0)
+        rating = round(sum(sum(row) for row in ratings) / len(ShieldMatrix.SHIELDS) ** 2)
+        results.append((pokemon, rating, ratings))
+    return sorted(results, key=lambda i: i[1], reverse=True)
+
+
+def main(opponent_name, opponent_cp, shields, limit, moves, matrix=False, processes=None):
     opponent = Pokemon.find_by_cp(opponent_name, opponent_cp)
     add_moves(opponent, moves)
     print("Target pokemon: {!s}".format(opponent))
@@ -30,6 +41,13 @@ def main(opponent_name, opponent_cp, shields, limit, moves):
     pokemons = [pokemon for pokemon in pokemons if pokemon.fast and pokemon.charged]
     league = compatible_leagues(opponent_cp)[0]
     pokemons = filter_pokemons(pokemons, league)
-    bests = order_matches(opponent, pokemons, shields)[:limit]
+    if matrix:
+        print("Rating by shields, yours in rows and opponent's in columns")
+        bests = order_matches_matrix(opponent, pokemons, processes)[:limit]
+        for i, (pokemon, rate, ratings) in enumerate(bests):
+            print("{:d}. {!s} ({})".format(i + 1, pokemon, rate))
+            print_matrix(ratings)
+        return
+    bests = order_matches(opponent, pokemons, shields, processes)[:limit]
     for i, (pokemon, rate) in enumerate(bests):
         print("{:d}. {!s} ({})".format(i + 1, pokemon, rate))
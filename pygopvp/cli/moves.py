@@ -2,6 +2,7 @@ from typing import Any, Iterable, List, Tuple
 
 from ..battle import Battle
 from ..csvreader import read_export
+from ..matchups import matchup_matrix
 from ..model import Move, Pokemon
 from ..rankings import generate_from_rankings
 from ..utils import compatible_leagues
@@ -17,18 +18,17 @@ def generate_movesets(pokemon: Pokemon) -> List[List[Move]]:
 
 
 def evaluate_movesets(
-    pokemon: Pokemon, movesets: List[List[Move]], opponents: Iterable[Pokemon], shields: int
+    pokemon: Pokemon,
+    movesets: List[List[Move]],
+    opponents: Iterable[Pokemon],
+    shields: int,
+    processes=None,
 ) -> List[Tuple[Any, int]]:
-    ratings = []
-    for moveset in movesets:
-        rating = 0
-        for opponent in opponents:
-            battle = Battle([pokemon, opponent], shields=shields)
-            battle.pokemons[0].fast = moveset[0]
-            battle.pokemons[0].charged = [moveset[1]]
-            battle.resolve()
-            rating += battle.rate(0)
-        ratings.append(rating)
+    specs = [pokemon.spec(moveset) for moveset in movesets]
+    matrix = matchup_matrix(specs, list(opponents), shields, processes)
+    if matrix.errors:
+        raise matrix.errors[min(matrix.errors)]
+    ratings = [sum(matrix.row_ratings(m)) for m in range(len(movesets))]
     return sorted(zip(movesets, ratings), key=lambda i: i[1], reverse=True)
 
 
@@ -39,7 +39,9 @@ def order_by_time(movesets: List[List[Move]]):
     return sorted(zip(movesets, times), key=lambda i: i[1])
 
 
-def main(name: str, cp: int, dataname: str, shields: int, nopponents: int) -> None:
+def main(
+    name: str, cp: int, dataname: str, shields: int, nopponents: int, processes=None
+) -> None:
     cvs_pokemons = read_export()
     pokemons = find_pokemon(cvs_pokemons, name, cp)
     if not pokemons:
@@ -64,7 +66,7 @@ def main(name: str, cp: int, dataname: str, shields: int, nopponents: int) -> No
             movesets.append([pokemon.fast, pokemon.charged[1]])
     print("Ranks:")
     opponents = generate_from_rankings(league.cp, dataname, top=nopponents)
-    bests = evaluate_movesets(pokemon, movesets, opponents, shields)
+    bests = evaluate_movesets(pokemon, movesets, opponents, shields, processes)
     top = bests[0][1]
     for i, moveset in enumerate(bests):
         fast = moveset[0][0]
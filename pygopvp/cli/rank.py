@@ -1,39 +1,103 @@
 """Reads from  PvPoke ranking files"""
 from typing import Iterable, List, Tuple
 
-from ..battle import Battle
 from ..csvreader import read_export
+from ..matchups import ShieldMatrix, matchup_matrix, shield_matrix
 from ..model import Pokemon
+from ..montecarlo import MonteCarlo, percentiles
 from ..utils import League
-from .utils import filter_pokemons, load_opponents
+from .utils import filter_pokemons, load_opponents, print_matrix
 
 
 def order_pokemons(
-    opponents: Iterable[Pokemon], pokemons: Iterable[Pokemon], shields: int
+    opponents: Iterable[Pokemon], pokemons: Iterable[Pokemon], shields: int, processes=None
 ) -> List[Tuple[Pokemon, int, float]]:
-    bests = []
-    ranks = []
-    wins = []
-    for pokemon in pokemons:
-        rank = 0
+    pokemons = list(pokemons)
+    opponents = list(opponents)
+    matrix = matchup_matrix(pokemons, opponents, shields, processes)
+    for (p, o), error in sorted(matrix.errors.items()):
+        print(error)
+        print([pokemons[p], opponents[o]])
+    ranks = [sum(matrix.row_ratings(p)) for p in range(len(pokemons))]
+    wins = [sum(matrix.row_wins(p)) / len(opponents) for p in range(len(pokemons))]
+    return sorted(zip(pokemons, ranks, wins), key=lambda i: i[1], reverse=True)
+
+
+def order_pokemons_matrix(
+    opponents: Iterable[Pokemon], pokemons: Iterable[Pokemon], processes=None
+) -> List[Tuple[Pokemon, int, float, List[List[int]]]]:
+    """As `order_pokemons` in every shield scenario, with the average rating matrix"""
+    pokemons = list(pokemons)
+    opponents = list(opponents)
+    matrix = shield_matrix(pokemons, opponents, processes)
+    scenarios = len(ShieldMatrix.SHIELDS) ** 2
+    results = []
+    for p, pokemon in enumerate(pokemons):
+        ratings = [[0] * len(ShieldMatrix.SHIELDS) for _ in ShieldMatrix.SHIELDS]
         win = 0
-        for i, opponent in enumerate(opponents):
-            battle = Battle([pokemon, opponent], shields)
-            try:
-                battle.resolve()
-            except Exception as e:
-                print(e)
-                print(battle.pokemons)
-            rank += battle.rate(0)
-            if battle.pokemons[1].hp <= 0:
-                win += 1
-        bests.append(pokemon)
-        ranks.append(rank)
-        wins.append(win / (i + 1))
-    return sorted(zip(bests, ranks, wins), key=lambda i: i[1], reverse=True)
-
-
-def main(league: League, dataname: str, shields, limit: int, nopponents: int) -> None:
+        for o, opponent in enumerate(opponents):
+            for error in matrix.errors(p, o):
+                print(error)
+                print([pokemon, opponent])
+            for shieldsA, row in enumerate(matrix.ratings(p, o)):
+                for shieldsB, rating in enumerate(row):
+                    ratings[shieldsA][shieldsB] += rating
+            win += sum(sum(row) for row in matrix.wins(p, o))
+        rank = round(sum(sum(row) for row in ratings) / scenarios)
+        averages = [[round(r / len(opponents)) for r in row] for row in ratings]
+        results.append((pokemon, rank, win / (len(opponents) * scenarios), averages))
+    return sorted(results, key=lambda i: i[1], reverse=True)
+
+
+def order_pokemons_montecarlo(
+    opponents: Iterable[Pokemon],
+    pokemons: Iterable[Pokemon],
+    shields,
+    trials: int,
+    seed=0,
+    processes=None,
+) -> List[Tuple[Pokemon, int, float, List[float]]]:
+    """As `order_pokemons` with buffs activated by chance, in `trials` seeded trials.
+
+    Rank and wins are averages of the trials, with the percentiles of the average rating."""
+    pokemons = list(pokemons)
+    specs = [opponent.spec() for opponent in opponents]
+    mc = MonteCarlo(
+        (
+            (pokemon_spec, opponent)
+            for pokemon_spec in (pokemon.spec() for pokemon in pokemons)
+            for opponent in specs
+        ),
+        shields,
+        trials,
+        seed,
+        processes,
+    )
+    for m, error in sorted(mc.errors.items()):
+        print(error)
+        print(mc.matchups[m])
+    results = []
+    for p, pokemon in enumerate(pokemons):
+        matchups = range(p * len(specs), (p + 1) * len(specs))
+        totals = [sum(ratings) for ratings in zip(*(mc.ratings(m) for m in matchups))]
+        rank = round(sum(totals) / trials)
+        wins = sum(mc.win_probability(m) for m in matchups) / len(specs)
+        averages = [round(total / len(specs)) for total in totals]
+        results.append((pokemon, rank, wins, percentiles(averages)))
+    return sorted(results, key=lambda i: i[1], reverse=True)
+
+
+def main(
+    league: League,
+    dataname: str,
+    shields,
+    limit: int,
+    nopponents: int,
+    matrix=False,
+    processes=None,
+    trials=0,
+    seed=0,
+) -> None:
     try:
         opponents = load_opponents(league, dataname, nopponents)
     except Exception as e:
@@ -41,6 +105,21 @@ def main(league: League, dataname: str, shields, limit: int, nopponents: int) ->
         return
     pokemons = read_export()
     pokemons = filter_pokemons(pokemons, league)
-    bests = order_pokemons(opponents, pokemons, shields)[:limit]
+    if matrix:
+        print("Average rating by shields, yours in rows and opponent's in columns")
+        for i, best in enumerate(order_pokemons_matrix(opponents, pokemons, processes)[:limit]):
+            print("{:d}. {!s} = {} {:.2%}".format(i + 1, best[0], best[1], best[2]))
+            print_matrix(best[3])
+        return
+    if trials:
+        print("Average of {} trials, average rating percentiles: 5% 50% 95%".format(trials))
+        bests = order_pokemons_montecarlo(
+            opponents, pokemons, shields, trials, seed, processes
+        )[:limit]
+        for i, best in enumerate(bests):
+            print("{:d}. {!s} = {} {:.2%}".format(i + 1, best[0], best[1], best[2]))
+            print("    " + " ".join("{:>4}".format(r) for r in best[3]))
+        return
+    bests = order_pokemons(opponents, pokemons, shields, processes)[:limit]
     for i, best in enumerate(bests):
         print("{:d}. {!s} = {} {:.2%}".format(i + 1, best[0], best[1], best[2]))
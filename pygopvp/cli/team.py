@@ -1,30 +1,25 @@
 from typing import Iterable, List, Set, Tuple
 
-from ..battle import Battle
 from ..csvreader import read_export
+from ..matchups import matchup_matrix
 from ..model import Pokemon
 from .utils import filter_pokemons, load_opponents
 
 
 def order_pokemons(
-    opponents: Iterable[Pokemon], pokemons: Iterable[Pokemon], shields: int
+    opponents: Iterable[Pokemon], pokemons: Iterable[Pokemon], shields: int, processes=None
 ) -> List[Tuple[Pokemon, Set[str]]]:
-    bests = []
+    opponents = list(opponents)
+    pokemons = list(pokemons)
+    matrix = matchup_matrix(pokemons, opponents, shields, processes)
+    for (p, o), error in sorted(matrix.errors.items()):
+        print(error)
+        print([pokemons[p], opponents[o]])
     wins = []  # type: List[Set[str]]
-    for pokemon in pokemons:
-        win = []
-        for opponent in opponents:
-            battle = Battle([pokemon, opponent], shields)
-            try:
-                battle.resolve()
-            except Exception as e:
-                print(e)
-                print(battle.pokemons)
-            if battle.pokemons[1].hp <= 0:
-                win.append(opponent.title())
-        bests.append(pokemon)
-        wins.append(set(win))
-    return sorted(zip(bests, wins), key=lambda i: len(i[1]), reverse=True)
+    for p in range(len(pokemons)):
+        row = matrix.row_wins(p)
+        wins.append(set(opponent.title() for o, opponent in enumerate(opponents) if row[o]))
+    return sorted(zip(pokemons, wins), key=lambda i: len(i[1]), reverse=True)
 
 
 def order_coverage(
@@ -43,7 +38,7 @@ def order_coverage(
     return sorted(ratings, key=lambda r: len(r[1]), reverse=True)
 
 
-def main(league, dataname: str, shields: int, limit: int, nopponents: int) -> None:
+def main(league, dataname: str, shields: int, limit: int, nopponents: int, processes=None) -> None:
     try:
         opponents = load_opponents(league, dataname, nopponents)
     except Exception as e:
@@ -51,7 +46,7 @@ def main(league, dataname: str, shields: int, limit: int, nopponents: int) -> No
         return
     pokemons = read_export()
     pokemons = filter_pokemons(pokemons, league)
-    bests = order_pokemons(opponents, pokemons, shields)[:limit]
+    bests = order_pokemons(opponents, pokemons, shields, processes)[:limit]
     print("\nBest pokemons:")
     for i, best in enumerate(bests):
         print("{:d}. {!s} = {}".format(i + 1, best[0], best[1]))
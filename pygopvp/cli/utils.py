@@ -94,6 +94,11 @@ def print_table(headers: Iterable[str], rows: Iterable[Iterable[str]]) -> None:
     print(" ")
 
 
+def print_matrix(matrix: Iterable[Iterable[int]], indent="    ") -> None:
+    """Prints a shield matrix (`matchups.ShieldMatrix`) on a line, a row for each own shields."""
+    print(indent + " | ".join(" ".join("{:>4}".format(c) for c in row) for row in matrix))
+
+
 def load_opponents(league: League, dataname: str, nopponents: int) -> List[Pokemon]:
     # AI Trainers (Spark, Candela, Blance)
     try:
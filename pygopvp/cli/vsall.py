@@ -1,32 +1,55 @@
 """Reads from  PvPoke ranking files"""
 from typing import Iterable, List, Tuple
 
-from ..battle import Battle
 from ..csvreader import read_export
+from ..matchups import ShieldMatrix, matchup_matrix, shield_matrix
 from ..model import Pokemon
 from ..utils import compatible_leagues
-from .utils import find_pokemon, load_opponents
+from .utils import find_pokemon, load_opponents, print_matrix
 
 
 def battle_all(
-    pokemon: Pokemon, opponents: Iterable[Pokemon], shields: int
+    pokemon: Pokemon, opponents: Iterable[Pokemon], shields: int, processes=None
 ) -> Tuple[int, List[Tuple[Pokemon, int]]]:
-    win = 0
-    ranks = []
-    for i, opponent in enumerate(opponents):
-        battle = Battle([pokemon, opponent], shields)
-        try:
-            battle.resolve()
-        except Exception as e:
-            print(e)
-            print(battle.pokemons)
-        if battle.pokemons[1].hp <= 0:
-            win += 1
-        ranks.append(battle.rate(0))
+    opponents = list(opponents)
+    matrix = matchup_matrix([pokemon], opponents, shields, processes)
+    for (_, o), error in sorted(matrix.errors.items()):
+        print(error)
+        print([pokemon, opponents[o]])
+    win = sum(matrix.row_wins(0))
+    ranks = list(matrix.row_ratings(0))
     return win, sorted(zip(opponents, ranks), key=lambda i: i[1], reverse=True)
 
 
-def main(name: str, cp: int, dataname: str, shields: int, limit: int, nopponents: int) -> None:
+def battle_all_matrix(
+    pokemon: Pokemon, opponents: Iterable[Pokemon], processes=None
+) -> Tuple[int, List[Tuple[Pokemon, int, List[List[int]]]]]:
+    """As `battle_all` in every shield scenario, ranks are the average of the matrix"""
+    opponents = list(opponents)
+    matrix = shield_matrix([pokemon], opponents, processes)
+    win = 0
+    results = []
+    for o, opponent in enumerate(opponents):
+        for error in matrix.errors(0, o):
+            print(error)
+            print([pokemon, opponent])
+        ratings = matrix.ratings(0, o)
+        win += sum(sum(row) for row in matrix.wins(0, o))
+        rank = round(sum(sum(row) for row in ratings) / len(ShieldMatrix.SHIELDS) ** 2)
+        results.append((opponent, rank, ratings))
+    return win, sorted(results, key=lambda i: i[1], reverse=True)
+
+
+def main(
+    name: str,
+    cp: int,
+    dataname: str,
+    shields: int,
+    limit: int,
+    nopponents: int,
+    matrix=False,
+    processes=None,
+) -> None:
     cvs_pokemons = read_export()
     pokemons = find_pokemon(cvs_pokemons, name, cp)
     if not pokemons:
@@ -42,7 +65,24 @@ def main(name: str, cp: int, dataname: str, shields: int, limit: int, nopponents
     except Exception as e:
         print(str(e))
         return
-    wins, poppos = battle_all(pokemon, opponents, shields)
+    if matrix:
+        wins, results = battle_all_matrix(pokemon, opponents, processes)
+        battles = len(results) * len(ShieldMatrix.SHIELDS) ** 2
+        print("Wins {:.0%} ({} over {})".format(wins / battles, wins, battles))
+        print("Rating by shields, yours in rows and opponent's in columns")
+        lopps = len(results)
+        # the best and the worst, as without matrix
+        top = list(range(min(limit, lopps)))
+        bottom = list(range(max(lopps - limit - 1, 0), lopps))
+        for i in top + [None] + bottom:
+            if i is None:
+                print("...")
+                continue
+            opponent, rank, ratings = results[i]
+            print("{:d}. {!s} = {}".format(i + 1, opponent.title(), rank))
+            print_matrix(ratings)
+        return
+    wins, poppos = battle_all(pokemon, opponents, shields, processes)
     lopps = len(opponents)
     poppos = list(poppos)
     print("Wins {:.0%} ({} over {})".format(wins / lopps, wins, lopps))
@@ -1,90 +1,290 @@
+import glob
+import hashlib
 import json
 import os
 import pathlib
-from typing import Any, Dict, Iterable
-from urllib.request import urlretrieve
+import pickle
+import re
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Sequence, TextIO, Tuple
 
-from .utils import LEAGUES, League, Type
+from .utils import DEFENDER_TYPES, LEAGUES, League, Type, download, file_digest
 
 DATA_DIR = "data"
 FILEPATH = os.path.join(DATA_DIR, "GAME_MASTER.json")
+SNAPSHOT_VERSION = 3
+URL = "https://raw.githubusercontent.com/PokeMiners/game_masters/master/latest/latest.json"
 
 
-def _update_miners():
+def _update_miners() -> List[str]:
+    """Download the gamemaster if changed and compile it, return the changed entries"""
     pathlib.Path(DATA_DIR).mkdir(parents=True, exist_ok=True)
-    urlretrieve(
-        url="https://raw.githubusercontent.com/PokeMiners/game_masters/master/latest/latest.json",
-        filename=FILEPATH,
+    old_digests = __current_digests()
+    if not download(URL, FILEPATH):
+        return []
+    _unload()
+    path = compile_snapshot()
+    return changed_entries(old_digests, _read_snapshot(path)["DIGESTS"])
+
+
+# Loaded on first access (see __getattr__), from a snapshot compiled from FILEPATH
+POKEMONS: Dict[str, Dict[str, Any]]
+MOVES: Dict[str, Dict[str, Any]]
+# EFFECTIVE[attack type ordinal][defender type ordinal]
+EFFECTIVE: Sequence[Sequence[float]]
+# DEFENDER_EFFECTIVE[attack type ordinal][index in utils.DEFENDER_TYPES]
+DEFENDER_EFFECTIVE: Sequence[Sequence[float]]
+SETTINGS: Dict[str, float]
+BUFFS: Dict[str, Any]
+TRAINERS: Dict[str, Dict[League, Iterable[str]]]
+HASH: str  # content hash of FILEPATH
+# Content hash of every entry: "POKEMON:<name>", "MOVE:<moveId>", "TRAINER:<name>",
+# "EFFECTIVE", "SETTINGS" and "BUFFS", see digest()
+DIGESTS: Dict[str, str]
+
+_FIELDS = (
+    "POKEMONS",
+    "MOVES",
+    "EFFECTIVE",
+    "DEFENDER_EFFECTIVE",
+    "SETTINGS",
+    "BUFFS",
+    "TRAINERS",
+    "HASH",
+    "DIGESTS",
+)
+# pokemonSettings keys used by the simulator, the others are discarded while parsing
+_POKEMON_KEYS = frozenset(
+    (
+        "pokemonId",
+        "form",
+        "type",
+        "type2",
+        "stats",
+        "quickMoves",
+        "cinematicMoves",
+        "eliteQuickMove",
+        "eliteCinematicMove",
+        "rarity",
+        "isTransferable",
     )
+)
+_SEPARATORS = re.compile(r"[\s,]*")
+_UNLOAD_CALLBACKS = []  # type: List[Callable[[], None]]
+
+
+def __effective_tables(effective: Dict[Type, Sequence[float]]) -> Tuple[Tuple, Tuple]:
+    """Build EFFECTIVE and DEFENDER_EFFECTIVE from the attackScalar of every type"""
+    matrix = tuple(tuple(effective[t]) for t in Type)
+    defenders = []
+    for scalars in matrix:
+        row = []
+        for types in DEFENDER_TYPES:
+            multiplier = 1.0
+            for ptype in types:
+                multiplier *= scalars[ptype]
+            row.append(multiplier)
+        defenders.append(tuple(row))
+    return matrix, tuple(defenders)
+
+
+def _iter_templates(fjson: TextIO, chunk_size=1 << 16) -> Iterator[Dict[str, Any]]:
+    """Decode the gamemaster list one template at a time, reading `fjson` in chunks"""
+    decoder = json.JSONDecoder()
+    buffer = fjson.read(chunk_size).lstrip()
+    if not buffer.startswith("["):
+        raise json.decoder.JSONDecodeError("Expecting '['", buffer, 0)
+    pos = 1
+    to_read = chunk_size
+    while True:
+        pos = _SEPARATORS.match(buffer, pos).end()
+        if pos < len(buffer) and buffer[pos] == "]":
+            return
+        try:
+            if pos == len(buffer):
+                raise json.decoder.JSONDecodeError("Expecting value", buffer, pos)
+            item, pos = decoder.raw_decode(buffer, pos)
+        except json.decoder.JSONDecodeError:
+            # incomplete template: keep only the unparsed tail and read more
+            chunk = fjson.read(to_read)
+            if not chunk:
+                raise
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            to_read *= 2
+            continue
+        to_read = chunk_size
+        yield item
+
+
+def __parse(filepath: str) -> Dict[str, Any]:
+    """Read the gamemaster JSON and extract everything the simulator uses.
+
+    Templates are decoded one at a time and discarded when not needed."""
+    pokemons = {}
+    moves = {}
+    effective = {}
+    settings = {}  # type: Dict[str, float]
+    buffs = {}  # type: Dict[str, Any]
+    trainers = {}  # type: Dict[str, Dict[League, Iterable[str]]]
+    smeargle_moves = {}
+    with open(filepath, "rt") as fjson:
+        for item in _iter_templates(fjson):
+            if "templateId" in item and "data" in item:
+                templateId = item["templateId"]
+                item = item["data"]
+                item["templateId"] = templateId
+            if "pokemonSettings" in item:
+                pokemon_data = item["pokemonSettings"]
+                # POKEMON
+                key = pokemon_data.get("form", pokemon_data["pokemonId"])
+                pokemons[key] = {k: v for k, v in pokemon_data.items() if k in _POKEMON_KEYS}
+            elif "combatMove" in item:
+                move_data = item["combatMove"]
+                key = move_data["uniqueId"]
+                moves[key] = move_data
+            elif "typeEffective" in item:
+                effective_data = item["typeEffective"]
+                key = effective_data["attackType"]
+                effective[Type(key)] = effective_data["attackScalar"][: len(Type)]
+            elif item["templateId"] == "COMBAT_SETTINGS":
+                settings.update(item["combatSettings"])
+            elif item["templateId"] == "COMBAT_STAT_STAGE_SETTINGS":
+                buffs.update(item["combatStatStageSettings"])
+            elif item["templateId"] == "SMEARGLE_MOVES_SETTINGS":
+                smeargle_moves.update(item["smeargleMovesSettings"])
+            elif "combatNpcTrainer" in item:
+                _, name, league_name = item["templateId"].split("_")
+                league = [l for l in LEAGUES if l.name == league_name.title()][0]
+                pokemons_data = [p for p in item["combatNpcTrainer"]["availablePokemon"]]
+                if name not in trainers:
+                    trainers[name] = {l: () for l in LEAGUES}
+                trainers[name][league] = []
+                for pokemon in pokemons_data:
+                    if "pokemonDisplay" in pokemon:
+                        trainers[name][league].append(pokemon["pokemonDisplay"]["form"])
+                    else:
+                        trainers[name][league].append(pokemon["pokemonType"])
+
+    pokemons["SMEARGLE"].update(smeargle_moves)
+    effective_matrix, defender_effective = __effective_tables(effective)
+    digests = {"EFFECTIVE": _digest(effective_matrix)}
+    digests["SETTINGS"] = _digest(settings)
+    digests["BUFFS"] = _digest(buffs)
+    digests.update(("POKEMON:" + key, _digest(value)) for key, value in pokemons.items())
+    digests.update(("MOVE:" + key, _digest(value)) for key, value in moves.items())
+    for name, leagues in trainers.items():
+        digests["TRAINER:" + name] = _digest([[l.name, p] for l, p in leagues.items()])
+    return {
+        "POKEMONS": pokemons,
+        "MOVES": moves,
+        "EFFECTIVE": effective_matrix,
+        "DEFENDER_EFFECTIVE": defender_effective,
+        "SETTINGS": settings,
+        "BUFFS": buffs,
+        "TRAINERS": trainers,
+        "DIGESTS": digests,
+    }
+
+
+def _digest(data: Any) -> str:
+    return hashlib.sha1(json.dumps(data, sort_keys=True).encode("utf8")).hexdigest()[:16]
+
+
+def digest(*keys: str) -> str:
+    """Return the content hash of the gamemaster entries `keys` (see DIGESTS).
 
+    Derived data should be stored with the digest of the entries it depends on"""
+    # globals don't go through __getattr__, load them here
+    if "DIGESTS" not in globals():
+        __load()
+    if len(keys) == 1:
+        return DIGESTS[keys[0]]
+    return _digest([DIGESTS[key] for key in keys])
 
-POKEMONS = {}
-MOVES = {}
-EFFECTIVE = {}
-SETTINGS: Dict[str, float] = {}
-BUFFS: Dict[str, Any] = {}
-TRAINERS: Dict[str, Dict[League, Iterable[str]]] = {}
 
+def changed_entries(old_digests: Dict[str, str], new_digests: Dict[str, str]) -> List[str]:
+    """Return the sorted DIGESTS keys added, removed or changed between two gamemasters"""
+    keys = set(old_digests) | set(new_digests)
+    return sorted(key for key in keys if old_digests.get(key) != new_digests.get(key))
 
-def __data_to_effective(effective_data):
-    matches = {}
-    for t, v in zip(Type, effective_data["attackScalar"]):
-        matches[t] = v
-    return matches
+
+def __current_digests() -> Dict[str, str]:
+    if "DIGESTS" in globals():
+        return DIGESTS
+    try:
+        return _read_snapshot(_snapshot_path(file_digest(FILEPATH)))["DIGESTS"]
+    except (OSError, ValueError, pickle.UnpicklingError, EOFError):
+        return {}
+
+
+def _snapshot_path(digest: str) -> str:
+    return os.path.join(DATA_DIR, "_gamemaster-{}.pickle".format(digest[:16]))
+
+
+def compile_snapshot(filepath=None) -> str:
+    """Compile the gamemaster JSON into a binary snapshot, return the snapshot path.
+
+    The snapshot is keyed by the content hash of the JSON, older snapshots are removed."""
+    filepath = filepath or FILEPATH
+    digest = file_digest(filepath)
+    snapshot = __parse(filepath)
+    snapshot["HASH"] = digest
+    snapshot["version"] = SNAPSHOT_VERSION
+    path = _snapshot_path(digest)
+    with open(path + ".tmp", "wb") as fsnap:
+        pickle.dump(snapshot, fsnap, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(path + ".tmp", path)
+    for old_path in glob.glob(os.path.join(DATA_DIR, "_gamemaster-*.pickle")):
+        if old_path != path:
+            os.unlink(old_path)
+    return path
+
+
+def _read_snapshot(path: str) -> Dict[str, Any]:
+    with open(path, "rb") as fsnap:
+        snapshot = pickle.load(fsnap)
+    if snapshot.get("version") != SNAPSHOT_VERSION:
+        raise ValueError("Outdated gamemaster snapshot: " + path)
+    return snapshot
 
 
 def __load():
     if not os.path.isfile(FILEPATH):
         _update_miners()
-    with open(FILEPATH, "rt") as fjson:
-        data = json.load(fjson)
-    smeargle_moves = {}
-    for item in data:
-        if "templateId" in item:
-            templateId = item["templateId"]
-            item = item["data"]
-            item["templateId"] = templateId
-        if "pokemonSettings" in item:
-            pokemon_data = item["pokemonSettings"]
-            # POKEMON
-            key = pokemon_data.get("form", pokemon_data["pokemonId"])
-            POKEMONS[key] = pokemon_data
-        elif "combatMove" in item:
-            move_data = item["combatMove"]
-            key = move_data["uniqueId"]
-            MOVES[key] = move_data
-        elif "typeEffective" in item:
-            effective_data = item["typeEffective"]
-            key = effective_data["attackType"]
-            EFFECTIVE[Type(key)] = __data_to_effective(effective_data)
-        elif item["templateId"] == "COMBAT_SETTINGS":
-            SETTINGS.update(item["combatSettings"])
-        elif item["templateId"] == "COMBAT_STAT_STAGE_SETTINGS":
-            BUFFS.update(item["combatStatStageSettings"])
-        elif item["templateId"] == "SMEARGLE_MOVES_SETTINGS":
-            smeargle_moves.update(item["smeargleMovesSettings"])
-        elif "combatNpcTrainer" in item:
-            _, name, league_name = item["templateId"].split("_")
-            league = [l for l in LEAGUES if l.name == league_name.title()][0]
-            pokemons = [p for p in item["combatNpcTrainer"]["availablePokemon"]]
-            if name not in TRAINERS:
-                TRAINERS[name] = {l: () for l in LEAGUES}
-            TRAINERS[name][league] = []
-            for pokemon in pokemons:
-                if "pokemonDisplay" in pokemon:
-                    TRAINERS[name][league].append(pokemon["pokemonDisplay"]["form"])
-                else:
-                    TRAINERS[name][league].append(pokemon["pokemonType"])
-
-    POKEMONS["SMEARGLE"].update(smeargle_moves)
+    path = _snapshot_path(file_digest(FILEPATH))
+    try:
+        snapshot = _read_snapshot(path)
+    except (OSError, ValueError, pickle.UnpicklingError, EOFError):
+        try:
+            path = compile_snapshot()
+        except json.decoder.JSONDecodeError:
+            os.unlink(FILEPATH)
+            _update_miners()
+            path = _snapshot_path(file_digest(FILEPATH))
+        snapshot = _read_snapshot(path)
+    for field in _FIELDS:
+        globals()[field] = snapshot[field]
+
+
+def _unload():
+    """Forget loaded data, it will be loaded again on next access"""
+    for field in _FIELDS:
+        globals().pop(field, None)
+    for callback in _UNLOAD_CALLBACKS:
+        callback()
+
+
+def on_unload(callback: Callable[[], None]) -> None:
+    """Register `callback`, invoked when loaded data is dropped (e.g. after an update)"""
+    _UNLOAD_CALLBACKS.append(callback)
+
+
+def __getattr__(name: str) -> Any:
+    if name in _FIELDS:
+        __load()
+        return globals()[name]
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
 
 
 if __name__ == "__main__":
-    _update_miners()
-    print("Gamemaster updated")
-
-try:
-    __load()
-except json.decoder.JSONDecodeError:
-    os.unlink(FILEPATH)
-    __load()
+    print("Gamemaster updated, changed: {}".format(len(_update_miners())))
@@ -1,14 +1,14 @@
 """Leaders' pokemons"""
 from typing import List
 
-from .gamemaster import TRAINERS
+from . import gamemaster
 from .model import Move, Pokemon
 from .utils import League
 
 
 def genate_from_leader(leader_name: str, league: League) -> List[Pokemon]:
     """Load pokemons from leaders given league"""
-    pnames = TRAINERS[leader_name.upper()][league]
+    pnames = gamemaster.TRAINERS[leader_name.upper()][league]
     pokemons = []
     for pname in pnames:
         pokemon = Pokemon.find_max(Pokemon.convert_name(pname), league.cp)
@@ -0,0 +1,159 @@
+"""Counters and timers on the hot paths, see `pygopvp --profile`.
+
+Nothing is measured until `enable`: it wraps the functions in place (and `disable`
+restores them), so there is no cost at all when disabled. Battles resolved in other
+processes (see `matchups`) are timed only as a whole, by `matchup_matrix`."""
+import json
+import sys
+import time
+from functools import wraps
+from typing import Any, Callable, Dict, List, TextIO, Tuple
+
+# calls and seconds, by stage; times include the nested stages
+STAGES = {}  # type: Dict[str, List[float]]
+COUNTERS = {}  # type: Dict[str, int]
+__PATCHED = []  # type: List[Tuple[Any, str, Any]]
+
+
+def _count(name: str, value=1) -> None:
+    COUNTERS[name] = COUNTERS.get(name, 0) + value
+
+
+def _timed(stage: str, func: Callable) -> Callable:
+    stats = STAGES.setdefault(stage, [0, 0.0])
+    perf_counter = time.perf_counter
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        start = perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            stats[0] += 1
+            stats[1] += perf_counter() - start
+
+    return wrapper
+
+
+def _battle_resolve(func: Callable) -> Callable:
+    @wraps(func)
+    def wrapper(battle, *args, **kwargs):
+        func(battle, *args, **kwargs)
+        _count("battles")
+        _count("turns", battle.turn)
+
+    return wrapper
+
+
+def _batch_resolve(func: Callable) -> Callable:
+    @wraps(func)
+    def wrapper(batch, *args, **kwargs):
+        func(batch, *args, **kwargs)
+        _count("battles", len(batch))
+        _count("turns", sum(batch.turns))
+
+    return wrapper
+
+
+def _cache_get(func: Callable) -> Callable:
+    @wraps(func)
+    def wrapper(store, key):
+        found, value = func(store, key)
+        _count("cache hits" if found else "cache misses")
+        return found, value
+
+    return wrapper
+
+
+def _cache_get_many(func: Callable) -> Callable:
+    @wraps(func)
+    def wrapper(store, keys):
+        keys = list(keys)
+        result = func(store, keys)
+        _count("cache hits", len(result))
+        _count("cache misses", len(keys) - len(result))
+        return result
+
+    return wrapper
+
+
+def __patch(owner: Any, name: str, stage: str, counter=None) -> None:
+    original = vars(owner)[name]
+    func = original.__func__ if isinstance(original, staticmethod) else original
+    if counter:
+        func = counter(func)
+    func = _timed(stage, func)
+    __PATCHED.append((owner, name, original))
+    setattr(owner, name, staticmethod(func) if isinstance(original, staticmethod) else func)
+
+
+def enable() -> None:
+    """Start counting and timing, from zero"""
+    from . import batch, battle, gamemaster, matchups, memo, model, rankings, utils
+
+    disable()
+    STAGES.clear()
+    COUNTERS.clear()
+    for module in (utils, gamemaster, rankings):
+        __patch(module, "download", "download")
+    __patch(gamemaster, "__load", "gamemaster load")
+    __patch(model.Pokemon, "_Pokemon__find_best", "IV search")
+    __patch(memo.MemoStore, "get", "cache", _cache_get)
+    __patch(memo.MemoStore, "get_many", "cache", _cache_get_many)
+    __patch(matchups, "matchup_matrix", "matchup_matrix")
+    __patch(matchups, "shield_matrix", "shield_matrix")
+    __patch(battle.Battle, "resolve", "Battle.resolve", _battle_resolve)
+    __patch(batch.BatchBattle, "resolve", "BatchBattle.resolve", _batch_resolve)
+    # shared by Battle and BatchBattle
+    __patch(battle.BattleRules, "perform_turn", "perform_turn")
+    __patch(battle, "decide_move", "decide_move")
+    __patch(battle.BattleRules, "calculateDamage", "calculateDamage")
+
+
+def disable() -> None:
+    """Restore the functions, counters and timers are kept"""
+    while __PATCHED:
+        owner, name, original = __PATCHED.pop()
+        setattr(owner, name, original)
+
+
+def stats() -> Dict[str, Any]:
+    """Stages (calls and seconds), counters and throughput of the resolved battles"""
+    seconds = sum(
+        STAGES.get(stage, (0, 0.0))[1] for stage in ("Battle.resolve", "BatchBattle.resolve")
+    )
+    result = {
+        "stages": {
+            stage: {"calls": int(calls), "seconds": spent}
+            for stage, (calls, spent) in STAGES.items()
+            if calls
+        },
+        "counters": dict(COUNTERS),
+    }  # type: Dict[str, Any]
+    if seconds:
+        result["battles_per_second"] = COUNTERS.get("battles", 0) / seconds
+        result["turns_per_second"] = COUNTERS.get("turns", 0) / seconds
+    return result
+
+
+def report(fp: TextIO = sys.stderr) -> None:
+    """Print `stats` as text"""
+    result = stats()
+    print("{:<28} {:>10} {:>10}".format("Stage", "calls", "seconds"), file=fp)
+    for stage, values in result["stages"].items():
+        print("{:<28} {:>10} {:>10.3f}".format(stage, values["calls"], values["seconds"]), file=fp)
+    for name, value in result["counters"].items():
+        print("{:<28} {:>10}".format(name, value), file=fp)
+    if "battles_per_second" in result:
+        print(
+            "{:.0f} battles/s, {:.0f} turns/s".format(
+                result["battles_per_second"], result["turns_per_second"]
+            ),
+            file=fp,
+        )
+
+
+def dump(filepath: str) -> None:
+    """Write `stats` as JSON"""
+    with open(filepath, "w", encoding="utf8") as fp:
+        json.dump(stats(), fp, indent=2)
@@ -0,0 +1,271 @@
+"""Level and IVs search, computed on the base stats of a species"""
+from array import array
+from bisect import bisect_left
+from collections import namedtuple
+from functools import lru_cache
+from math import floor, pow as fpow
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from . import gamemaster
+
+# Bump when the search results change: cached results are keyed by it, see `version`
+VERSION = 2
+# Combat Power Multiplier, by (level - 1) * 2
+CPMS = [
+    0.094,
+    0.135137432,
+    0.16639787,
+    0.192650919,
+    0.21573247,
+    0.236572661,
+    0.25572005,
+    0.273530381,
+    0.29024988,
+    0.306057377,
+    0.3210876,
+    0.335445036,
+    0.34921268,
+    0.362457751,
+    0.37523559,
+    0.387592406,
+    0.39956728,
+    0.411193551,
+    0.42250001,
+    0.432926419,
+    0.44310755,
+    0.453059958,
+    0.46279839,
+    0.472336083,
+    0.48168495,
+    0.4908558,
+    0.49985844,
+    0.508701765,
+    0.51739395,
+    0.525942511,
+    0.53435433,
+    0.542635767,
+    0.55079269,
+    0.558830576,
+    0.56675452,
+    0.574569153,
+    0.58227891,
+    0.589887917,
+    0.59740001,
+    0.604818814,
+    0.61215729,
+    0.619399365,
+    0.62656713,
+    0.633644533,
+    0.64065295,
+    0.647576426,
+    0.65443563,
+    0.661214806,
+    0.667934,
+    0.674577537,
+    0.68116492,
+    0.687680648,
+    0.69414365,
+    0.700538673,
+    0.70688421,
+    0.713164996,
+    0.71939909,
+    0.725571552,
+    0.7317,
+    0.734741009,
+    0.73776948,
+    0.740785574,
+    0.74378943,
+    0.746781211,
+    0.74976104,
+    0.752729087,
+    0.75568551,
+    0.758630378,
+    0.76156384,
+    0.764486065,
+    0.76739717,
+    0.770297266,
+    0.7731865,
+    0.776064962,
+    0.77893275,
+    0.781790055,
+    0.78463697,
+    0.787473578,
+    0.79030001,
+    0.8003,
+    0.8053,
+    0.81029999,
+    0.81529999,
+]
+
+Stats = Tuple[int, int, int]  # baseAttack, baseDefense, baseStamina
+Spread = Tuple[float, List[int]]  # level, [attackIV, defenseIV, staminaIV]
+# level, attackIV, defenseIV, staminaIV, CP, stat product, attack
+Candidate = Tuple[float, int, int, int, int, float, float]
+# best level and CP of some IVs, with their stat product, rank (1 is the best) and percentile
+IVRank = namedtuple("IVRank", ["level", "cp", "product", "rank", "percentile"])
+
+
+def version() -> str:
+    """Version of the search results, with the gamemaster buffs they depend on"""
+    return "{}-{}".format(VERSION, gamemaster.digest("BUFFS"))
+
+
+def __multipliers() -> Tuple[float, float]:
+    """Attack and defense multipliers without buffs"""
+    attack = gamemaster.BUFFS["attackBuffMultiplier"]
+    defense = gamemaster.BUFFS["defenseBuffMultiplier"]
+    return attack[(len(attack) - 1) >> 1], defense[(len(defense) - 1) >> 1]
+
+
+def candidates(stats: Stats, targetCP: int, lowerIV=0) -> Iterator[Candidate]:
+    """Yield every level and IVs combination with CP up to `targetCP`.
+
+    IVs go from 15 down to `lowerIV` (stamina, then defense, then attack), levels
+    go up from just below `targetCP`. The stat product is HP * attack * defense."""
+    baseAttack, baseDefense, baseStamina = stats
+    attackMult, defenseMult = __multipliers()
+    ivs = range(15, lowerIV - 1, -1)
+    sqrtDefense = {iv: fpow((baseDefense + iv), 0.5) for iv in ivs}
+    sqrtStamina = {iv: fpow((baseStamina + iv), 0.5) for iv in ivs}
+    squaredCpms = [fpow(cpm, 2) for cpm in CPMS]
+    for staminaIV in ivs:
+        stamina = baseStamina + staminaIV
+        for defenseIV in ivs:
+            defense = baseDefense + defenseIV
+            for attackIV in ivs:
+                attack = baseAttack + attackIV
+                statsCP = attack * sqrtDefense[defenseIV] * sqrtStamina[staminaIV]
+                i = bisect_left(CPMS, fpow(targetCP * 10 / statsCP, 0.5))
+                # start one level below, but not below level 1
+                level = max(i / 2 - 1, 1.0) if i < len(CPMS) else 40.0
+                while level <= 40:
+                    idx = int((level - 1) * 2)
+                    cp = max(floor(statsCP * squaredCpms[idx] / 10), 10)
+                    if cp > targetCP:
+                        break
+                    cpm = CPMS[idx]
+                    pAttack = cpm * attack * attackMult
+                    product = floor(cpm * stamina) * pAttack * (cpm * defense * defenseMult)
+                    yield (level, attackIV, defenseIV, staminaIV, cp, product, pAttack)
+                    level += 0.5
+
+
+def __lowest(stats: Stats) -> Tuple[float, float]:
+    """Stat product and attack at level 1 with 0 IVs"""
+    attackMult, defenseMult = __multipliers()
+    cpm = CPMS[0]
+    attack = cpm * stats[0] * attackMult
+    return floor(cpm * stats[2]) * attack * (cpm * stats[1] * defenseMult), attack
+
+
+def find_max(stats: Stats, targetCP: int, lowerIV=0) -> Spread:
+    """Return the spread with the highest stat product (then attack) up to `targetCP`"""
+    best = (1, [0, 0, 0])  # type: Spread
+    bestProduct, bestAttack = __lowest(stats)
+    for level, attackIV, defenseIV, staminaIV, _, product, attack in candidates(
+        stats, targetCP, lowerIV
+    ):
+        if product > bestProduct or (product == bestProduct and attack > bestAttack):
+            best = (level, [attackIV, defenseIV, staminaIV])
+            bestProduct, bestAttack = product, attack
+    return best
+
+
+def find_max_floors(stats: Stats, targetCP: int, lowerIVs: Sequence[int]) -> List[Spread]:
+    """Like `find_max` for every IV floor in `lowerIVs`, with a single search"""
+    lowest = min(lowerIVs)
+    bests = [[(1, [0, 0, 0]), *__lowest(stats)] for _ in lowerIVs]
+    for level, attackIV, defenseIV, staminaIV, _, product, attack in candidates(
+        stats, targetCP, lowest
+    ):
+        # the search with a higher floor sees the same candidates, in the same order
+        iv_floor = min(attackIV, defenseIV, staminaIV)
+        for lowerIV, best in zip(lowerIVs, bests):
+            if lowerIV <= iv_floor and (
+                product > best[1] or (product == best[1] and attack > best[2])
+            ):
+                best[:] = (level, [attackIV, defenseIV, staminaIV]), product, attack
+    return [best[0] for best in bests]
+
+
+def find_by_cp(stats: Stats, targetCP: int, lowerIV=0) -> Spread:
+    """Return the spread with the highest stat product and CP equal to `targetCP`"""
+    best = (1, [0, 0, 0])  # type: Spread
+    bestProduct, _ = __lowest(stats)
+    for level, attackIV, defenseIV, staminaIV, cp, product, _ in candidates(
+        stats, targetCP, lowerIV
+    ):
+        if product > bestProduct and cp == targetCP:
+            best = (level, [attackIV, defenseIV, staminaIV])
+            bestProduct = product
+    return best
+
+
+@lru_cache(maxsize=256)
+def cp_index(stats: Stats, level: float) -> Dict[int, array]:
+    """Map every CP at `level` to the IVs (by `index`) with that CP, best stat product first.
+
+    Built on first use for each species and level."""
+    idx = int((level - 1) * 2)
+    if level < 1 or idx >= len(CPMS):
+        return {}
+    baseAttack, baseDefense, baseStamina = stats
+    attackMult, defenseMult = __multipliers()
+    cpm = CPMS[idx]
+    squaredCpm = fpow(cpm, 2)
+    spreads = []  # type: List[Tuple[float, int, int]]
+    for staminaIV in range(15, -1, -1):
+        stamina = baseStamina + staminaIV
+        hp = floor(cpm * stamina)
+        sqrtStamina = fpow(stamina, 0.5)
+        for defenseIV in range(15, -1, -1):
+            defense = baseDefense + defenseIV
+            sqrtDefense = fpow(defense, 0.5)
+            pDefense = cpm * defense * defenseMult
+            for attackIV in range(15, -1, -1):
+                attack = baseAttack + attackIV
+                cp = max(floor(attack * sqrtDefense * sqrtStamina * squaredCpm / 10), 10)
+                product = hp * (cpm * attack * attackMult) * pDefense
+                spreads.append((product, cp, index(attackIV, defenseIV, staminaIV)))
+    # stable: same stat product in search order, as find_by_cp
+    spreads.sort(key=lambda spread: -spread[0])
+    cps = {}  # type: Dict[int, array]
+    for _, cp, i in spreads:
+        if cp not in cps:
+            cps[cp] = array("H")
+        cps[cp].append(i)
+    return cps
+
+
+gamemaster.on_unload(cp_index.cache_clear)
+
+
+def index(attackIV: int, defenseIV: int, staminaIV: int) -> int:
+    """Index of the IVs in a `rank_table`"""
+    return (attackIV << 8) | (defenseIV << 4) | staminaIV
+
+
+def from_index(i: int) -> List[int]:
+    """IVs of an `index`"""
+    return [i >> 8, (i >> 4) & 15, i & 15]
+
+
+def rank_table(stats: Stats, targetCP: int) -> List[Optional[List]]:
+    """Rank all the 4096 IVs at their best level up to `targetCP`.
+
+    Return a list of [level, cp, product, rank, percentile] (see `IVRank`) by `index`,
+    or None for IVs over `targetCP` at every level. Ranks follow stat product, then attack.
+    The percentile is the percentage of IVs not better than these."""
+    best = [None] * 4096  # type: List[Optional[Candidate]]
+    for candidate in candidates(stats, targetCP):
+        # levels go up, the last candidate has the highest stat product
+        best[index(*candidate[1:4])] = candidate
+    ranked = sorted(
+        (i for i, candidate in enumerate(best) if candidate),
+        key=lambda i: (-best[i][5], -best[i][6], i),
+    )
+    table = [None] * 4096  # type: List[Optional[List]]
+    for rank, i in enumerate(ranked, 1):
+        level, _, _, _, cp, product, _ = best[i]
+        table[i] = [level, cp, product, rank, 100 * (len(ranked) - rank + 1) / len(ranked)]
+    return table
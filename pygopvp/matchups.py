@@ -0,0 +1,276 @@
+"""Every pokemon against every opponent, resolved in a process pool.
+
+Outcomes are stored in the cache (see `utils.cache_store`) by specs, shields, gamemaster
+and `battle.ENGINE_VERSION`: only matchups never seen before are resolved.
+See `matchup_matrix` for a shield setting, `shield_matrix` for every shield scenario."""
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Sequence, Tuple, Union
+
+from . import gamemaster
+from .batch import BatchBattle
+from .battle import ENGINE_VERSION
+from .model import Pokemon, PokemonSpec
+from .utils import cache_store
+
+# smaller grids are resolved in this process: starting a pool costs more
+MIN_PARALLEL = 4096
+# battles in each task sent to the pool
+CHUNK_BATTLES = 2048
+
+# rating of both sides, final HP of both sides and turns
+Outcome = Tuple[int, int, int, int, int]
+Pair = Tuple[int, int]
+# shield scenario, pokemon and opponent indexes
+Task = Tuple[int, int, int]
+
+__WORKER = {}  # type: Dict[str, Any]
+
+
+class MatchupMatrix:
+    """Outcomes of every pokemon (rows) against every opponent (columns)"""
+
+    def __init__(self, rows: int, columns: int):
+        self.rows = rows
+        self.columns = columns
+        size = rows * columns
+        # ratings of the row pokemon and of the opponent, see Battle.rate
+        self.ratings = array("h", bytes(2 * size))
+        self.opponent_ratings = array("h", bytes(2 * size))
+        # final HP of the row pokemon and of the opponent
+        self.hp = array("h", bytes(2 * size))
+        self.opponent_hp = array("h", bytes(2 * size))
+        self.turns = array("h", bytes(2 * size))
+        # 1 if the row pokemon wins
+        self.wins = bytearray(size)
+        self.errors = {}  # type: Dict[Pair, Exception]
+        # matchups read from the cache
+        self.cached = 0
+
+    def rating(self, i: int, j: int) -> int:
+        return self.ratings[i * self.columns + j]
+
+    def win(self, i: int, j: int) -> bool:
+        return bool(self.wins[i * self.columns + j])
+
+    def row_ratings(self, i: int) -> Sequence[int]:
+        return self.ratings[i * self.columns : (i + 1) * self.columns]
+
+    def row_wins(self, i: int) -> Sequence[bool]:
+        return [bool(w) for w in self.wins[i * self.columns : (i + 1) * self.columns]]
+
+    def outcome(self, i: int, j: int) -> Outcome:
+        k = i * self.columns + j
+        return (
+            self.ratings[k],
+            self.opponent_ratings[k],
+            self.hp[k],
+            self.opponent_hp[k],
+            self.turns[k],
+        )
+
+    def _set(self, i: int, j: int, outcome: Outcome) -> None:
+        k = i * self.columns + j
+        (
+            self.ratings[k],
+            self.opponent_ratings[k],
+            self.hp[k],
+            self.opponent_hp[k],
+            self.turns[k],
+        ) = outcome
+        self.wins[k] = outcome[3] <= 0
+
+
+class ShieldMatrix:
+    """Outcomes of every pokemon against every opponent in the 9 shield scenarios.
+
+    A `MatchupMatrix` for each scenario, in `matrices[shields of the pokemon][shields of
+    the opponent]`. Ratings and wins of a matchup are matrices indexed the same way."""
+
+    SHIELDS = (0, 1, 2)
+
+    def __init__(self, matrices: List[List[MatchupMatrix]]):
+        self.matrices = matrices
+        self.rows = matrices[0][0].rows
+        self.columns = matrices[0][0].columns
+
+    def __iter__(self):
+        for row in self.matrices:
+            yield from row
+
+    @property
+    def cached(self) -> int:
+        return sum(matrix.cached for matrix in self)
+
+    def errors(self, i: int, j: int) -> List[Exception]:
+        return [matrix.errors[(i, j)] for matrix in self if (i, j) in matrix.errors]
+
+    def ratings(self, i: int, j: int) -> List[List[int]]:
+        """Rating of pokemon `i` against opponent `j`, in every scenario"""
+        return [[matrix.rating(i, j) for matrix in row] for row in self.matrices]
+
+    def opponent_ratings(self, i: int, j: int) -> List[List[int]]:
+        """Rating of opponent `j` against pokemon `i`, in every scenario"""
+        return [
+            [matrix.opponent_ratings[i * self.columns + j] for matrix in row]
+            for row in self.matrices
+        ]
+
+    def wins(self, i: int, j: int) -> List[List[bool]]:
+        """If pokemon `i` wins against opponent `j`, in every scenario"""
+        return [[matrix.win(i, j) for matrix in row] for row in self.matrices]
+
+
+def _spec(pokemon: Union[Pokemon, PokemonSpec]) -> PokemonSpec:
+    return pokemon if isinstance(pokemon, PokemonSpec) else pokemon.spec()
+
+
+def _resolve(
+    pokemons: Sequence[PokemonSpec],
+    opponents: Sequence[PokemonSpec],
+    scenarios: Sequence[Sequence[int]],
+    tasks: Sequence[Task],
+) -> Tuple[List[Outcome], Dict[Task, Exception]]:
+    """Resolve `tasks` of (scenario, pokemon, opponent) indexes, return outcomes and errors"""
+    batch = BatchBattle((pokemons[i], opponents[j], scenarios[s]) for s, i, j in tasks)
+    batch.resolve()
+    outcomes = [
+        (
+            batch.rate(lane, 0),
+            batch.rate(lane, 1),
+            batch.hp_left(lane, 0),
+            batch.hp_left(lane, 1),
+            batch.turns[lane],
+        )
+        for lane in range(len(batch))
+    ]
+    return outcomes, {tasks[lane]: e for lane, e in batch.errors.items()}
+
+
+def _init_worker(function: Callable, shared: Sequence):
+    gamemaster.SETTINGS  # load the gamemaster once for every task of this worker
+    __WORKER["task"] = (function, shared)
+
+
+def _run_chunk(chunk: Any):
+    function, shared = __WORKER["task"]
+    return function(*shared, chunk)
+
+
+def pool_map(function: Callable, shared: Sequence, chunks: Sequence, processes=None) -> List:
+    """Results of `function(*shared, chunk)` for every chunk, in a pool of `processes`.
+
+    `function` must be defined at module level, `shared` arguments are sent once to every
+    worker and the gamemaster is loaded once by each of them."""
+    with ProcessPoolExecutor(
+        max_workers=processes or os.cpu_count() or 1,
+        initializer=_init_worker,
+        initargs=(function, shared),
+    ) as executor:
+        return list(executor.map(_run_chunk, chunks))
+
+
+def _identity(spec: PokemonSpec) -> str:
+    """Canonical identity of a spec in cache keys, moves by id and type (Hidden Power)"""
+    moves = [
+        (move.moveId, move.type.name) if move else None for move in (spec.fast,) + spec.charged
+    ]
+    return repr((spec.name, spec.level, [spec.attackIV, spec.defenseIV, spec.staminaIV], moves))
+
+
+def _keys(
+    pokemons: Sequence[PokemonSpec], opponents: Sequence[PokemonSpec], shields: Sequence[int]
+) -> List[str]:
+    """Cache keys of every (pokemon, opponent) pair, row-major"""
+    prefix = "matchup:{}:{}:{}".format(ENGINE_VERSION, gamemaster.HASH, list(shields))
+    opponents = [_identity(opponent) for opponent in opponents]
+    return [
+        "{}:{}:{}".format(prefix, pokemon, opponent)
+        for pokemon in map(_identity, pokemons)
+        for opponent in opponents
+    ]
+
+
+def _matrices(
+    pokemons: Sequence[Union[Pokemon, PokemonSpec]],
+    opponents: Sequence[Union[Pokemon, PokemonSpec]],
+    scenarios: Sequence[Union[int, Sequence[int]]],
+    processes,
+    cache: bool,
+) -> List[MatchupMatrix]:
+    """A `MatchupMatrix` for each shield scenario, all resolved together"""
+    pokemons = [_spec(pokemon) for pokemon in pokemons]
+    opponents = [_spec(opponent) for opponent in opponents]
+    scenarios = [
+        [shields, shields] if isinstance(shields, int) else shields for shields in scenarios
+    ]
+    matrices = [MatchupMatrix(len(pokemons), len(opponents)) for _ in scenarios]
+    pairs = [(i, j) for i in range(len(pokemons)) for j in range(len(opponents))]
+    tasks = [(s, i, j) for s in range(len(scenarios)) for i, j in pairs]
+    keys = {}  # type: Dict[Task, str]
+    if cache and tasks:
+        for s, shields in enumerate(scenarios):
+            keys.update(zip(((s, i, j) for i, j in pairs), _keys(pokemons, opponents, shields)))
+        stored = cache_store().get_many(keys.values())
+        missing = []
+        for task in tasks:
+            if keys[task] in stored:
+                matrices[task[0]]._set(task[1], task[2], tuple(stored[keys[task]]))
+                matrices[task[0]].cached += 1
+            else:
+                missing.append(task)
+        tasks = missing
+    if not tasks:
+        return matrices
+    processes = processes or os.cpu_count() or 1
+    if processes <= 1 or len(tasks) < MIN_PARALLEL:
+        chunks = [tasks]
+        results = [_resolve(pokemons, opponents, scenarios, tasks)]
+    else:
+        starts = range(0, len(tasks), CHUNK_BATTLES)
+        chunks = [tasks[start : start + CHUNK_BATTLES] for start in starts]
+        results = pool_map(_resolve, (pokemons, opponents, scenarios), chunks, processes)
+    new_outcomes = []
+    for chunk, (outcomes, errors) in zip(chunks, results):
+        for (s, i, j), error in errors.items():
+            matrices[s].errors[(i, j)] = error
+        for task, outcome in zip(chunk, outcomes):
+            matrices[task[0]]._set(task[1], task[2], outcome)
+            if keys and task not in errors:
+                new_outcomes.append((keys[task], outcome))
+    if new_outcomes:
+        cache_store().put_many(new_outcomes)
+    return matrices
+
+
+def matchup_matrix(
+    pokemons: Sequence[Union[Pokemon, PokemonSpec]],
+    opponents: Sequence[Union[Pokemon, PokemonSpec]],
+    shields=1,
+    processes=None,
+    cache=True,
+) -> MatchupMatrix:
+    """Resolve every pokemon against every opponent, with `shields` as in `Battle`.
+
+    With `cache`, stored outcomes are used and new ones are stored (not failed battles).
+    Large sets of battles are split in chunks and resolved in a pool of `processes`
+    (default: CPU count), the others in this process. Specs are built once."""
+    return _matrices(pokemons, opponents, [shields], processes, cache)[0]
+
+
+def shield_matrix(
+    pokemons: Sequence[Union[Pokemon, PokemonSpec]],
+    opponents: Sequence[Union[Pokemon, PokemonSpec]],
+    processes=None,
+    cache=True,
+) -> ShieldMatrix:
+    """As `matchup_matrix` in every shield scenario, see `ShieldMatrix`.
+
+    Specs (and so damage tables) are shared by the scenarios, resolved by the same pool."""
+    shields = ShieldMatrix.SHIELDS
+    scenarios = [(shieldsA, shieldsB) for shieldsA in shields for shieldsB in shields]
+    matrices = _matrices(pokemons, opponents, scenarios, processes, cache)
+    return ShieldMatrix(
+        [matrices[k : k + len(shields)] for k in range(0, len(matrices), len(shields))]
+    )
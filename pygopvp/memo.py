@@ -0,0 +1,228 @@
+"""Persistent memo store: SQLite on disk, with an in-memory LRU in front"""
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Tuple
+
+# keys are hashed, values are stored as JSON
+# max keys in a single query (SQLite variables limit)
+_QUERY_SIZE = 500
+# pending recency updates written together
+_USED_BATCH = 1024
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS memo (key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+    " size INTEGER NOT NULL, used REAL NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS memo_used ON memo (used)",
+)
+
+
+class MemoStore:
+    """Store JSON values by key, safe to share between processes.
+
+    Every `put` is written at once, in its own transaction. When the file grows over
+    `max_bytes`, the least recently used entries are removed. Recently used values are
+    kept in memory, up to `memory_size` entries.
+
+    Reads don't write: the last use of entries read from disk is kept in memory and
+    written in batches, before an eviction and on `close`."""
+
+    def __init__(self, filepath: str, memory_size=4096, max_bytes=64 << 20):
+        self.filepath = filepath
+        self.memory_size = memory_size
+        self.max_bytes = max_bytes
+        self.__memory = OrderedDict()  # type: OrderedDict[str, Any]
+        self.__connection = None
+        self.__bytes = 0
+        # last use of entries read from disk, not written yet
+        self.__used = {}  # type: Dict[str, float]
+        self.__stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+
+    @staticmethod
+    def _key(key: str) -> str:
+        return hashlib.sha1(key.encode("utf8")).hexdigest()
+
+    def __connect(self):
+        if self.__connection is None:
+            import sqlite3  # slow import, needed only on a memory miss
+
+            self.__connection = sqlite3.connect(self.filepath, timeout=30, isolation_level=None)
+            self.__connection.execute("PRAGMA journal_mode=WAL")
+            self.__connection.execute("PRAGMA synchronous=NORMAL")
+            for statement in _SCHEMA:
+                self.__connection.execute(statement)
+            self.__bytes = self.__total_bytes()
+        return self.__connection
+
+    def __total_bytes(self) -> int:
+        return self.__connection.execute("SELECT COALESCE(SUM(size), 0) FROM memo").fetchone()[0]
+
+    def __remember(self, key: str, value: Any) -> None:
+        self.__memory[key] = value
+        self.__memory.move_to_end(key)
+        if len(self.__memory) > self.memory_size:
+            self.__memory.popitem(last=False)
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """Return (found, value)"""
+        key = self._key(key)
+        if key in self.__memory:
+            self.__memory.move_to_end(key)
+            self.__stats["memory_hits"] += 1
+            return True, self.__memory[key]
+        connection = self.__connect()
+        row = connection.execute("SELECT value FROM memo WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.__stats["misses"] += 1
+            return False, None
+        self.__use([key])
+        value = json.loads(row[0])
+        self.__remember(key, value)
+        self.__stats["disk_hits"] += 1
+        return True, value
+
+    def put(self, key: str, value: Any) -> None:
+        key = self._key(key)
+        data = json.dumps(value)
+        connection = self.__connect()
+        # take the write lock first, a read lock can't be upgraded while other processes write
+        connection.execute("BEGIN IMMEDIATE")
+        replaced = self.__sizes(connection, [key])
+        connection.execute(
+            "INSERT OR REPLACE INTO memo (key, value, size, used) VALUES (?, ?, ?, ?)",
+            (key, data, len(data), time.time()),
+        )
+        connection.execute("COMMIT")
+        self.__remember(key, value)
+        self.__stats["writes"] += 1
+        self.__bytes += len(data) - replaced
+        if self.__bytes > self.max_bytes:
+            self.__evict()
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """Return the values found, by key. Values read from disk are not kept in memory"""
+        hashed = {}  # type: Dict[str, str]
+        result = {}  # type: Dict[str, Any]
+        for key in keys:
+            hkey = self._key(key)
+            if hkey in self.__memory:
+                result[key] = self.__memory[hkey]
+                self.__stats["memory_hits"] += 1
+            else:
+                hashed[hkey] = key
+        if not hashed:
+            return result
+        connection = self.__connect()
+        hkeys = list(hashed)
+        found = []  # type: List[str]
+        for start in range(0, len(hkeys), _QUERY_SIZE):
+            chunk = hkeys[start : start + _QUERY_SIZE]
+            query = "SELECT key, value FROM memo WHERE key IN ({})".format(
+                ", ".join("?" * len(chunk))
+            )
+            for hkey, value in connection.execute(query, chunk):
+                result[hashed[hkey]] = json.loads(value)
+                found.append(hkey)
+        self.__use(found)
+        self.__stats["disk_hits"] += len(found)
+        self.__stats["misses"] += len(hashed) - len(found)
+        return result
+
+    def put_many(self, items: Iterable[Tuple[str, Any]]) -> None:
+        """Write many (key, value) in a single transaction, values are not kept in memory"""
+        rows = []
+        now = time.time()
+        for key, value in items:
+            data = json.dumps(value)
+            rows.append((self._key(key), data, len(data), now))
+        if not rows:
+            return
+        connection = self.__connect()
+        connection.execute("BEGIN IMMEDIATE")
+        self.__write_used(connection)
+        # the same key can be given twice, only the last row is kept
+        rows = list({row[0]: row for row in rows}.values())
+        replaced = self.__sizes(connection, [row[0] for row in rows])
+        connection.executemany(
+            "INSERT OR REPLACE INTO memo (key, value, size, used) VALUES (?, ?, ?, ?)", rows
+        )
+        connection.execute("COMMIT")
+        for row in rows:
+            self.__memory.pop(row[0], None)
+        self.__stats["writes"] += len(rows)
+        self.__bytes += sum(row[2] for row in rows) - replaced
+        if self.__bytes > self.max_bytes:
+            self.__evict()
+
+    @staticmethod
+    def __sizes(connection, keys: List[str]) -> int:
+        """Total size of the entries of `keys` already on disk"""
+        total = 0
+        for start in range(0, len(keys), _QUERY_SIZE):
+            chunk = keys[start : start + _QUERY_SIZE]
+            query = "SELECT COALESCE(SUM(size), 0) FROM memo WHERE key IN ({})".format(
+                ", ".join("?" * len(chunk))
+            )
+            total += connection.execute(query, chunk).fetchone()[0]
+        return total
+
+    def __use(self, keys: Iterable[str]) -> None:
+        now = time.time()
+        for key in keys:
+            self.__used[key] = now
+        if len(self.__used) >= _USED_BATCH:
+            self.flush()
+
+    def __write_used(self, connection) -> None:
+        connection.executemany(
+            "UPDATE memo SET used = ? WHERE key = ?",
+            [(used, key) for key, used in self.__used.items()],
+        )
+        self.__used.clear()
+
+    def flush(self) -> None:
+        """Write the pending last use of entries, in a single transaction"""
+        if not self.__used:
+            return
+        connection = self.__connect()
+        connection.execute("BEGIN")
+        self.__write_used(connection)
+        connection.execute("COMMIT")
+
+    def __evict(self) -> None:
+        """Remove least recently used entries, down to 3/4 of `max_bytes`"""
+        connection = self.__connect()
+        self.flush()
+        self.__bytes = self.__total_bytes()
+        target = self.max_bytes * 3 // 4
+        if self.__bytes <= target:
+            return
+        removed = 0
+        keys = []
+        for key, size in connection.execute("SELECT key, size FROM memo ORDER BY used"):
+            keys.append((key,))
+            removed += size
+            if self.__bytes - removed <= target:
+                break
+        connection.execute("BEGIN")
+        connection.executemany("DELETE FROM memo WHERE key = ?", keys)
+        connection.execute("COMMIT")
+        for (key,) in keys:
+            self.__memory.pop(key, None)
+        self.__bytes = self.__total_bytes()
+        self.__stats["evictions"] += len(keys)
+
+    def stats(self) -> Dict[str, int]:
+        """Hits, misses, writes and evictions of this process, entries and bytes on disk"""
+        connection = self.__connect()
+        entries, size = connection.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM memo"
+        ).fetchone()
+        return dict(self.__stats, entries=entries, bytes=size, memory_entries=len(self.__memory))
+
+    def close(self) -> None:
+        if self.__connection is not None:
+            self.flush()
+            self.__connection.close()
+            self.__connection = None
+        self.__memory.clear()
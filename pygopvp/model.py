@@ -1,58 +1,107 @@
-import random
+from array import array
 from math import floor, pow as fpow
-from typing import Callable, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
-from .gamemaster import BUFFS, MOVES, POKEMONS, SETTINGS
-from .utils import Type, json_cache, simple_repr, LEAGUES
+from . import gamemaster, ivs, spreads
+from .utils import TYPE_ORDINAL, Type, defender_index, versioned_cache, LEAGUES
 
 
 class MoveBuff:
-    """A buff inside a move"""
+    """A buff inside a move, immutable: the roll state is kept by the battle"""
 
-    def __init__(self, buff_data):
-        self.a_att = buff_data.get("attackerAttackStatStageChange", 0)
-        self.a_def = buff_data.get("attackerDefenseStatStageChange", 0)
-        self.b_att = buff_data.get("targetAttackStatStageChange", 0)
-        self.b_deff = buff_data.get("targetDefenseStatStageChange", 0)
-        self.chance = buff_data["buffActivationChance"]
-        self.__next_roll = random.random()
+    __slots__ = ("a_att", "a_def", "b_att", "b_deff", "chance", "changes")
 
-    def roll(self):
-        """Simulate a chance, starts random then it depens only of the chance.
+    def __init__(self, buff_data):
+        _set = object.__setattr__
+        _set(self, "a_att", buff_data.get("attackerAttackStatStageChange", 0))
+        _set(self, "a_def", buff_data.get("attackerDefenseStatStageChange", 0))
+        _set(self, "b_att", buff_data.get("targetAttackStatStageChange", 0))
+        _set(self, "b_deff", buff_data.get("targetDefenseStatStageChange", 0))
+        _set(self, "chance", buff_data["buffActivationChance"])
+        # stage changes: target (0 the user, 1 its opponent), stat (0 attack, 1 defense), amount
+        changes = ((0, 0, self.a_att), (0, 1, self.a_def), (1, 0, self.b_att), (1, 1, self.b_deff))
+        _set(self, "changes", tuple(change for change in changes if change[2]))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("MoveBuff is immutable")
+
+    def roll(self, next_roll: float) -> Tuple[bool, float]:
+        """Simulate a chance from the roll state `next_roll`, return if the buff is activated
+        and the next roll state. It depens only of the chance, starting from a random state.
 
         It should be stable, quickly convergint to chance"""
-        activated = bool(self.__next_roll >= 1 - self.chance)
-        self.__next_roll += self.chance
-        if self.__next_roll >= 1:
-            self.__next_roll -= 1
-        return activated
+        activated = bool(next_roll >= 1 - self.chance)
+        next_roll += self.chance
+        if next_roll >= 1:
+            next_roll -= 1
+        return activated, next_roll
 
 
 class Move:
-    """A pokemon Move"""
-
-    def __init__(self, name):
+    """A pokemon Move.
+
+    Moves are immutable and interned: `Move(name)` returns always the same instance, so they
+    can be shared between pokemons, battles and threads."""
+
+    __slots__ = (
+        "moveId",
+        "energyDelta",
+        "type",
+        "typeOrdinal",
+        "power",
+        "waitTurns",
+        "buffs",
+        "is_fast",
+        "is_charged",
+    )
+    __REGISTRY = {}  # type: Dict[Tuple[str, Optional[Type]], Move]
+
+    def __new__(cls, name: str, mtype: Optional[Type] = None) -> "Move":
+        """Return the move `name`, `mtype` overrides the gamemaster type (Hidden Power)"""
         try:
-            move_data = MOVES[name]
+            return Move.__REGISTRY[(name, mtype)]
         except KeyError:
-            raise ValueError('Move not found: {} (update gamemaster?)'.format(name))
-        self.moveId = move_data["uniqueId"]
-        self.energyDelta = move_data.get("energyDelta", 0)
-        self.type = Type(move_data.get("type"))
-        self.power = move_data.get("power", 0)
-        self.waitTurns = move_data.get("durationTurns", 0)
-        if "buffs" in move_data:
-            self.buffs = MoveBuff(move_data["buffs"])
-        else:
-            self.buffs = None
+            pass
+        try:
+            move_data = gamemaster.MOVES[name]
+        except KeyError:
+            raise ValueError("Move not found: {} (update gamemaster?)".format(name))
+        move = cls._build(
+            move_data["uniqueId"],
+            move_data.get("energyDelta", 0),
+            mtype or Type(move_data.get("type")),
+            move_data.get("power", 0),
+            move_data.get("durationTurns", 0),
+            MoveBuff(move_data["buffs"]) if "buffs" in move_data else None,
+        )
+        return Move.__REGISTRY.setdefault((name, mtype), move)
+
+    @classmethod
+    def _build(cls, moveId, energyDelta, mtype, power, waitTurns, buffs) -> "Move":
+        move = object.__new__(cls)
+        _set = object.__setattr__
+        _set(move, "moveId", moveId)
+        _set(move, "energyDelta", energyDelta)
+        _set(move, "type", mtype)
+        _set(move, "typeOrdinal", TYPE_ORDINAL[mtype] if mtype else None)
+        _set(move, "power", power)
+        _set(move, "waitTurns", waitTurns)
+        _set(move, "buffs", buffs)
+        _set(move, "is_fast", energyDelta >= 0)
+        _set(move, "is_charged", energyDelta < 0)
+        return move
 
-    @property
-    def is_fast(self):
-        return self.energyDelta >= 0
+    @staticmethod
+    def _clear_registry() -> None:
+        Move.__REGISTRY.clear()
 
-    @property
-    def is_charged(self):
-        return not self.is_fast
+    def __setattr__(self, name, value):
+        raise AttributeError("Move is immutable")
+
+    def __reduce__(self):
+        if self.type == Type(gamemaster.MOVES[self.moveId].get("type")):
+            return (Move, (self.moveId,))
+        return (Move, (self.moveId, self.type))
 
     def __repr__(self) -> str:
         return "Move({!r})".format(self.moveId)
@@ -69,10 +118,10 @@ class Move:
     def __eq__(self, other) -> bool:
         if not isinstance(other, Move):
             return False
-        return self.moveId == other.moveId
+        return self.moveId == other.moveId and self.type == other.type
 
     def __hash__(self) -> int:
-        return hash(self.moveId)
+        return hash((self.moveId, self.type))
 
     @staticmethod
     def fast_from_name(name: str) -> "Move":
@@ -81,9 +130,7 @@ class Move:
         name = name.replace(" ", "_")
         name = name.upper() + "_FAST"
         if name.startswith("HIDDEN_POWER"):
-            move = Move.charged_from_name("HIDDEN_POWER_FAST")
-            move.type = Type("POKEMON_TYPE_" + name.split("_")[2])
-            return move
+            return Move("HIDDEN_POWER_FAST", Type("POKEMON_TYPE_" + name.split("_")[2]))
         return Move(name)
 
     @staticmethod
@@ -101,7 +148,7 @@ class Move:
     def stab_multiplier(self, types: List[Type]):
         """Return the Same Type Attack Bonus multiplier base on pokemon `types`"""
         if self.type in types:
-            return SETTINGS["sameTypeAttackBonusMultiplier"]
+            return gamemaster.SETTINGS["sameTypeAttackBonusMultiplier"]
         return 1
 
     @staticmethod
@@ -145,24 +192,118 @@ class Move:
         return best
 
 
+gamemaster.on_unload(Move._clear_registry)
+
+
+class SpeciesTable:
+    """Columnar table of every pokemon species, indexed by species id.
+
+    Built once from gamemaster POKEMONS, see `species_table()`"""
+
+    def __init__(self, pokemons: Dict[str, Dict[str, Any]]):
+        self.names = list(pokemons)  # type: List[str]
+        self.index = {name: sid for sid, name in enumerate(self.names)}
+        self.baseStamina = array("H")
+        self.baseAttack = array("H")
+        self.baseDefense = array("H")
+        self.typeIds = []  # type: List[Tuple[int, ...]]
+        self.types = []  # type: List[Tuple[Type, ...]]
+        self.defenderIndex = array("H")
+        self.rarity = []  # type: List[Optional[str]]
+        self.isTransferable = array("b")
+        # move ids, indexes of moveNames
+        self.moveNames = []  # type: List[str]
+        self.fastMoves = []  # type: List[array]
+        self.chargedMoves = []  # type: List[array]
+        self.legacyFast = []  # type: List[array]
+        self.legacyCharged = []  # type: List[array]
+        move_index = {}  # type: Dict[str, int]
+
+        def move_ids(names: List[str]) -> array:
+            for name in names:
+                if name not in move_index:
+                    move_index[name] = len(self.moveNames)
+                    self.moveNames.append(name)
+            return array("H", [move_index[name] for name in names])
+
+        for name in self.names:
+            pokemon_data = pokemons[name]
+            self.baseStamina.append(pokemon_data["stats"]["baseStamina"])
+            self.baseAttack.append(pokemon_data["stats"]["baseAttack"])
+            self.baseDefense.append(pokemon_data["stats"]["baseDefense"])
+            types = [Type(pokemon_data.get("type"))]
+            if "type2" in pokemon_data:
+                types.append(Type(pokemon_data.get("type2")))
+            self.types.append(tuple(types))
+            self.typeIds.append(tuple(TYPE_ORDINAL[t] for t in types))
+            self.defenderIndex.append(defender_index(types))
+            self.rarity.append(
+                pokemon_data.get("rarity", "").replace("POKEMON_RARITY_", "") or None
+            )
+            self.isTransferable.append(pokemon_data.get("isTransferable", False))
+            self.fastMoves.append(move_ids(pokemon_data["quickMoves"]))
+            self.chargedMoves.append(move_ids(pokemon_data["cinematicMoves"]))
+            self.legacyFast.append(move_ids(pokemon_data.get("eliteQuickMove", [])))
+            self.legacyCharged.append(move_ids(pokemon_data.get("eliteCinematicMove", [])))
+
+    def move_names(self, ids: array) -> List[str]:
+        return [self.moveNames[i] for i in ids]
+
+
+__SPECIES = []  # type: List[SpeciesTable]
+
+
+def species_table() -> SpeciesTable:
+    """Return the species table of the current gamemaster"""
+    if not __SPECIES:
+        __SPECIES.append(SpeciesTable(gamemaster.POKEMONS))
+    return __SPECIES[0]
+
+
+gamemaster.on_unload(__SPECIES.clear)
+
+
 class BasePokemon:
-    """A pokemon template"""
+    """A pokemon template, a view over the species table"""
 
     def __init__(self, name):
-        pokemon_data = POKEMONS[name]
+        table = species_table()
+        sid = table.index[name]
         self.name = name
-        self.types = [Type(pokemon_data.get("type"))]
-        self.baseStamina = pokemon_data["stats"]["baseStamina"]
-        self.baseAttack = pokemon_data["stats"]["baseAttack"]
-        self.baseDefense = pokemon_data["stats"]["baseDefense"]
-        self.rarity = pokemon_data.get("rarity", "").replace("POKEMON_RARITY_", "") or None
-        self.isTransferable = pokemon_data.get("isTransferable", False)
-        self.fast_moves = pokemon_data["quickMoves"]
-        self.charged_moves = pokemon_data["cinematicMoves"]
-        self.legacy_fast = pokemon_data.get("eliteQuickMove", [])
-        self.legacy_charged = pokemon_data.get("eliteCinematicMove", [])
-        if "type2" in pokemon_data:
-            self.types.append(Type(pokemon_data.get("type2")))
+        self.speciesId = sid
+        self.baseStamina = table.baseStamina[sid]
+        self.baseAttack = table.baseAttack[sid]
+        self.baseDefense = table.baseDefense[sid]
+        self.types = table.types[sid]
+        self.defenderIndex = table.defenderIndex[sid]
+
+    @property
+    def rarity(self) -> Optional[str]:
+        return species_table().rarity[self.speciesId]
+
+    @property
+    def isTransferable(self) -> bool:
+        return bool(species_table().isTransferable[self.speciesId])
+
+    @property
+    def fast_moves(self) -> List[str]:
+        table = species_table()
+        return table.move_names(table.fastMoves[self.speciesId])
+
+    @property
+    def charged_moves(self) -> List[str]:
+        table = species_table()
+        return table.move_names(table.chargedMoves[self.speciesId])
+
+    @property
+    def legacy_fast(self) -> List[str]:
+        table = species_table()
+        return table.move_names(table.legacyFast[self.speciesId])
+
+    @property
+    def legacy_charged(self) -> List[str]:
+        table = species_table()
+        return table.move_names(table.legacyCharged[self.speciesId])
 
     def __repr__(self) -> str:
         return "BasePokemon({!r})".format(self.name)
@@ -198,91 +339,7 @@ class BasePokemon:
 class Pokemon(BasePokemon):
     """A pokemon for battle"""
 
-    CPMS = [
-        0.094,
-        0.135137432,
-        0.16639787,
-        0.192650919,
-        0.21573247,
-        0.236572661,
-        0.25572005,
-        0.273530381,
-        0.29024988,
-        0.306057377,
-        0.3210876,
-        0.335445036,
-        0.34921268,
-        0.362457751,
-        0.37523559,
-        0.387592406,
-        0.39956728,
-        0.411193551,
-        0.42250001,
-        0.432926419,
-        0.44310755,
-        0.453059958,
-        0.46279839,
-        0.472336083,
-        0.48168495,
-        0.4908558,
-        0.49985844,
-        0.508701765,
-        0.51739395,
-        0.525942511,
-        0.53435433,
-        0.542635767,
-        0.55079269,
-        0.558830576,
-        0.56675452,
-        0.574569153,
-        0.58227891,
-        0.589887917,
-        0.59740001,
-        0.604818814,
-        0.61215729,
-        0.619399365,
-        0.62656713,
-        0.633644533,
-        0.64065295,
-        0.647576426,
-        0.65443563,
-        0.661214806,
-        0.667934,
-        0.674577537,
-        0.68116492,
-        0.687680648,
-        0.69414365,
-        0.700538673,
-        0.70688421,
-        0.713164996,
-        0.71939909,
-        0.725571552,
-        0.7317,
-        0.734741009,
-        0.73776948,
-        0.740785574,
-        0.74378943,
-        0.746781211,
-        0.74976104,
-        0.752729087,
-        0.75568551,
-        0.758630378,
-        0.76156384,
-        0.764486065,
-        0.76739717,
-        0.770297266,
-        0.7731865,
-        0.776064962,
-        0.77893275,
-        0.781790055,
-        0.78463697,
-        0.787473578,
-        0.79030001,
-        0.8003,
-        0.8053,
-        0.81029999,
-        0.81529999,
-    ]
+    CPMS = ivs.CPMS
 
     def __init__(self, name, level: float, IVs: List[int], attacks=None):
         super().__init__(name)
@@ -318,8 +375,8 @@ class Pokemon(BasePokemon):
         """Reset a pokemon: HP, energy and reset buffs"""
         self.hp = self.startHp
         self.energy = 0
-        self.attBuffI = (len(BUFFS["attackBuffMultiplier"]) - 1) >> 1
-        self.defBuffI = (len(BUFFS["defenseBuffMultiplier"]) - 1) >> 1
+        self.attBuffI = (len(gamemaster.BUFFS["attackBuffMultiplier"]) - 1) >> 1
+        self.defBuffI = (len(gamemaster.BUFFS["defenseBuffMultiplier"]) - 1) >> 1
 
     @property
     def cpm(self) -> float:
@@ -330,7 +387,7 @@ class Pokemon(BasePokemon):
         return (
             self.cpm
             * (self.baseAttack + self.attackIV)
-            * BUFFS["attackBuffMultiplier"][self.attBuffI]
+            * gamemaster.BUFFS["attackBuffMultiplier"][self.attBuffI]
         )
 
     @property
@@ -338,7 +395,7 @@ class Pokemon(BasePokemon):
         return (
             self.cpm
             * (self.baseDefense + self.defenseIV)
-            * BUFFS["defenseBuffMultiplier"][self.defBuffI]
+            * gamemaster.BUFFS["defenseBuffMultiplier"][self.defBuffI]
         )
 
     @property
@@ -360,86 +417,54 @@ class Pokemon(BasePokemon):
             10,
         )
 
+    def spec(self, attacks=None) -> "PokemonSpec":
+        """Return the immutable battle data of this pokemon, with other `attacks` if given"""
+        return PokemonSpec(self, attacks)
+
     def copy(self) -> "Pokemon":
-        """"Return a copy of this pokemon"""
-        return Pokemon(
-            self.name,
-            self.level,
-            [self.attackIV, self.defenseIV, self.staminaIV],
-            [self.fast] + self.charged,
-        )
+        """"Return a reset copy of this pokemon"""
+        pokemon = Pokemon.__new__(Pokemon)
+        pokemon.__dict__.update(self.__dict__)
+        pokemon.charged = list(self.charged)
+        pokemon.reset()
+        return pokemon
 
     @staticmethod
     def __find_best(
-        name: str, targetCP: int, validator: Callable[["Pokemon", "Pokemon"], bool], lowerIV
-    ) -> Tuple[float, List[int]]:
+        search: Callable[..., ivs.Spread], name: str, targetCP: int, *args
+    ) -> "Pokemon":
         if targetCP == LEAGUES[-1].cp:
-            return (40.0, [15, 15, 15])
-        best = Pokemon(name, 1, [0, 0, 0])
-        staminaIV = 15
-        while staminaIV >= lowerIV:
-            defenseIV = 15
-            while defenseIV >= lowerIV:
-                attackIV = 15
-                while attackIV >= lowerIV:
-                    targetCPM = fpow(
-                        targetCP
-                        * 10
-                        / (
-                            (best.baseAttack + attackIV)
-                            * fpow((best.baseDefense + defenseIV), 0.5)
-                            * fpow((best.baseStamina + staminaIV), 0.5)
-                        ),
-                        0.5,
-                    )
-                    try:
-                        level = (
-                            next(i for i, cpm in enumerate(Pokemon.CPMS) if cpm >= targetCPM) / 2
-                            - 1
-                        )
-                    except StopIteration:
-                        level = 40.0
-                    while level <= 40:
-                        pokemon = Pokemon(name, level, [attackIV, defenseIV, staminaIV])
-                        if pokemon.cp > targetCP:
-                            break
-                        if validator(pokemon, best):
-                            best = pokemon
-                        level += 0.5
-                    attackIV -= 1
-                defenseIV -= 1
-            staminaIV -= 1
-        return (best.level, [best.attackIV, best.defenseIV, best.staminaIV])
+            return Pokemon(name, 40.0, [15, 15, 15])
+        base = BasePokemon(name)
+        stats = (base.baseAttack, base.baseDefense, base.baseStamina)
+        # results depend only on base stats, so the key is valid across forms and updates
+        values = versioned_cache(ivs.version(), search, stats, targetCP, *args)
+        return Pokemon(name, values[0], values[1])
 
     @staticmethod
-    def find_max(name: str, targetCP: int, lowerIV=0) -> "Pokemon":
-        """Find the best (overall) level/IVs for a pokemon, given a maximum CP"""
+    def rank_table(name: str, targetCP: int) -> List[Optional[ivs.IVRank]]:
+        """Rank all the IVs for a pokemon at their best level, given a maximum CP.
 
-        @simple_repr
-        def mult_v(pokemon: Pokemon, best: Pokemon) -> bool:
-            return (pokemon.startHp * pokemon.attack * pokemon.defense) > (
-                best.startHp * best.attack * best.defense
-            ) or (
-                (pokemon.startHp * pokemon.attack * pokemon.defense)
-                == (best.startHp * best.attack * best.defense)
-                and pokemon.attack > best.attack
-            )
+        The list is indexed by `ivs.index(attackIV, defenseIV, staminaIV)`"""
+        base = BasePokemon(name)
+        stats = (base.baseAttack, base.baseDefense, base.baseStamina)
+        table = versioned_cache(ivs.version(), ivs.rank_table, stats, targetCP)
+        return [ivs.IVRank(*row) if row else None for row in table]
 
-        values = json_cache(Pokemon.__find_best, name, targetCP, mult_v, lowerIV)
-        return Pokemon(name, values[0], values[1])
+    def iv_rank(self, targetCP: int) -> Optional[ivs.IVRank]:
+        """Rank of the IVs of this pokemon, given a maximum CP"""
+        table = Pokemon.rank_table(self.name, targetCP)
+        return table[ivs.index(self.attackIV, self.defenseIV, self.staminaIV)]
+
+    @staticmethod
+    def find_max(name: str, targetCP: int, lowerIV=0) -> "Pokemon":
+        """Find the best (overall) level/IVs for a pokemon, given a maximum CP"""
+        return Pokemon.__find_best(spreads.find_max, name, targetCP, lowerIV)
 
     @staticmethod
     def find_by_cp(name: str, targetCP: int, lowerIV=0) -> Optional["Pokemon"]:
         """Find the best (overall) level/IVs for a pokemon, given a target CP"""
-
-        @simple_repr
-        def cp_validator(pokemon: Pokemon, best: Pokemon) -> bool:
-            return (pokemon.startHp * pokemon.attack * pokemon.defense) > (
-                best.startHp * best.attack * best.defense
-            ) and pokemon.cp == targetCP
-
-        values = json_cache(Pokemon.__find_best, name, targetCP, cp_validator, lowerIV)
-        candidate = Pokemon(name, values[0], values[1])
+        candidate = Pokemon.__find_best(ivs.find_by_cp, name, targetCP, lowerIV)
         if candidate.cp == targetCP:
             return candidate
         return None
@@ -447,18 +472,88 @@ class Pokemon(BasePokemon):
     @staticmethod
     def find_by_cp_level(name: str, targetCP: int, level: float, lowerIV=0) -> Optional["Pokemon"]:
         """Find the best (overall) level/IVs for a pokemon, given a target CP and level"""
+        base = BasePokemon(name)
+        stats = (base.baseAttack, base.baseDefense, base.baseStamina)
+        for i in ivs.cp_index(stats, level).get(targetCP, ()):
+            IVs = ivs.from_index(i)
+            if min(IVs) >= lowerIV:
+                return Pokemon(name, level, IVs)
+        return None
 
-        @simple_repr
-        def cp_l_v(pokemon: Pokemon, best: Pokemon) -> bool:
-            return (
-                (pokemon.startHp * pokemon.attack * pokemon.defense)
-                > (best.startHp * best.attack * best.defense)
-                and pokemon.cp == targetCP
-                and pokemon.level == level
-            )
 
-        values = json_cache(Pokemon.__find_best, name, targetCP, cp_l_v, lowerIV)
-        candidate = Pokemon(name, values[0], values[1])
-        if candidate.cp == targetCP:
-            return candidate
-        return None
+class PokemonSpec:
+    """Immutable battle data of a pokemon: stats at every buff stage, CP and moves.
+
+    Create it once and use it in many battles, each battle keeps its own state."""
+
+    __slots__ = (
+        "name",
+        "types",
+        "defenderIndex",
+        "level",
+        "attackIV",
+        "defenseIV",
+        "staminaIV",
+        "fast",
+        "charged",
+        "startHp",
+        "cp",
+        "attacks",
+        "defenses",
+        "attBuffI",
+        "defBuffI",
+    )
+
+    def __init__(self, pokemon: Pokemon, attacks=None):
+        if attacks is None:
+            attacks = [pokemon.fast] + pokemon.charged
+        cpm = pokemon.cpm
+        attackMultipliers = gamemaster.BUFFS["attackBuffMultiplier"]
+        defenseMultipliers = gamemaster.BUFFS["defenseBuffMultiplier"]
+        attack = pokemon.baseAttack + pokemon.attackIV
+        defense = pokemon.baseDefense + pokemon.defenseIV
+        for key, value in (
+            ("name", pokemon.name),
+            ("types", pokemon.types),
+            ("defenderIndex", pokemon.defenderIndex),
+            ("level", pokemon.level),
+            ("attackIV", pokemon.attackIV),
+            ("defenseIV", pokemon.defenseIV),
+            ("staminaIV", pokemon.staminaIV),
+            ("fast", attacks[0]),
+            ("charged", tuple(attacks[1:])),
+            ("startHp", pokemon.startHp),
+            ("cp", pokemon.cp),
+            # by buff index, as Pokemon.attack and Pokemon.defense
+            ("attacks", tuple(cpm * attack * m for m in attackMultipliers)),
+            ("defenses", tuple(cpm * defense * m for m in defenseMultipliers)),
+            # buff indexes without buffs
+            ("attBuffI", (len(attackMultipliers) - 1) >> 1),
+            ("defBuffI", (len(defenseMultipliers) - 1) >> 1),
+        ):
+            object.__setattr__(self, key, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("PokemonSpec is immutable")
+
+    def __setstate__(self, state):
+        # unpickle (e.g. in a worker process), state is (None, slots)
+        for key, value in state[1].items():
+            object.__setattr__(self, key, value)
+
+    def __repr__(self) -> str:
+        return "PokemonSpec({!r}, {!r}, {!r}, {!r})".format(
+            self.name,
+            self.level,
+            [self.attackIV, self.defenseIV, self.staminaIV],
+            [self.fast] + list(self.charged),
+        )
+
+    def __str__(self) -> str:
+        moves = [move for move in (self.fast,) + self.charged if move]
+        s_moves = ""
+        if moves:
+            s_moves = "; moves: " + ", ".join([str(m) for m in moves])
+        return "{!s}(CP: {}{})".format(self.title(), self.cp, s_moves)
+
+    title = BasePokemon.title
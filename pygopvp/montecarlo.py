@@ -0,0 +1,198 @@
+"""Monte Carlo battles: buffs activated by chance, many seeded trials of every matchup.
+
+Every trial has its own random state (a 64 bit LCG, seeded with splitmix64), kept in an
+array by matchup: trial `k` starts from the same state in every matchup, so results of
+different matchups can be compared trial by trial. Trials of a matchup are resolved
+together, as a single lane of a `BatchBattle`, until a chance roll gives different
+results to them."""
+import os
+from array import array
+from typing import Dict, Iterable, List, Sequence, Tuple, Union
+
+from .batch import BatchBattle
+from .matchups import pool_map
+from .model import Move, Pokemon, PokemonSpec
+
+TRIALS = 1000
+# fewer matchups are resolved in this process: starting a pool costs more
+MIN_PARALLEL = 256
+# matchups in each task sent to the pool
+CHUNK_MATCHUPS = 64
+MASK = (1 << 64) - 1
+GAMMA = 0x9E3779B97F4A7C15
+# Knuth's MMIX LCG, only the high bits are used
+MULTIPLIER = 6364136223846793005
+INCREMENT = 1442695040888963407
+
+Matchup = Tuple[Union[Pokemon, PokemonSpec], Union[Pokemon, PokemonSpec]]
+# matchup index, trials of the lane and results of the rolls to replay
+Group = Tuple[int, Sequence[int], List[bool]]
+
+
+def _mix(z: int) -> int:
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & MASK
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & MASK
+    return z ^ (z >> 31)
+
+
+def seeds(seed: int, trials: int) -> array:
+    """Starting random state of every trial"""
+    return array("Q", (_mix((seed * GAMMA + trial) & MASK) for trial in range(trials)))
+
+
+class MonteCarloBattle(BatchBattle):
+    """A `BatchBattle` where each lane is a group of trials of the same matchup.
+
+    When a buff chance is rolled, every trial of the lane uses its own random state. If
+    they don't agree, the lane goes on with the trials where the buff is activated and
+    the others are added to `pending`, with the rolls to replay from the start."""
+
+    def __init__(
+        self,
+        lanes: Iterable[Tuple[Union[Pokemon, PokemonSpec], Union[Pokemon, PokemonSpec], Group]],
+        shields,
+        start: array,
+        states: Dict[int, array],
+    ):
+        self.groups = []  # type: List[Group]
+        super().__init__(self.__lanes(lanes, shields), roll_buffs=True)
+        self.rolled = [0] * self.size
+        self.start = start
+        # random state of every trial, by matchup: created at the first roll
+        self.states = states
+        self.pending = []  # type: List[Group]
+
+    def __lanes(self, lanes, shields):
+        for a, b, group in lanes:
+            self.groups.append(group)
+            yield a, b, shields
+
+    def roll_buff(self, a: int, move: Move) -> bool:
+        lane = a >> 1
+        matchup, trials, rolls = self.groups[lane]
+        roll = self.rolled[lane]
+        self.rolled[lane] += 1
+        if roll < len(rolls):
+            return rolls[roll]
+        if matchup not in self.states:
+            self.states[matchup] = array("Q", self.start)
+        states = self.states[matchup]
+        threshold = int(move.buffs.chance * (1 << 64))
+        activated = []
+        others = []
+        for trial in trials:
+            state = (states[trial] * MULTIPLIER + INCREMENT) & MASK
+            states[trial] = state
+            if state < threshold:
+                activated.append(trial)
+            else:
+                others.append(trial)
+        if activated and others:
+            self.pending.append((matchup, others, rolls + [False]))
+            self.groups[lane] = (matchup, activated, rolls)
+        rolls.append(bool(activated))
+        return bool(activated)
+
+
+def _simulate(
+    matchups: Sequence[Tuple[PokemonSpec, PokemonSpec]],
+    shields,
+    trials: int,
+    seed: int,
+    chunk: range,
+) -> Tuple[array, bytearray, Dict[int, Exception], int]:
+    """Ratings, wins, errors and battles resolved of the trials of matchups in `chunk`"""
+    size = len(chunk) * trials
+    ratings = array("h", bytes(2 * size))
+    wins = bytearray(size)
+    errors = {}  # type: Dict[int, Exception]
+    battles = 0
+    start = seeds(seed, trials)
+    states = {}  # type: Dict[int, array]
+    pending = [(m, range(trials), []) for m in chunk]  # type: List[Group]
+    while pending:
+        batch = MonteCarloBattle(
+            ((*matchups[group[0]], group) for group in pending), shields, start, states
+        )
+        batch.resolve()
+        battles += len(batch)
+        for lane, (m, group, _) in enumerate(batch.groups):
+            if lane in batch.errors:
+                errors.setdefault(m, batch.errors[lane])
+                continue
+            rating = batch.rate(lane, 0)
+            win = batch.hp_left(lane, 1) <= 0
+            offset = (m - chunk.start) * trials
+            if len(group) == trials:  # no different rolls, the most common case
+                ratings[offset : offset + trials] = array("h", [rating]) * trials
+                wins[offset : offset + trials] = bytes([win]) * trials
+                continue
+            for trial in group:
+                ratings[offset + trial] = rating
+                wins[offset + trial] = win
+        pending = [group for group in batch.pending if group[0] not in errors]
+    return ratings, wins, errors, battles
+
+
+class MonteCarlo:
+    """Ratings of `trials` seeded trials of every matchup, buffs activated by chance.
+
+    Many matchups are split in chunks and resolved in a pool of `processes` (default: CPU
+    count), see `matchups.pool_map`: the trials don't depend on how matchups are split."""
+
+    def __init__(
+        self, matchups: Iterable[Matchup], shields=1, trials=TRIALS, seed=0, processes=None
+    ):
+        self.matchups = [
+            (
+                a if isinstance(a, PokemonSpec) else a.spec(),
+                b if isinstance(b, PokemonSpec) else b.spec(),
+            )
+            for a, b in matchups
+        ]
+        self.trials = trials
+        self.__ratings = array("h")
+        self.__wins = bytearray()
+        self.errors = {}  # type: Dict[int, Exception]
+        # battles resolved, one for each group of trials with the same rolls
+        self.battles = 0
+        shared = (self.matchups, shields, trials, seed)
+        processes = processes or os.cpu_count() or 1
+        if processes <= 1 or len(self.matchups) < MIN_PARALLEL:
+            results = [_simulate(*shared, range(len(self.matchups)))]
+        else:
+            starts = range(0, len(self.matchups), CHUNK_MATCHUPS)
+            chunks = [range(s, min(s + CHUNK_MATCHUPS, len(self.matchups))) for s in starts]
+            results = pool_map(_simulate, shared, chunks, processes)
+        # chunks are in order, results are appended
+        for ratings, wins, errors, battles in results:
+            self.__ratings.extend(ratings)
+            self.__wins += wins
+            self.errors.update(errors)
+            self.battles += battles
+
+    def __len__(self) -> int:
+        return len(self.matchups)
+
+    def ratings(self, m: int) -> Sequence[int]:
+        """Rating of the first pokemon of matchup `m`, by trial"""
+        return self.__ratings[m * self.trials : (m + 1) * self.trials]
+
+    def wins(self, m: int) -> Sequence[bool]:
+        return [bool(w) for w in self.__wins[m * self.trials : (m + 1) * self.trials]]
+
+    def mean(self, m: int) -> float:
+        return sum(self.ratings(m)) / self.trials
+
+    def win_probability(self, m: int) -> float:
+        return sum(self.__wins[m * self.trials : (m + 1) * self.trials]) / self.trials
+
+    def percentiles(self, m: int, points: Sequence[int] = (5, 50, 95)) -> List[int]:
+        """Ratings at `points` percentiles (nearest rank) of matchup `m`"""
+        return percentiles(self.ratings(m), points)
+
+
+def percentiles(values: Sequence[float], points: Sequence[int] = (5, 50, 95)) -> List[float]:
+    """Values at `points` percentiles (nearest rank)"""
+    values = sorted(values)
+    return [values[min(len(values) - 1, point * len(values) // 100)] for point in points]
@@ -2,9 +2,9 @@ import json
 import os
 import pathlib
 from typing import Any, Dict, List
-from urllib.request import urlretrieve
 
 from .model import Move, Pokemon
+from .utils import download, file_digest, versioned_cache
 
 DATA_DIR = "data"
 
@@ -13,13 +13,14 @@ def __filepath(cp, section: str) -> str:
     return os.path.join(DATA_DIR, "rankings-{}-{}.json".format(cp, section))
 
 
-def _update(cp, section):
+def _update(cp, section) -> bool:
+    """Download rankings if changed, return True if changed"""
     pathlib.Path(DATA_DIR).mkdir(parents=True, exist_ok=True)
-    urlretrieve(
-        url="https://raw.githubusercontent.com/pvpoke/pvpoke/master/src/data/all/{}/rankings-{}.json".format(
+    return download(
+        "https://raw.githubusercontent.com/pvpoke/pvpoke/master/src/data/all/{}/rankings-{}.json".format(
             section, cp
         ),
-        filename=__filepath(cp, section),
+        __filepath(cp, section),
     )
 
 
@@ -28,6 +29,10 @@ def _load(cp: int, section="overall") -> List[Dict[str, Any]]:
     filepath = __filepath(cp, section)
     if not os.path.isfile(filepath):
         _update(cp, section)
+    return versioned_cache(file_digest(filepath), __parse, filepath)
+
+
+def __parse(filepath: str) -> List[Dict[str, Any]]:
     with open(filepath, "rt") as fjson:
         data = json.load(fjson)
     pokemons = []
@@ -0,0 +1,396 @@
+"""Optimal play of a 1v1 matchup, moves and shields of both sides chosen by search"""
+from itertools import islice
+from math import floor
+from typing import Dict, Generator, List, Optional, Sequence, Tuple, Union
+
+from . import gamemaster
+from .battle import WAIT_TURN, Battle, _fires, _idle_turns, damage_table, stat_stage
+from .model import Move, Pokemon, PokemonSpec
+
+# A state is a tuple of 12 ints, each field for pokemon 0 and 1: state[HP + 1] is the HP
+# of the second pokemon. Time is not needed: there is no timer.
+HP, ENERGY, WAIT, SHIELDS, ATT, DEF = 0, 2, 4, 6, 8, 10
+State = Tuple[int, ...]
+# (turn, pokemon, charged move, shielded)
+Event = Tuple[int, int, Move, bool]
+INF = float("inf")
+NULL_WINDOW = 1e-9
+# entries of the transposition table: when full, the oldest half is dropped
+MAX_BOUNDS = 1 << 19
+# nodes searched by each call (about 0.15s), most matchups need less than 3000
+MAX_NODES = 10000
+# a search yields the searches it needs, as (state, alpha, beta), and returns its value
+Search = Generator[Tuple[State, float, float], float, float]
+
+
+class SearchLimit(Exception):
+    """The search needs more nodes than `Solver.max_nodes`"""
+
+    # rating range found so far, see Solver.solve
+    bounds = (0, 1000)
+
+
+class Solver:
+    """Optimal play of `pokemons[0]` against `pokemons[1]`, with the rules of `Battle`.
+
+    When they can, both pokemons choose the fast or a charged move and the defender
+    chooses whether to use a shield. The first pokemon maximizes its rating, the second
+    minimizes it; on simultaneous choices the first one commits first, so the rating
+    is what it can guarantee. Values are kept by state (a transposition table), a move
+    is discarded as soon as a reply makes it no better than the best one found, and
+    turns without choices are skipped as in `Battle.fast_forward`.
+
+    Searches are generators run by `_run` with an explicit stack: long battles are
+    searched without recursion. Each call searches at most `max_nodes` nodes (None for no
+    limit), see `solve` and `SearchLimit`."""
+
+    def __init__(
+        self,
+        pokemons: Sequence[Union[Pokemon, PokemonSpec]],
+        shields=(1, 1),
+        max_nodes: Optional[int] = MAX_NODES,
+    ):
+        self.MAX_ENERGY = int(gamemaster.SETTINGS["maxEnergy"])
+        self.specs = [
+            pokemon if isinstance(pokemon, PokemonSpec) else pokemon.spec() for pokemon in pokemons
+        ]
+        if isinstance(shields, int):
+            shields = [shields, shields]
+        self.shields = list(shields)
+        self.damages = [damage_table(self.specs[0], self.specs[1])]
+        self.damages.append(damage_table(self.specs[1], self.specs[0]))
+        self.start = tuple(
+            [spec.startHp for spec in self.specs]
+            + [0, 0, 0, 0]
+            + list(shields)
+            + [spec.attBuffI for spec in self.specs]
+            + [spec.defBuffI for spec in self.specs]
+        )  # type: State
+        # transposition table: lower and upper bound of the value, by state
+        self.bounds = {}  # type: Dict[State, Tuple[float, float]]
+        self.rating = None  # type: Optional[int]
+        # if the rating is the one of optimal play, and its possible range
+        self.exact = False
+        self.rating_range = (0, 1000)
+        self.max_nodes = max_nodes
+        # nodes searched, and where the current call stops
+        self.nodes = 0
+        self.__stop = INF
+
+    def solve(self, guess: Optional[int] = None) -> int:
+        """Rating of the first pokemon with optimal play, as `Battle.rate(0)`.
+
+        `guess` (default: the rating of `Battle`) is where the search starts, see `_floor`.
+        When the search needs more than `max_nodes` nodes, the rating is `guess` within
+        the range found so far (`rating_range`) and `exact` is False."""
+        if self.rating is not None:
+            return self.rating
+        if guess is None:
+            battle = Battle(self.specs, self.shields)
+            battle.resolve()
+            guess = battle.rate(0)
+        self.__limit()
+        try:
+            self.rating = self._floor(self.start, guess)
+        except SearchLimit as limit:
+            self.rating_range = limit.bounds
+            self.rating = min(max(guess, limit.bounds[0]), limit.bounds[1])
+            return self.rating
+        self.rating_range = (self.rating, self.rating)
+        self.exact = True
+        return self.rating
+
+    def value(self, state: State) -> float:
+        """Rating of the first pokemon from `state` with optimal play, not rounded.
+
+        Raise `SearchLimit` when the search needs more than `max_nodes` nodes."""
+        self.__limit()
+        return self._run(self._search(state, -INF, INF))
+
+    def __limit(self) -> None:
+        """Start counting the nodes of a call"""
+        self.__stop = INF if self.max_nodes is None else self.nodes + self.max_nodes
+
+    def _floor(self, state: State, guess: int) -> int:
+        """Integer part of the value of `state`.
+
+        It is found with null window searches around `guess`, each one reusing the bounds
+        of the others."""
+        lower, upper = 0, 1001  # lower <= rating < upper
+        test = min(max(guess, lower + 1), upper - 1)
+        while upper - lower > 1:
+            # is the value at least `test`?
+            try:
+                value = self._run(self._search(state, test - NULL_WINDOW, test))
+            except SearchLimit as limit:
+                limit.bounds = (lower, upper - 1)
+                raise
+            if value >= test:
+                lower = max(lower, floor(value))
+                test = lower + 1
+            else:
+                upper = min(upper, floor(value) + 1)
+                test = upper - 1
+        return lower
+
+    def _at_least(self, node, test: int) -> bool:
+        """If the value of a turn result (see `_turn`) is at least `test`"""
+        return self._run(self._evaluate(node, test - NULL_WINDOW, test)) >= test
+
+    def _run(self, search: Search) -> float:
+        """Run `search` and the searches it needs, each one in a stack until it's done"""
+        stack = [search]
+        value = None
+        while True:
+            try:
+                request = stack[-1].send(value)
+            except StopIteration as done:
+                stack.pop()
+                if not stack:
+                    return done.value
+                value = done.value
+                continue
+            self.nodes += 1
+            if self.nodes > self.__stop:
+                raise SearchLimit("more than {} nodes".format(self.max_nodes))
+            stack.append(self._search(*request))
+            value = None
+
+    def _store(self, state: State, lower: float, upper: float) -> None:
+        if len(self.bounds) >= MAX_BOUNDS:
+            # dicts keep the insertion order
+            self.bounds = dict(islice(self.bounds.items(), MAX_BOUNDS >> 1, None))
+        self.bounds[state] = (lower, upper)
+
+    def _rating(self, state: State) -> float:
+        startHpA = self.specs[0].startHp
+        startHpB = self.specs[1].startHp
+        return (500 * ((startHpB - state[HP + 1]) / startHpB)) + (500 * (state[HP] / startHpA))
+
+    def _search(self, state: State, alpha: float, beta: float) -> Search:
+        """Alpha-beta search (fail-soft): the value if inside (alpha, beta), else a bound"""
+        try:
+            lower, upper = self.bounds[state]
+        except KeyError:
+            if state[HP] <= 0 or state[HP + 1] <= 0:
+                value = self._rating(state)
+                self._store(state, value, value)
+                return value
+            # damage done can't be undone, HP can't be restored
+            startHpA = self.specs[0].startHp
+            startHpB = self.specs[1].startHp
+            lower = 500 * ((startHpB - state[HP + 1]) / startHpB)
+            upper = 500 + 500 * (state[HP] / startHpA)
+        if lower >= beta or lower == upper:
+            return lower
+        if upper <= alpha:
+            return upper
+        alpha = max(alpha, lower)
+        beta = min(beta, upper)
+        skipped, turns = self._skip(state)
+        if turns:
+            value = yield skipped, alpha, beta
+        else:
+            value = yield from self._decide(state, alpha, beta)
+        if value <= alpha:
+            upper = min(upper, value)
+        elif value >= beta:
+            lower = max(lower, value)
+        else:
+            lower = upper = value
+        self._store(state, lower, upper)
+        return value
+
+    def _priority(self, state: State) -> int:
+        specs = self.specs
+        return int(specs[1].attacks[state[ATT + 1]] > specs[0].attacks[state[ATT]])
+
+    def _options(self, state: State, i: int) -> Sequence[Move]:
+        """Moves available to pokemon `i`, charged moves first"""
+        if state[WAIT + i] >= 1:
+            return (WAIT_TURN,)
+        spec = self.specs[i]
+        energy = state[ENERGY + i]
+        return tuple(c for c in spec.charged if c and energy >= -c.energyDelta) + (spec.fast,)
+
+    def _decide(self, state: State, alpha: float, beta: float) -> Search:
+        a = self._priority(state)
+        replies = self._options(state, 1)
+        best = -INF
+        for move in self._options(state, 0):
+            worst = INF
+            for other in replies:
+                node = self._turn(state, a, (move, other))
+                worst = min(worst, (yield from self._evaluate(node, max(alpha, best), worst)))
+                if worst <= max(alpha, best):
+                    break  # not better than the best move
+            best = max(best, worst)
+            if best >= beta:
+                break
+        return best
+
+    def _evaluate(self, node, alpha: float, beta: float) -> Search:
+        """Value of a turn result (see `_turn`), the defender chooses to shield or not"""
+        if isinstance(node, tuple):
+            return (yield node, alpha, beta)
+        defender, _, branches = node
+        if defender == 0:
+            best = -INF
+            for _, branch in branches:
+                best = max(best, (yield from self._evaluate(branch, max(alpha, best), beta)))
+                if best >= beta:
+                    break
+            return best
+        best = INF
+        for _, branch in branches:
+            best = min(best, (yield from self._evaluate(branch, alpha, min(beta, best))))
+            if best <= alpha:
+                break
+        return best
+
+    def best_moves(self, state: State) -> Tuple[Move, Move]:
+        """Optimal moves from `state`: the first pokemon's one and the reply of the second.
+
+        Raise `SearchLimit` when the search needs more than `max_nodes` nodes."""
+        if state == self.start:
+            rating = self.solve()
+            if not self.exact:
+                raise SearchLimit("more than {} nodes".format(self.max_nodes))
+        else:
+            self.__limit()
+            rating = self._floor(state, 500)
+        self.__limit()
+        return self._choose(state, rating)
+
+    def _choose(self, state: State, rating: int) -> Tuple[Move, Move]:
+        """Moves from `state` when its rating is `rating`: the first pokemon's one keeps
+        it at least `rating`, the reply of the second keeps it below `rating + 1`.
+
+        Null window searches with the bounds found by `_floor`, not full searches."""
+        a = self._priority(state)
+        replies = self._options(state, 1)
+        for move in self._options(state, 0):
+            nodes = [self._turn(state, a, (move, other)) for other in replies]
+            if all(self._at_least(node, rating) for node in nodes):
+                break
+        for other, node in zip(replies, nodes):
+            if not self._at_least(node, rating + 1):
+                break
+        return move, other
+
+    def _turn(self, state: State, a: int, moves: Tuple[Move, Move]):
+        """Perform a turn, as `Battle.perform_turn` with the moves of both pokemons.
+
+        Return the next state or, at every charged move, the choice of the defender:
+        [defender, move, [(shield, result), ...]]"""
+        current = list(state)
+        for i in (0, 1):
+            if moves[i] is WAIT_TURN:
+                current[WAIT + i] -= 1
+        b = a ^ 1
+        if moves[b].is_charged and moves[a].is_fast:
+            return self._step(current, moves, (b, a), 0)
+        return self._step(current, moves, (a, b), 0)
+
+    def _step(self, current: List[int], moves: Tuple[Move, Move], order: Tuple[int, int], k: int):
+        if k == 2:
+            # check for charged and waitTurns
+            if moves[0].is_charged and moves[1].is_fast:
+                current[WAIT + 1] = 0
+            elif moves[1].is_charged and moves[0].is_fast:
+                current[WAIT] = 0
+            return tuple(current)
+        i = order[k]
+        move = moves[i]
+        if move is WAIT_TURN:
+            return self._step(current, moves, order, k + 1)
+        j = i ^ 1
+        damage = self.damages[i].damage(move, current[ATT + i], current[DEF + j])
+        current[ENERGY + i] = min(current[ENERGY + i] + move.energyDelta, self.MAX_ENERGY)
+        current[WAIT + i] = move.waitTurns
+        if move.is_fast:
+            current[HP + j] -= min(damage, current[HP + j])
+            return self._step(current, moves, order, k + 1)
+        branches = []
+        for shield in (True, False) if current[SHIELDS + j] > 0 else (False,):
+            branch = list(current)
+            if shield:
+                branch[SHIELDS + j] -= 1
+                branch[HP + j] -= 1
+            else:
+                branch[HP + j] -= min(damage, branch[HP + j])
+            self._apply_buffs(branch, i, move)
+            if k == 0 and (branch[HP] <= 0 or branch[HP + 1] <= 0):
+                branches.append((shield, tuple(branch)))
+            else:
+                branches.append((shield, self._step(branch, moves, order, k + 1)))
+        return [j, move, branches]
+
+    def _apply_buffs(self, current: List[int], i: int, move: Move) -> None:
+        """As `BattleRules.apply_buffs`, buffs are always activated"""
+        if not move.buffs:
+            return
+        for target, stat, amount in move.buffs.changes:
+            k = (ATT, DEF)[stat] + (i ^ target)
+            current[k] = stat_stage(current[k], amount)
+
+    def _skip(self, state: State) -> Tuple[State, int]:
+        """Skip the next turns without choices, as `Battle.fast_forward`.
+
+        Return the new state and the number of turns skipped"""
+        specs = self.specs
+        damages = (
+            self.damages[0].damage(specs[0].fast, state[ATT], state[DEF + 1]),
+            self.damages[1].damage(specs[1].fast, state[ATT + 1], state[DEF]),
+        )
+        turns = min(
+            _idle_turns(specs[0], state[ENERGY], state[WAIT], damages[0], state[HP + 1]),
+            _idle_turns(specs[1], state[ENERGY + 1], state[WAIT + 1], damages[1], state[HP]),
+        )
+        if turns <= 1:
+            return state, 0
+        current = list(state)
+        for a in (0, 1):
+            fast = self.specs[a].fast
+            period = fast.waitTurns + 1
+            fires = _fires(turns, state[WAIT + a], period)
+            if fires:
+                energy = current[ENERGY + a] + fires * fast.energyDelta
+                current[ENERGY + a] = min(energy, self.MAX_ENERGY)
+                current[HP + (a ^ 1)] -= fires * damages[a]
+                last = state[WAIT + a] + 1 + (fires - 1) * period
+                current[WAIT + a] = fast.waitTurns - (turns - last)
+            else:
+                current[WAIT + a] -= turns
+        return tuple(current), turns
+
+    def line(self) -> List[Event]:
+        """Charged moves and shields of the optimal play, from the start.
+
+        Every choice keeps the rating of `solve`, see `_choose`. Raise `SearchLimit` when
+        the search (here or in `solve`) needs more than `max_nodes` nodes."""
+        rating = self.solve()
+        if not self.exact:
+            raise SearchLimit("more than {} nodes".format(self.max_nodes))
+        self.__limit()
+        events = []  # type: List[Event]
+        state = self.start
+        turn = 0
+        while state[HP] > 0 and state[HP + 1] > 0:
+            skipped, turns = self._skip(state)
+            if turns:
+                state = skipped
+                turn += turns
+                continue
+            turn += 1
+            node = self._turn(state, self._priority(state), self._choose(state, rating))
+            while not isinstance(node, tuple):
+                defender, move, branches = node
+                # the first pokemon keeps at least `rating`, the second below `rating + 1`
+                test = rating if defender == 0 else rating + 1
+                for shield, node in branches:
+                    if self._at_least(node, test) == (defender == 0):
+                        break
+                events.append((turn, defender ^ 1, move, shield))
+            state = node
+        return events
@@ -0,0 +1,119 @@
+"""Precomputed find_max spreads of every species, see `pygopvp precompute`"""
+import os
+import pathlib
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from . import gamemaster, ivs
+from .utils import LEAGUES
+
+DATA_DIR = "data"
+VERSION = 1
+# IV floors: wild, trades (good, great, ultra, best friends), weather boost, raids, lucky
+LOWER_IVS = (0, 1, 2, 3, 4, 5, 10, 12)
+
+__CONNECTION = {}  # type: Dict[str, Any]
+
+
+def _filepath() -> str:
+    return os.path.join(DATA_DIR, "_spreads.sqlite3")
+
+
+def _version() -> str:
+    return "{}-{}".format(VERSION, ivs.version())
+
+
+def _close() -> None:
+    connection = __CONNECTION.pop("value", None)
+    if connection:
+        connection.close()
+
+
+gamemaster.on_unload(_close)
+
+
+def __connect():
+    """Return the connection to the table, None if missing or outdated"""
+    if "value" in __CONNECTION:
+        return __CONNECTION["value"]
+    import sqlite3  # slow import, needed only with a precomputed table
+
+    connection = None
+    if os.path.isfile(_filepath()):
+        connection = sqlite3.connect("file:{}?mode=ro".format(_filepath()), uri=True)
+        row = connection.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        if not row or row[0] != _version():
+            connection.close()
+            connection = None
+    __CONNECTION["value"] = connection
+    return connection
+
+
+def lookup(stats: ivs.Stats, targetCP: int, lowerIV=0) -> Optional[ivs.Spread]:
+    """Return the precomputed `ivs.find_max` result, None if not in the table"""
+    connection = __connect()
+    if not connection:
+        return None
+    row = connection.execute(
+        "SELECT level, attack_iv, defense_iv, stamina_iv FROM spreads"
+        " WHERE attack = ? AND defense = ? AND stamina = ? AND cp = ? AND lower_iv = ?",
+        (*stats, targetCP, lowerIV),
+    ).fetchone()
+    if not row:
+        return None
+    return (row[0], list(row[1:]))
+
+
+def find_max(stats: ivs.Stats, targetCP: int, lowerIV=0) -> ivs.Spread:
+    """`ivs.find_max`, from the precomputed table when available"""
+    return lookup(stats, targetCP, lowerIV) or ivs.find_max(stats, targetCP, lowerIV)
+
+
+def _compute(stats: ivs.Stats) -> List[Tuple]:
+    rows = []
+    for league in LEAGUES[:-1]:  # the best Master spread is always 15/15/15 at level 40
+        spreads = ivs.find_max_floors(stats, league.cp, LOWER_IVS)
+        for lowerIV, (level, IVs) in zip(LOWER_IVS, spreads):
+            rows.append((*stats, league.cp, lowerIV, level, *IVs))
+    return rows
+
+
+def precompute(names: Optional[Iterable[str]] = None, processes=None) -> int:
+    """Compute find_max for every species (or `names`), league and IV floor, in a process pool.
+
+    Spreads are added to the table, replacing the ones of the same species: an outdated
+    table is emptied first. Return the number of spreads written."""
+    import sqlite3
+    from concurrent.futures import ProcessPoolExecutor  # slow import, starts multiprocessing
+
+    pokemons = gamemaster.POKEMONS
+    all_stats = set()
+    for name in names or pokemons:
+        stats = pokemons[name]["stats"]
+        all_stats.add((stats["baseAttack"], stats["baseDefense"], stats["baseStamina"]))
+    pathlib.Path(DATA_DIR).mkdir(parents=True, exist_ok=True)
+    _close()
+    connection = sqlite3.connect(_filepath())
+    connection.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+    connection.execute(
+        "CREATE TABLE IF NOT EXISTS spreads (attack INTEGER, defense INTEGER, stamina INTEGER,"
+        " cp INTEGER, lower_iv INTEGER, level REAL, attack_iv INTEGER, defense_iv INTEGER,"
+        " stamina_iv INTEGER, PRIMARY KEY (attack, defense, stamina, cp, lower_iv))"
+        " WITHOUT ROWID"
+    )
+    # a single transaction: readers see the table before or after every change
+    row = connection.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+    if not row or row[0] != _version():
+        connection.execute("DELETE FROM spreads")
+        connection.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?)", (_version(),))
+    count = 0
+    try:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            for rows in executor.map(_compute, sorted(all_stats), chunksize=8):
+                connection.executemany(
+                    "INSERT OR REPLACE INTO spreads VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows
+                )
+                count += len(rows)
+        connection.commit()
+    finally:
+        connection.close()
+    return count
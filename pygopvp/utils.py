@@ -1,9 +1,13 @@
 import atexit
+import hashlib
+import itertools
 import json
 import os
 from collections import namedtuple
 from enum import Enum
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterable, List, Tuple
+
+from .memo import MemoStore
 
 League = namedtuple("League", ["name", "cp", "lower"])
 
@@ -39,6 +43,20 @@ class Type(Enum):
         return self.name.title()
 
 
+# Type ordinal, index in gamemaster attackScalar and in EFFECTIVE tables
+TYPE_ORDINAL = {t: i for i, t in enumerate(Type)}
+# Defender type combinations (ordinals): single types first, then every dual type
+DEFENDER_TYPES = [(i,) for i in range(len(Type))] + list(
+    itertools.combinations(range(len(Type)), 2)
+)  # type: List[Tuple[int, ...]]
+__DEFENDER_INDEX = {types: i for i, types in enumerate(DEFENDER_TYPES)}
+
+
+def defender_index(types: Iterable[Type]) -> int:
+    """Return the index of a (single or dual) type combination in DEFENDER_TYPES"""
+    return __DEFENDER_INDEX[tuple(sorted(set(TYPE_ORDINAL[t] for t in types)))]
+
+
 def compatible_leagues(cp: int) -> List[League]:
     """Give a pokemon CP"""
     leagues = [league for league in LEAGUES if league.cp >= cp]
@@ -47,6 +65,51 @@ def compatible_leagues(cp: int) -> List[League]:
     return leagues
 
 
+def file_digest(filepath: str) -> str:
+    """Return the hex digest of a file content"""
+    digest = hashlib.sha1()
+    with open(filepath, "rb") as fp:
+        for chunk in iter(lambda: fp.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def download(url: str, filepath: str) -> bool:
+    """Download `url` into `filepath` only if changed on the server, return True if changed.
+
+    ETag and Last-Modified of the last download are kept in `filepath`.meta"""
+    from urllib.error import HTTPError  # slow imports, needed only to download
+    from urllib.request import Request, urlopen
+
+    meta_file = filepath + ".meta"
+    meta = {}
+    if os.path.isfile(filepath) and os.path.isfile(meta_file):
+        with open(meta_file, "r", encoding="utf8") as fp:
+            meta = json.load(fp)
+    request = Request(url)
+    if meta.get("etag"):
+        request.add_header("If-None-Match", meta["etag"])
+    if meta.get("last_modified"):
+        request.add_header("If-Modified-Since", meta["last_modified"])
+    try:
+        response = urlopen(request)
+    except HTTPError as e:
+        if e.code == 304:
+            return False
+        raise
+    with response, open(filepath + ".tmp", "wb") as fp:
+        for chunk in iter(lambda: response.read(1 << 16), b""):
+            fp.write(chunk)
+        meta = {
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+        }
+    os.replace(filepath + ".tmp", filepath)
+    with open(meta_file, "w", encoding="utf8") as fp:
+        json.dump(meta, fp)
+    return True
+
+
 class simple_repr:
     """This decorator replace the repr of a function with the function name"""
 
@@ -60,39 +123,62 @@ class simple_repr:
         return self.func.__name__
 
 
-__CACHE_DATA = {}  # type: Dict[str, Any]
-__DIRTY = {}
+__STORE = {}  # type: Dict[str, MemoStore]
 
 
 def start_cache():
-    """Current cache will be written and a new cache will start with content from file."""
-    cache_file = os.path.join(DATA_DIR, "_cache.json")
-    __CACHE_DATA.clear()
-    if os.path.isfile(cache_file):
-        with open(cache_file, "r", encoding="utf8") as fp:
-            __CACHE_DATA.update(json.load(fp))
+    """Current cache will be closed and a new cache will start, stored in DATA_DIR"""
+    write_cache()
+    __STORE["value"] = MemoStore(os.path.join(DATA_DIR, "_cache.sqlite3"))
+
+
+def __store() -> MemoStore:
+    if "value" not in __STORE:
+        start_cache()
+    return __STORE["value"]
 
 
 def json_cache(func, *args, **kwargs) -> Any:
     """Read content from cache or invoke `func` with `*args` and `**kwargs`"""
+    store = __store()
     key = "{}.{}:{!r}-{!r}".format(func.__module__, func.__name__, args, kwargs)
-    if key in __CACHE_DATA:
-        return __CACHE_DATA[key]
+    found, result = store.get(key)
+    if found:
+        return result
     result = func(*args, **kwargs)
-    __CACHE_DATA[key] = result
-    __DIRTY["value"] = True
+    store.put(key, result)
     return result
 
 
+def versioned_cache(version: str, func, *args, **kwargs) -> Any:
+    """Like `json_cache`, the cached result is valid only for the same `version`.
+
+    `version` should be a digest of the data used by `func` (e.g. `gamemaster.digest()`)"""
+    store = __store()
+    key = "{}.{}@{!r}-{!r}".format(func.__module__, func.__name__, args, kwargs)
+    found, entry = store.get(key)
+    if found and entry[0] == version:
+        return entry[1]
+    result = func(*args, **kwargs)
+    store.put(key, [version, result])
+    return result
+
+
+def cache_store() -> MemoStore:
+    """The store of the current cache, for callers managing their own keys"""
+    return __store()
+
+
+def cache_stats() -> Dict[str, int]:
+    """Statistics of the cache, see `MemoStore.stats`"""
+    return __store().stats()
+
+
 def write_cache():
-    """Save cache to disk, if needed"""
-    cache_file = os.path.join(DATA_DIR, "_cache.json")
-    if "value" not in __DIRTY:
-        return
-    with open(cache_file, "w", encoding="utf8") as fp:
-        json.dump(__CACHE_DATA, fp)
-    del __DIRTY["value"]
+    """Close the cache: every entry is already saved to disk when added"""
+    store = __STORE.pop("value", None)
+    if store:
+        store.close()
 
 
-start_cache()
 atexit.register(write_cache)
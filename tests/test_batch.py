@@ -0,0 +1,76 @@
+import unittest
+
+from pygopvp.batch import BatchBattle
+from pygopvp.battle import Battle
+from pygopvp.model import Move, Pokemon
+
+
+class TestBatchBattle(unittest.TestCase):
+    def setUp(self):
+        self.pokemons = [
+            Pokemon("ARCANINE", 19, [4, 8, 4], [Move("FIRE_FANG_FAST"), Move("WILD_CHARGE")]),
+            Pokemon(
+                "MARACTUS", 24.5, [3, 14, 11], [Move("POISON_JAB_FAST"), Move("PETAL_BLIZZARD")]
+            ),
+            Pokemon("POLIWHIRL", 40, [15, 15, 15], [Move("MUD_SHOT_FAST"), Move("BUBBLE_BEAM")]),
+            Pokemon(
+                "GROWLITHE",
+                15,
+                [0, 2, 4],
+                [Move("EMBER_FAST"), Move("FLAME_WHEEL"), Move("FLAMETHROWER")],
+            ),
+        ]
+
+    def test_same_as_battle(self):
+        lanes = [
+            (a, b, shields)
+            for shields in (0, 1, [2, 0])
+            for a in self.pokemons
+            for b in self.pokemons
+        ]
+        batch = BatchBattle(lanes)
+        batch.resolve()
+        self.assertEqual(len(batch), len(lanes))
+        self.assertEqual(batch.errors, {})
+        for lane, (a, b, shields) in enumerate(lanes):
+            battle = Battle([a, b], shields)
+            battle.resolve()
+            self.assertEqual(batch.hp_left(lane, 0), battle.pokemons[0].hp)
+            self.assertEqual(batch.hp_left(lane, 1), battle.pokemons[1].hp)
+            self.assertEqual(batch.rate(lane, 0), battle.rate(0))
+            self.assertEqual(batch.rate(lane, 1), battle.rate(1))
+            self.assertEqual(batch.turns[lane], battle.turn)
+            self.assertEqual(batch.seconds(lane), battle.seconds)
+
+    def test_errors(self):
+        broken = Pokemon("ARCANINE", 19, [4, 8, 4])
+        batch = BatchBattle(
+            [(self.pokemons[0], self.pokemons[1], 1), (broken, self.pokemons[1], 1)]
+        )
+        batch.resolve()
+        self.assertEqual(list(batch.errors), [1])
+        self.assertEqual(batch.rate(0, 0), 778)
+
+    def test_fast_turns(self):
+        lanes = [(self.pokemons[0], self.pokemons[2], 1), (self.pokemons[2], self.pokemons[0], 1)]
+        batch = BatchBattle(lanes)
+        battle = Battle(self.pokemons[0::2], 1)
+        # the second lane can use a charged move: left to perform_turn
+        batch.energy[2] = batch.charged_cost[2]
+        for _ in range(3):
+            self.assertEqual(batch.fast_turns(range(2), fast_forward=False), [1])
+            battle.perform_turn()
+            self.assertEqual(batch.hp[:2], battle.hp)
+            self.assertEqual(batch.energy[:2], battle.energy)
+            self.assertEqual(batch.waitTurns[:2], battle.waitTurns)
+        self.assertEqual(batch.turns, [3, 0])
+
+    def test_roll_buff(self):
+        lanes = [(self.pokemons[0], self.pokemons[1], 1)]
+        # without roll_buffs, every buff is activated
+        batch = BatchBattle(lanes)
+        self.assertTrue(all(batch.roll_buff(0, Move("FLASH_CANNON")) for _ in range(10)))
+        batch = BatchBattle(lanes, roll_buffs=True)
+        rolls = [batch.roll_buff(1, Move("FLASH_CANNON")) for _ in range(100)]
+        self.assertIn(sum(rolls), (9, 10, 11))
+
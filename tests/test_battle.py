@@ -1,7 +1,9 @@
+import io
+import json
 import unittest
 
 from pygopvp.model import Pokemon, Move
-from pygopvp.battle import Battle
+from pygopvp.battle import BL, Battle, damage_table
 
 
 class TestBattle(unittest.TestCase):
@@ -20,6 +22,23 @@ class TestBattle(unittest.TestCase):
         self.assertEqual(battle.rate(1), 221)
         self.assertEqual(battle.seconds, 10)
 
+    def test_battle_spec(self):
+        pokemona = Pokemon("ARCANINE", 19, [4, 8, 4], [Move("FIRE_FANG_FAST"), Move("WILD_CHARGE")])
+        pokemonb = Pokemon(
+            "POLIWHIRL", 40, [15, 15, 15], [Move("MUD_SHOT_FAST"), Move("BUBBLE_BEAM")]
+        )
+        expected = Battle([pokemona, pokemonb])
+        expected.resolve()
+        speca = pokemona.spec()
+        for _ in range(2):
+            battle = Battle([speca, pokemonb])
+            battle.resolve()
+            self.assertEqual(battle.specs[0], speca)
+            self.assertEqual(battle.pokemons[0].hp, expected.pokemons[0].hp)
+            self.assertEqual(battle.pokemons[1].hp, expected.pokemons[1].hp)
+            self.assertEqual(battle.seconds, expected.seconds)
+        self.assertEqual(battle.pokemons[0].name, "ARCANINE")
+
     def test_battle_b(self):
         """Effective type + charged"""
         # https://pvpoke.com/battle/1500/arcanine/poliwhirl/11/1-6-0/1-1-0/
@@ -44,3 +63,128 @@ class TestBattle(unittest.TestCase):
         self.assertTrue(battle.pokemons[1].hp <= 0)
         self.assertTrue(battle.pokemons[0].hp < 102)
         self.assertTrue(battle.seconds < 20)
+
+    def test_fast_forward(self):
+        pokemons = [
+            Pokemon("ARCANINE", 19, [4, 8, 4], [Move("FIRE_FANG_FAST"), Move("WILD_CHARGE")]),
+            Pokemon(
+                "MARACTUS", 24.5, [3, 14, 11], [Move("BULLET_SEED_FAST"), Move("PETAL_BLIZZARD")]
+            ),
+            Pokemon("POLIWHIRL", 40, [15, 15, 15], [Move("MUD_SHOT_FAST"), Move("BUBBLE_BEAM")]),
+        ]
+        for pokemona in pokemons:
+            for pokemonb in pokemons:
+                for shields in (0, 1, 2):
+                    battles = [Battle([pokemona, pokemonb], shields) for _ in range(2)]
+                    battles[0].resolve(fast_forward=False)
+                    battles[1].resolve()
+                    expected, battle = battles
+                    for attr in ("turn", "mseconds", "waitTurns", "shields"):
+                        self.assertEqual(getattr(battle, attr), getattr(expected, attr))
+                    for i in (0, 1):
+                        self.assertEqual(battle.pokemons[i].hp, expected.pokemons[i].hp)
+                        self.assertEqual(battle.pokemons[i].energy, expected.pokemons[i].energy)
+        # only fast moves at the start, until a charged move is available
+        battle = Battle(pokemons[:2])
+        skipped = battle.fast_forward()
+        self.assertGreater(skipped, 1)
+        self.assertEqual(battle.turn, skipped)
+        self.assertEqual(battle.fast_forward(), 0)
+
+    def test_damage_table(self):
+        speca = Pokemon(
+            "ARCANINE", 19, [4, 8, 4], [Move("FIRE_FANG_FAST"), Move("WILD_CHARGE")]
+        ).spec()
+        specb = Pokemon(
+            "POLIWHIRL", 40, [15, 15, 15], [Move("MUD_SHOT_FAST"), Move("BUBBLE_BEAM")]
+        ).spec()
+        table = damage_table(speca, specb)
+        self.assertIs(Battle([speca, specb]).damages[0], table)
+        self.assertIs(Battle([specb, speca]).damages[1], table)
+        for move in (speca.fast, *speca.charged):
+            for attBuffI in range(-4, len(speca.attacks)):
+                for defBuffI in range(-4, len(specb.defenses)):
+                    damage = table.damage(move, attBuffI, defBuffI)
+                    self.assertEqual(damage, table.compute(move, attBuffI, defBuffI))
+                    self.assertEqual(damage, table.damage(move, attBuffI, defBuffI))
+        battle = Battle([speca, specb])
+        battle.pokemons[0].attBuffI = 8
+        self.assertEqual(battle.calculateDamage(0, speca.fast), table.compute(speca.fast, 8, 4))
+
+    def test_buffs(self):
+        speca = Pokemon("ARCANINE", 19, [4, 8, 4], [Move("FIRE_FANG_FAST"), Move("ACID_SPRAY")])
+        specb = Pokemon("POLIWHIRL", 40, [15, 15, 15], [Move("MUD_SHOT_FAST"), Move("BUBBLE_BEAM")])
+        speca, specb = speca.spec(), specb.spec()
+        battle = Battle([speca, specb], battlelog=True)
+        battle.apply_buffs(1, Move("BUBBLE_BEAM"))
+        self.assertEqual(battle.pokemons[0].attBuffI, speca.attBuffI - 1)
+        self.assertEqual(battle.pokemons[1].attBuffI, specb.attBuffI)
+        fell = " 0 Arcanine(HP: {}, energy: 0) attack fell".format(speca.startHp)
+        self.assertEqual(battle.bl.logs[-1], fell)
+        # the target defense change of ACID_SPRAY
+        battle.apply_buffs(0, Move("ACID_SPRAY"))
+        self.assertEqual(battle.pokemons[1].defBuffI, specb.defBuffI - 2)
+        self.assertEqual(battle.pokemons[0].defBuffI, speca.defBuffI)
+        fell = " 0 Poliwhirl(HP: {}, energy: 0) defense fell sharply".format(specb.startHp)
+        self.assertEqual(battle.bl.logs[-1], fell)
+
+    def test_battle_target_defense(self):
+        """ACID_SPRAY lowers the defense of the opponent"""
+        pokemona = Pokemon("ARCANINE", 19, [4, 8, 4], [Move("FIRE_FANG_FAST"), Move("ACID_SPRAY")])
+        pokemonb = Pokemon(
+            "POLIWHIRL", 40, [15, 15, 15], [Move("MUD_SHOT_FAST"), Move("BUBBLE_BEAM")]
+        )
+        battle = Battle([pokemona, pokemonb])
+        battle.resolve()
+        self.assertTrue(battle.pokemons[0].hp <= 0)
+        self.assertEqual(battle.pokemons[1].hp, 66)
+        self.assertEqual(battle.rate(0), 264)
+        self.assertEqual(battle.rate(1), 735)
+
+    def test_roll_buff(self):
+        pokemona = Pokemon("ARCANINE", 19, [4, 8, 4], [Move("FIRE_FANG_FAST"), Move("WILD_CHARGE")])
+        pokemonb = Pokemon(
+            "MARACTUS", 24.5, [3, 14, 11], [Move("POISON_JAB_FAST"), Move("PETAL_BLIZZARD")],
+        )
+        battle = Battle([pokemona, pokemonb])
+        # without roll_buffs, every buff is activated
+        self.assertTrue(all(battle.roll_buff(0, Move("FLASH_CANNON")) for _ in range(10)))
+        self.assertEqual(battle.buffRolls, {})
+        battle = Battle([pokemona, pokemonb], roll_buffs=True)
+        # WILD_CHARGE buff is always activated
+        self.assertTrue(all(battle.roll_buff(0, Move("WILD_CHARGE")) for _ in range(10)))
+        self.assertEqual(list(battle.buffRolls), [(0, "WILD_CHARGE")])
+        # FLASH_CANNON buff once every 10 uses
+        rolls = [battle.roll_buff(1, Move("FLASH_CANNON")) for _ in range(100)]
+        self.assertIn(sum(rolls), (9, 10, 11))
+        battle.resolve()
+        self.assertTrue(battle.pokemons[1].hp <= 0)
+
+    def test_battle_log(self):
+        pokemona = Pokemon("ARCANINE", 19, [4, 8, 4], [Move("FIRE_FANG_FAST"), Move("WILD_CHARGE")])
+        pokemonb = Pokemon(
+            "POLIWHIRL", 40, [15, 15, 15], [Move("MUD_SHOT_FAST"), Move("BUBBLE_BEAM")]
+        )
+        self.assertIsNone(Battle([pokemona, pokemonb]).bl)
+        battle = Battle([pokemona, pokemonb])
+        battle.bl = BL(battle, capacity=1)  # the buffer grows as needed
+        battle.bl.start()
+        battle.resolve()
+        logs = battle.bl.logs
+        self.assertEqual(len(logs), len(battle.bl))
+        self.assertTrue(logs[0].startswith("Start: PokemonSpec('ARCANINE'"))
+        self.assertRegex(logs[2], r"^ 1 Poliwhirl\(HP: \d+, energy: \d+\) uses Mud Shot: deals \d+")
+        self.assertIn("attack fell", "\n".join(logs))
+        end = "{:>2} End of turn: Arcanine(HP: 0".format(battle.turn)
+        self.assertTrue(logs[-1].startswith(end))
+        events = list(battle.bl.events())
+        self.assertEqual(events[-1]["kind"], "end_turn")
+        self.assertEqual(events[-1]["hp0"], 0)
+        buffs = [event for event in events if event["kind"] == "buff"]
+        self.assertEqual(buffs[0]["stat"], "attack")
+        self.assertEqual(buffs[0]["value"], -1)
+        shield = [event for event in events if event["kind"] == "shield"][0]
+        self.assertIn(shield["move"], ("WILD_CHARGE", "BUBBLE_BEAM"))
+        fp = io.StringIO()
+        battle.bl.to_jsonl(fp)
+        self.assertEqual([json.loads(line) for line in fp.getvalue().splitlines()], events)
@@ -1,9 +1,14 @@
+import io
+import json
 from numbers import Real
+import os
 import unittest
 
+import pygopvp.gamemaster as gamemaster
 from pygopvp.gamemaster import (
     POKEMONS,
     BUFFS,
+    DEFENDER_EFFECTIVE,
     EFFECTIVE,
     MOVES,
     SETTINGS,
@@ -11,6 +16,7 @@ from pygopvp.gamemaster import (
     _update_miners,
 )
 from pygopvp.model import Type
+from pygopvp.utils import TYPE_ORDINAL, defender_index, file_digest
 
 
 class TestGameMasterMiners(unittest.TestCase):
@@ -39,11 +45,27 @@ class TestGameMasterMiners(unittest.TestCase):
     def test_effective(self):
         self.assertEqual(len(EFFECTIVE), 18)
         self.assertEqual(len(EFFECTIVE), len(Type))
-        for elist in EFFECTIVE.values():
+        for elist in EFFECTIVE:
             self.assertEqual(len(elist), 18)
-            for value in elist.values():
+            for value in elist:
                 self.assertIsInstance(value, Real)
 
+    def test_defender_effective(self):
+        self.assertEqual(len(DEFENDER_EFFECTIVE), 18)
+        for attack, elist in zip(Type, DEFENDER_EFFECTIVE):
+            self.assertEqual(len(elist), 171)
+            a = TYPE_ORDINAL[attack]
+            for defense in Type:
+                d = TYPE_ORDINAL[defense]
+                self.assertEqual(elist[defender_index([defense])], EFFECTIVE[a][d])
+                for defense2 in Type:
+                    d2 = TYPE_ORDINAL[defense2]
+                    if d2 != d:
+                        self.assertEqual(
+                            elist[defender_index([defense, defense2])],
+                            EFFECTIVE[a][d] * EFFECTIVE[a][d2],
+                        )
+
     def test_moves(self):
         self.assertTrue(len(MOVES) > 200)
         for k, v in MOVES.items():
@@ -73,3 +95,69 @@ class TestGameMasterMiners(unittest.TestCase):
     def test_trainers_ko(self):
         with self.assertRaises(KeyError):
             TRAINERS['undefined']
+
+
+class TestGameMasterSnapshot(unittest.TestCase):
+    def test_compile(self):
+        path = gamemaster.compile_snapshot()
+        self.assertTrue(os.path.isfile(path))
+        snapshot = gamemaster._read_snapshot(path)
+        self.assertEqual(snapshot["HASH"], file_digest(gamemaster.FILEPATH))
+        self.assertIn(snapshot["HASH"][:16], path)
+        self.assertEqual(set(snapshot["MOVES"]), set(gamemaster.MOVES))
+        self.assertEqual(snapshot["SETTINGS"], gamemaster.SETTINGS)
+
+    def test_lazy(self):
+        gamemaster._unload()
+        self.assertNotIn("POKEMONS", vars(gamemaster))
+        self.assertIn("SMEARGLE", gamemaster.POKEMONS)
+        self.assertIn("POKEMONS", vars(gamemaster))
+        self.assertEqual(gamemaster.HASH, file_digest(gamemaster.FILEPATH))
+
+    def test_digests(self):
+        self.assertIn("POKEMON:SMEARGLE", gamemaster.DIGESTS)
+        self.assertIn("MOVE:COUNTER_FAST", gamemaster.DIGESTS)
+        self.assertIn("SETTINGS", gamemaster.DIGESTS)
+        self.assertEqual(gamemaster.digest("SETTINGS"), gamemaster.DIGESTS["SETTINGS"])
+        self.assertNotEqual(gamemaster.digest("POKEMON:SMEARGLE"), gamemaster.digest("SETTINGS"))
+        self.assertNotEqual(
+            gamemaster.digest("SETTINGS", "BUFFS"), gamemaster.digest("BUFFS", "SETTINGS")
+        )
+        with self.assertRaises(KeyError):
+            gamemaster.digest("POKEMON:undefined")
+
+    def test_digest_lazy(self):
+        # digest is the first access to the data
+        gamemaster._unload()
+        buffs = gamemaster.digest("BUFFS")
+        self.assertEqual(buffs, gamemaster.DIGESTS["BUFFS"])
+        gamemaster._unload()
+        self.assertEqual(len(gamemaster.digest("BUFFS", "SETTINGS")), 16)
+
+    def test_changed_entries(self):
+        old = {"POKEMON:A": "1", "POKEMON:B": "2", "MOVE:C": "3", "SETTINGS": "4"}
+        new = {"POKEMON:A": "1", "POKEMON:B": "5", "MOVE:D": "6", "SETTINGS": "4"}
+        self.assertEqual(
+            gamemaster.changed_entries(old, new), ["MOVE:C", "MOVE:D", "POKEMON:B"]
+        )
+        self.assertEqual(gamemaster.changed_entries(new, new), [])
+
+
+class TestGameMasterStreaming(unittest.TestCase):
+    def test_iter_templates(self):
+        data = [
+            {"templateId": "A", "data": {"value": [1, 2, {"x": "]"}]}},
+            {"templateId": "B", "data": {"text": "a, b ] {"}},
+            {"templateId": "C", "data": {}},
+        ]
+        text = json.dumps(data, indent=2)
+        for chunk_size in (1, 7, 64, 1 << 16):
+            items = list(gamemaster._iter_templates(io.StringIO(text), chunk_size))
+            self.assertEqual(items, data)
+        self.assertEqual(list(gamemaster._iter_templates(io.StringIO(" [ ] "))), [])
+
+    def test_iter_templates_ko(self):
+        with self.assertRaises(json.decoder.JSONDecodeError):
+            list(gamemaster._iter_templates(io.StringIO('[{"templateId": "A"}, {"templ')))
+        with self.assertRaises(json.decoder.JSONDecodeError):
+            list(gamemaster._iter_templates(io.StringIO('{"templateId": "A"}')))
@@ -0,0 +1,54 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from pygopvp import battle, instrument
+from pygopvp.batch import BatchBattle
+from pygopvp.battle import Battle
+from pygopvp.model import Move, Pokemon
+
+
+class TestInstrument(unittest.TestCase):
+    def setUp(self):
+        self.pokemons = [
+            Pokemon("ARCANINE", 19, [4, 8, 4], [Move("FIRE_FANG_FAST"), Move("WILD_CHARGE")]),
+            Pokemon("POLIWHIRL", 40, [15, 15, 15], [Move("MUD_SHOT_FAST"), Move("BUBBLE_BEAM")]),
+        ]
+
+    def tearDown(self):
+        instrument.disable()
+
+    def test_instrument(self):
+        resolve = Battle.resolve
+        decide_move = battle.decide_move
+        instrument.enable()
+        self.assertIsNot(Battle.resolve, resolve)
+        single = Battle(self.pokemons)
+        single.resolve()
+        batch = BatchBattle([(self.pokemons[0], self.pokemons[1], 1)] * 3)
+        batch.resolve()
+        instrument.disable()
+        self.assertIs(Battle.resolve, resolve)
+        self.assertIs(battle.decide_move, decide_move)
+        Battle(self.pokemons).resolve()  # not counted
+        stats = instrument.stats()
+        self.assertEqual(stats["counters"]["battles"], 4)
+        self.assertEqual(stats["counters"]["turns"], single.turn + sum(batch.turns))
+        self.assertEqual(stats["stages"]["Battle.resolve"]["calls"], 1)
+        self.assertEqual(stats["stages"]["BatchBattle.resolve"]["calls"], 1)
+        self.assertGreater(stats["stages"]["decide_move"]["calls"], 0)
+        self.assertGreater(stats["battles_per_second"], 0)
+        self.assertGreater(stats["turns_per_second"], stats["battles_per_second"])
+        fp = io.StringIO()
+        instrument.report(fp)
+        self.assertIn("battles/s", fp.getvalue())
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filepath = os.path.join(tmpdir, "profile.json")
+            instrument.dump(filepath)
+            with open(filepath, encoding="utf8") as fp:
+                self.assertEqual(json.load(fp)["counters"], stats["counters"])
+        # enable starts from zero
+        instrument.enable()
+        self.assertEqual(instrument.stats()["counters"], {})
@@ -0,0 +1,71 @@
+import unittest
+
+from pygopvp import ivs
+from pygopvp.model import BasePokemon, Pokemon
+
+
+def _stats(name):
+    base = BasePokemon(name)
+    return (base.baseAttack, base.baseDefense, base.baseStamina)
+
+
+class TestIVs(unittest.TestCase):
+    def test_candidates(self):
+        count = 0
+        for level, attackIV, defenseIV, staminaIV, cp, product, attack in ivs.candidates(
+            _stats("ARCANINE"), 1500, 13
+        ):
+            pokemon = Pokemon("ARCANINE", level, [attackIV, defenseIV, staminaIV])
+            self.assertLessEqual(cp, 1500)
+            self.assertEqual(cp, pokemon.cp)
+            self.assertEqual(attack, pokemon.attack)
+            self.assertEqual(product, pokemon.startHp * pokemon.attack * pokemon.defense)
+            count += 1
+        self.assertGreaterEqual(count, 3 ** 3)
+
+    def test_find_max(self):
+        self.assertEqual(ivs.find_max(_stats("ARCANINE"), 1500), (18.5, [0, 14, 15]))
+        level, IVs = ivs.find_max(_stats("ARCANINE"), 1500, 10)
+        self.assertTrue(all(iv >= 10 for iv in IVs))
+        self.assertLessEqual(Pokemon("ARCANINE", level, IVs).cp, 1500)
+        # low CP: the search starts at level 1, not at the end of the CPM table
+        for targetCP in (100, 200):
+            level, IVs = ivs.find_max(_stats("MEWTWO"), targetCP)
+            self.assertLess(level, 5)
+            self.assertLessEqual(Pokemon("MEWTWO", level, IVs).cp, targetCP)
+        levels = [level for level, *_ in ivs.candidates(_stats("MEWTWO"), 100)]
+        self.assertTrue(levels)
+        self.assertGreaterEqual(min(levels), 1)
+
+    def test_find_by_cp(self):
+        level, IVs = ivs.find_by_cp(_stats("ARCANINE"), 1498)
+        self.assertEqual(Pokemon("ARCANINE", level, IVs).cp, 1498)
+        self.assertEqual(ivs.find_by_cp(_stats("MEWTWO"), 20), (1, [0, 0, 0]))
+
+    def test_cp_index(self):
+        stats = _stats("ARCANINE")
+        index = ivs.cp_index(stats, 18.0)
+        self.assertEqual(sum(len(spreads) for spreads in index.values()), 4096)
+        products = []
+        for i in index[1498]:
+            pokemon = Pokemon("ARCANINE", 18.0, ivs.from_index(i))
+            self.assertEqual(pokemon.cp, 1498)
+            products.append(pokemon.startHp * pokemon.attack * pokemon.defense)
+        self.assertEqual(products, sorted(products, reverse=True))
+        self.assertIs(ivs.cp_index(stats, 18.0), index)
+        self.assertEqual(ivs.cp_index(stats, 0.5), {})
+        self.assertEqual(ivs.from_index(ivs.index(1, 2, 3)), [1, 2, 3])
+
+    def test_rank_table(self):
+        table = ivs.rank_table(_stats("ARCANINE"), 1500)
+        self.assertEqual(len(table), 4096)
+        self.assertEqual(sorted(row[3] for row in table), list(range(1, 4097)))
+        level, IVs = ivs.find_max(_stats("ARCANINE"), 1500)
+        first = table[ivs.index(*IVs)]
+        self.assertEqual(first[:2], [level, 1498])
+        self.assertEqual(first[3:], [1, 100])
+        self.assertEqual(max(row[2] for row in table), first[2])
+        worst = min(table, key=lambda row: row[2])
+        self.assertEqual(worst[3], 4096)
+        self.assertEqual(table[ivs.index(0, 0, 0)][:2], [19.5, 1464])
+        self.assertEqual(ivs.rank_table(_stats("MEWTWO"), 10), [None] * 4096)
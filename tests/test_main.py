@@ -0,0 +1,30 @@
+import subprocess
+import sys
+import unittest
+
+_PROBE = """
+import sys
+import pygopvp.gamemaster as gamemaster
+from pygopvp.__main__ import main
+sys.argv = ["pygopvp", "--help"]
+try:
+    main()
+except SystemExit:
+    pass
+print(sorted(m for m in sys.modules if m.startswith("pygopvp.")))
+print("POKEMONS" in vars(gamemaster))
+print("concurrent.futures.process" in sys.modules)
+"""
+
+
+class TestMain(unittest.TestCase):
+    def test_help_lazy(self):
+        output = subprocess.run(
+            [sys.executable, "-c", _PROBE], check=True, stdout=subprocess.PIPE, text=True
+        ).stdout.splitlines()
+        for module in ("battle", "csvreader", "cli.rank", "cli.team", "cli.vsall", "cli.moves"):
+            self.assertNotIn("'pygopvp.{}'".format(module), output[-3])
+        self.assertEqual(output[-2], "False")
+        # process pools are started only by the commands using them
+        self.assertEqual(output[-1], "False")
+
@@ -0,0 +1,131 @@
+import tempfile
+import unittest
+
+from pygopvp import matchups, utils
+from pygopvp.battle import Battle
+from pygopvp.matchups import ShieldMatrix, matchup_matrix, shield_matrix
+from pygopvp.model import Move, Pokemon
+
+
+class MatchupsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.pokemons = [
+            Pokemon("ARCANINE", 19, [4, 8, 4], [Move("FIRE_FANG_FAST"), Move("WILD_CHARGE")]),
+            Pokemon(
+                "MARACTUS", 24.5, [3, 14, 11], [Move("POISON_JAB_FAST"), Move("PETAL_BLIZZARD")]
+            ),
+            Pokemon("POLIWHIRL", 40, [15, 15, 15], [Move("MUD_SHOT_FAST"), Move("BUBBLE_BEAM")]),
+        ]
+        self.opponents = [pokemon.spec() for pokemon in self.pokemons[1:]]
+        utils.write_cache()  # preserve old cache
+        self.temdir = tempfile.TemporaryDirectory()
+        self.origin_DATA_DIR = utils.DATA_DIR
+        utils.DATA_DIR = self.temdir.name
+        utils.start_cache()
+
+    def tearDown(self):
+        utils.write_cache()
+        self.temdir.cleanup()
+        utils.DATA_DIR = self.origin_DATA_DIR
+
+
+class TestMatchupMatrix(MatchupsTestCase):
+    def assertSameAsBattle(self, matrix, shields):
+        self.assertEqual((matrix.rows, matrix.columns), (3, 2))
+        self.assertEqual(matrix.errors, {})
+        for i, pokemon in enumerate(self.pokemons):
+            for j, opponent in enumerate(self.opponents):
+                battle = Battle([pokemon, opponent], shields)
+                battle.resolve()
+                self.assertEqual(matrix.rating(i, j), battle.rate(0))
+                self.assertEqual(matrix.win(i, j), battle.pokemons[1].hp <= 0)
+            ratings = [matrix.rating(i, 0), matrix.rating(i, 1)]
+            self.assertEqual(list(matrix.row_ratings(i)), ratings)
+
+    def test_matchup_matrix(self):
+        matrix = matchup_matrix(self.pokemons, self.opponents, [0, 2])
+        self.assertSameAsBattle(matrix, [0, 2])
+
+    def test_processes(self):
+        min_parallel, chunk_battles = matchups.MIN_PARALLEL, matchups.CHUNK_BATTLES
+        matchups.MIN_PARALLEL, matchups.CHUNK_BATTLES = 0, 2
+        try:
+            matrix = matchup_matrix(self.pokemons, self.opponents, 1, processes=2, cache=False)
+        finally:
+            matchups.MIN_PARALLEL, matchups.CHUNK_BATTLES = min_parallel, chunk_battles
+        self.assertSameAsBattle(matrix, 1)
+
+    def test_errors(self):
+        broken = Pokemon("ARCANINE", 19, [4, 8, 4])
+        for _ in range(2):  # failed battles are not cached
+            matrix = matchup_matrix([self.pokemons[0], broken], self.opponents)
+            self.assertEqual(sorted(matrix.errors), [(1, 0), (1, 1)])
+
+    def test_cache(self):
+        matrix = matchup_matrix(self.pokemons, self.opponents, [1, 0], cache=False)
+        self.assertEqual(matrix.cached, 0)
+        matchup_matrix(self.pokemons[:2], self.opponents, [1, 0])
+        # only the new pokemon is resolved
+        cached = matchup_matrix(self.pokemons, self.opponents, [1, 0])
+        self.assertEqual(cached.cached, 4)
+        for i in range(3):
+            for j in range(2):
+                self.assertEqual(cached.outcome(i, j), matrix.outcome(i, j))
+                self.assertEqual(cached.win(i, j), matrix.win(i, j))
+
+    def test_hidden_power(self):
+        # Hidden Power variants of the same pokemon are different cache entries
+        fire, water = (
+            Pokemon("POLIWHIRL", 40, [15, 15, 15], [Move.fast_from_name(name), Move("BUBBLE_BEAM")])
+            for name in ("Hidden Power Fire", "Hidden Power Water")
+        )
+        opponents = self.opponents[:1]  # MARACTUS, weak to fire and resists water
+        ratings = []
+        for pokemon in (fire, water):
+            matrix = matchup_matrix([pokemon], opponents)
+            self.assertEqual(matrix.cached, 0)
+            battle = Battle([pokemon, opponents[0]], 1)
+            battle.resolve()
+            self.assertEqual(matrix.rating(0, 0), battle.rate(0))
+            ratings.append(matrix.rating(0, 0))
+        self.assertGreater(ratings[0], ratings[1])
+        self.assertEqual(matchup_matrix([fire, water], opponents).cached, 2)
+
+
+class TestShieldMatrix(MatchupsTestCase):
+    def assertSameAsBattles(self, matrix):
+        self.assertEqual((matrix.rows, matrix.columns), (3, 2))
+        for i, pokemon in enumerate(self.pokemons):
+            for j, opponent in enumerate(self.opponents):
+                self.assertEqual(matrix.errors(i, j), [])
+                ratings = matrix.ratings(i, j)
+                opponent_ratings = matrix.opponent_ratings(i, j)
+                wins = matrix.wins(i, j)
+                for shieldsA in ShieldMatrix.SHIELDS:
+                    for shieldsB in ShieldMatrix.SHIELDS:
+                        battle = Battle([pokemon, opponent], [shieldsA, shieldsB])
+                        battle.resolve()
+                        self.assertEqual(ratings[shieldsA][shieldsB], battle.rate(0))
+                        self.assertEqual(opponent_ratings[shieldsA][shieldsB], battle.rate(1))
+                        self.assertEqual(wins[shieldsA][shieldsB], battle.pokemons[1].hp <= 0)
+
+    def test_shield_matrix(self):
+        self.assertSameAsBattles(shield_matrix(self.pokemons, self.opponents))
+
+    def test_shield_processes(self):
+        min_parallel, chunk_battles = matchups.MIN_PARALLEL, matchups.CHUNK_BATTLES
+        matchups.MIN_PARALLEL, matchups.CHUNK_BATTLES = 0, 5
+        try:
+            matrix = shield_matrix(self.pokemons, self.opponents, processes=2, cache=False)
+        finally:
+            matchups.MIN_PARALLEL, matchups.CHUNK_BATTLES = min_parallel, chunk_battles
+        self.assertSameAsBattles(matrix)
+
+    def test_shield_cache(self):
+        self.assertEqual(shield_matrix(self.pokemons, self.opponents).cached, 0)
+        # a single scenario is shared with matchup_matrix
+        matrix = matchup_matrix(self.pokemons, self.opponents, [2, 0])
+        self.assertEqual(matrix.cached, 6)
+        cached = shield_matrix(self.pokemons, self.opponents)
+        self.assertEqual(cached.cached, 54)
+        self.assertSameAsBattles(cached)
@@ -0,0 +1,124 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+
+from pygopvp.memo import MemoStore
+
+
+def _write(args):
+    filepath, start = args
+    store = MemoStore(filepath)
+    for i in range(start, start + 50):
+        store.put("key{}".format(i), [i, "value"])
+    store.close()
+
+
+class TestMemoStore(unittest.TestCase):
+    def setUp(self):
+        self.temdir = tempfile.TemporaryDirectory()
+        self.filepath = os.path.join(self.temdir.name, "memo.sqlite3")
+
+    def tearDown(self):
+        self.temdir.cleanup()
+
+    def test_get_put(self):
+        store = MemoStore(self.filepath, memory_size=2)
+        self.assertEqual(store.get("a"), (False, None))
+        store.put("a", [1, {"b": 2}])
+        self.assertEqual(store.get("a"), (True, [1, {"b": 2}]))
+        store.put("b", 2)
+        store.put("c", 3)
+        # "a" is no longer in memory, read from disk
+        self.assertEqual(store.get("a"), (True, [1, {"b": 2}]))
+        stats = store.stats()
+        self.assertEqual(stats["memory_hits"], 1)
+        self.assertEqual(stats["disk_hits"], 1)
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["writes"], 3)
+        self.assertEqual(stats["entries"], 3)
+        self.assertEqual(stats["memory_entries"], 2)
+        store.close()
+        # persistent
+        store = MemoStore(self.filepath)
+        self.assertEqual(store.get("c"), (True, 3))
+        store.close()
+
+    def test_many(self):
+        store = MemoStore(self.filepath)
+        store.put("a", 1)
+        store.put_many(("key{}".format(i), [i]) for i in range(1200))
+        keys = ["a", "missing"] + ["key{}".format(i) for i in range(1200)]
+        found = store.get_many(keys)
+        self.assertEqual(len(found), 1201)
+        self.assertEqual(found["a"], 1)
+        self.assertEqual(found["key1199"], [1199])
+        stats = store.stats()
+        self.assertEqual(stats["memory_hits"], 1)
+        self.assertEqual(stats["disk_hits"], 1200)
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["entries"], 1201)
+        store.close()
+
+    def test_evict(self):
+        store = MemoStore(self.filepath, max_bytes=1000)
+        for i in range(100):
+            store.put("key{}".format(i), "x" * 20)
+        stats = store.stats()
+        self.assertLessEqual(stats["bytes"], 1000)
+        self.assertGreater(stats["evictions"], 0)
+        # most recent entries are kept
+        self.assertEqual(store.get("key99"), (True, "x" * 20))
+        store.close()
+        store = MemoStore(self.filepath)
+        self.assertEqual(store.get("key0"), (False, None))
+        store.close()
+
+    def test_overwrite(self):
+        store = MemoStore(self.filepath, max_bytes=1000)
+        for i in range(100):
+            store.put("a", "x" * 20)
+            store.put_many([("b", i), ("c", "x" * 20), ("c", "x" * 20)])
+        stats = store.stats()
+        self.assertEqual(stats["entries"], 3)
+        # replaced entries are not counted twice
+        self.assertEqual(store._MemoStore__bytes, stats["bytes"])
+        self.assertEqual(stats["evictions"], 0)
+        store.close()
+
+    def _set_used(self, value=None):
+        connection = sqlite3.connect(self.filepath)
+        try:
+            if value is not None:
+                with connection:
+                    connection.execute("UPDATE memo SET used = ?", (value,))
+            return connection.execute("SELECT used FROM memo").fetchone()[0]
+        finally:
+            connection.close()
+
+    def test_used(self):
+        store = MemoStore(self.filepath, memory_size=0)
+        store.put("a", 1)
+        self._set_used(0)
+        # reads don't write, the last use is written on close
+        self.assertEqual(store.get("a"), (True, 1))
+        self.assertEqual(store.get_many(["a"]), {"a": 1})
+        self.assertEqual(self._set_used(), 0)
+        store.close()
+        self.assertGreater(self._set_used(), 0)
+        # or on flush
+        store = MemoStore(self.filepath, memory_size=0)
+        self._set_used(0)
+        store.get("a")
+        store.flush()
+        self.assertGreater(self._set_used(), 0)
+        store.close()
+
+    def test_processes(self):
+        with ProcessPoolExecutor(max_workers=4) as executor:
+            list(executor.map(_write, [(self.filepath, start) for start in range(0, 200, 50)]))
+        store = MemoStore(self.filepath)
+        self.assertEqual(store.stats()["entries"], 200)
+        self.assertEqual(store.get("key150"), (True, [150, "value"]))
+        store.close()
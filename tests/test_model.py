@@ -1,7 +1,8 @@
 from math import floor
+import pickle
 import unittest
 
-from pygopvp.model import BasePokemon, Pokemon, Move
+from pygopvp.model import BasePokemon, Pokemon, Move, MoveBuff, species_table
 from pygopvp.utils import Type
 from pygopvp.gamemaster import POKEMONS
 
@@ -24,6 +25,27 @@ class TestBasePokemon(unittest.TestCase):
         self.assertEqual(BasePokemon("MUK").title(), "Muk")
         self.assertEqual(BasePokemon("MUK_ALOLA").title(), "Muk (Alolan)")
 
+    def test_species_table(self):
+        table = species_table()
+        self.assertIs(table, species_table())
+        self.assertEqual(len(table.names), len(POKEMONS))
+        for name, pokemon_data in POKEMONS.items():
+            pokemon = BasePokemon(name)
+            self.assertEqual(table.names[pokemon.speciesId], name)
+            self.assertEqual(pokemon.baseAttack, pokemon_data["stats"]["baseAttack"])
+            self.assertEqual(pokemon.baseDefense, pokemon_data["stats"]["baseDefense"])
+            self.assertEqual(pokemon.baseStamina, pokemon_data["stats"]["baseStamina"])
+            self.assertEqual(pokemon.types[0], Type(pokemon_data["type"]))
+            self.assertEqual(pokemon.fast_moves, pokemon_data["quickMoves"])
+            self.assertEqual(pokemon.charged_moves, pokemon_data["cinematicMoves"])
+            self.assertEqual(pokemon.legacy_fast, pokemon_data.get("eliteQuickMove", []))
+
+    def test_best_dpt_moves_legacy(self):
+        pokemon = BasePokemon("BLASTOISE")
+        fast_moves = pokemon.fast_moves
+        pokemon.best_dpt_moves(legacy=True)
+        self.assertEqual(pokemon.fast_moves, fast_moves)
+
 
 class TestPokemon(unittest.TestCase):
     def test_properties(self):
@@ -59,6 +81,34 @@ class TestPokemon(unittest.TestCase):
             "Pokemon('GROWLITHE', 15, [0, 2, 4], [Move('EMBER_FAST'), Move('FLAME_WHEEL'), Move('FLAMETHROWER')])",
         )
 
+    def test_copy(self):
+        pokemon = Pokemon("PRIMEAPE", 15, [0, 2, 4], [Move("LOW_KICK_FAST"), Move("CLOSE_COMBAT")])
+        pokemon.hp = 1
+        copy = pokemon.copy()
+        self.assertEqual(repr(copy), repr(pokemon))
+        self.assertEqual(copy.hp, copy.startHp)
+        copy.charged.append(Move("ICE_PUNCH"))
+        self.assertEqual(len(pokemon.charged), 1)
+
+    def test_spec(self):
+        pokemon = Pokemon("PRIMEAPE", 15, [0, 2, 4], [Move("LOW_KICK_FAST"), Move("CLOSE_COMBAT")])
+        spec = pokemon.spec()
+        self.assertEqual(spec.cp, pokemon.cp)
+        self.assertEqual(spec.startHp, pokemon.startHp)
+        self.assertEqual(spec.attacks[spec.attBuffI], pokemon.attack)
+        self.assertEqual(spec.defenses[spec.defBuffI], pokemon.defense)
+        self.assertEqual(spec.charged, (Move("CLOSE_COMBAT"),))
+        self.assertEqual(str(spec), str(pokemon))
+        with self.assertRaises(AttributeError):
+            spec.level = 20
+        copy = pickle.loads(pickle.dumps(spec))
+        self.assertEqual(repr(copy), repr(spec))
+        self.assertEqual(copy.attacks, spec.attacks)
+        self.assertIs(copy.fast, spec.fast)
+        spec = pokemon.spec([Move("COUNTER_FAST"), Move("CROSS_CHOP")])
+        self.assertEqual(spec.fast, Move("COUNTER_FAST"))
+        self.assertEqual(pokemon.fast, Move("LOW_KICK_FAST"))
+
     def test_find_max(self):
         arcanine = Pokemon.find_max("ARCANINE", 1500)
         self.assertEqual(arcanine.cp, 1498)
@@ -81,6 +131,28 @@ class TestPokemon(unittest.TestCase):
         impossible = Pokemon.find_by_cp("MEWTWO", 20)
         self.assertIsNone(impossible)
 
+    def test_rank_table(self):
+        table = Pokemon.rank_table("ARCANINE", 1500)
+        self.assertEqual(len(table), 4096)
+        arcanine = Pokemon.find_max("ARCANINE", 1500)
+        rank = arcanine.iv_rank(1500)
+        self.assertEqual(rank.rank, 1)
+        self.assertEqual(rank.level, arcanine.level)
+        self.assertEqual(rank.cp, arcanine.cp)
+        self.assertEqual(rank.percentile, 100)
+
+    def test_find_by_cp_level(self):
+        arcanine = Pokemon.find_by_cp_level("ARCANINE", 1498, 18.0)
+        self.assertEqual(arcanine.cp, 1498)
+        self.assertEqual(arcanine.level, 18.0)
+        arcanine = Pokemon.find_by_cp_level("ARCANINE", 1498, 19.5)
+        self.assertEqual(arcanine.cp, 1498)
+        self.assertEqual(arcanine.level, 19.5)
+        arcanine = Pokemon.find_by_cp_level("ARCANINE", 1498, 17.5)
+        self.assertEqual(arcanine.cp, 1498)
+        self.assertEqual(arcanine.level, 17.5)
+        self.assertIsNone(Pokemon.find_by_cp_level("ARCANINE", 1498, 20.0))
+
 
 class TestMove(unittest.TestCase):
     def test_properties(self):
@@ -98,6 +170,40 @@ class TestMove(unittest.TestCase):
         move = Move("COUNTER_FAST")
         self.assertEqual(repr(move), "Move('COUNTER_FAST')")
 
+    def test_interned(self):
+        self.assertIs(Move("COUNTER_FAST"), Move("COUNTER_FAST"))
+        self.assertIs(Move.charged_from_name("Dark pulse"), Move("DARK_PULSE"))
+        hidden_fire = Move.fast_from_name("Hidden Power Fire")
+        self.assertIs(hidden_fire, Move.fast_from_name("hidden-power fire"))
+        self.assertEqual(hidden_fire.type, Type.FIRE)
+        self.assertIsNot(hidden_fire, Move.fast_from_name("Hidden Power Water"))
+        self.assertIs(pickle.loads(pickle.dumps(hidden_fire)), hidden_fire)
+        self.assertIs(pickle.loads(pickle.dumps(Move("DARK_PULSE"))), Move("DARK_PULSE"))
+        # Hidden Power variants are different moves
+        hidden_water = Move.fast_from_name("Hidden Power Water")
+        self.assertNotEqual(hidden_fire, hidden_water)
+        self.assertEqual(len({hidden_fire, hidden_water, hidden_fire}), 2)
+        hidden_power = Move("HIDDEN_POWER_FAST")
+        self.assertEqual(hidden_power, Move("HIDDEN_POWER_FAST", hidden_power.type))
+
+    def test_immutable(self):
+        move = Move("WILD_CHARGE")
+        with self.assertRaises(AttributeError):
+            move.power = 0
+        with self.assertRaises(AttributeError):
+            move.buffs.chance = 0
+        self.assertEqual(move.buffs.roll(0.5), (True, 0.5))
+        self.assertEqual(move.buffs.changes, ((0, 1, -2),))
+        buff = MoveBuff(
+            {
+                "attackerDefenseStatStageChange": 1,
+                "targetAttackStatStageChange": -1,
+                "targetDefenseStatStageChange": -1,
+                "buffActivationChance": 1.0,
+            }
+        )
+        self.assertEqual(buff.changes, ((0, 1, 1), (1, 0, -1), (1, 1, -1)))
+
     def test_best_dpt_moves(self):
         bests = Move.best_dpt_moves(
             ["STEEL_WING_FAST", "AIR_SLASH_FAST"], ["BRAVE_BIRD", "SKY_ATTACK", "FLASH_CANNON"]
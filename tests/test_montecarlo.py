@@ -0,0 +1,80 @@
+import unittest
+
+from pygopvp import montecarlo
+from pygopvp.batch import BatchBattle
+from pygopvp.model import Move, Pokemon
+from pygopvp.montecarlo import MonteCarlo, percentiles
+
+
+class TestMonteCarlo(unittest.TestCase):
+    def setUp(self):
+        self.pokemons = [
+            Pokemon("ARCANINE", 19, [4, 8, 4], [Move("FIRE_FANG_FAST"), Move("WILD_CHARGE")]),
+            Pokemon("POLIWHIRL", 40, [15, 15, 15], [Move("MUD_SHOT_FAST"), Move("BUBBLE_BEAM")]),
+        ]
+        # MOONBLAST and PLAY_ROUGH buffs have an activation chance
+        self.lucky = [
+            Pokemon("AZUMARILL", 20, [0, 15, 15], [Move("WATER_GUN_FAST"), Move("PLAY_ROUGH")]),
+            Pokemon(
+                "ALTARIA", 25, [1, 15, 15], [Move("DRAGON_BREATH_FAST"), Move("MOONBLAST")]
+            ),
+        ]
+
+    def test_deterministic(self):
+        # without chances, every trial is the battle of BatchBattle
+        matchups = [(a, b) for a in self.pokemons for b in self.pokemons]
+        mc = MonteCarlo(matchups, 1, trials=20)
+        batch = BatchBattle((a, b, 1) for a, b in matchups)
+        batch.resolve()
+        self.assertEqual(mc.battles, len(matchups))
+        self.assertEqual(mc.errors, {})
+        for m in range(len(mc)):
+            self.assertEqual(list(mc.ratings(m)), [batch.rate(m, 0)] * 20)
+            self.assertEqual(mc.win_probability(m), float(batch.hp_left(m, 1) <= 0))
+
+    def test_trials(self):
+        matchups = [(a, b) for a in self.lucky for b in self.lucky + self.pokemons]
+        mc = MonteCarlo(matchups, 0, trials=200, seed=3)
+        self.assertGreater(mc.battles, len(matchups))
+        self.assertTrue(any(len(set(mc.ratings(m))) > 1 for m in range(len(mc))))
+        # trials are the same, however they are grouped
+        self.assertEqual(mc.ratings(0), MonteCarlo(matchups[:1], 0, 200, seed=3).ratings(0))
+        for trial in (0, 7, 199):
+            single = MonteCarlo(matchups, 0, trial + 1, seed=3)
+            for m in range(len(mc)):
+                self.assertEqual(single.ratings(m)[trial], mc.ratings(m)[trial])
+                self.assertEqual(single.wins(m)[trial], mc.wins(m)[trial])
+        for m in range(len(mc)):
+            low, median, high = mc.percentiles(m)
+            self.assertLessEqual(low, median)
+            self.assertLessEqual(median, high)
+            self.assertGreaterEqual(mc.mean(m), min(mc.ratings(m)))
+        other = MonteCarlo(matchups, 0, trials=200, seed=4)
+        self.assertNotEqual(
+            [list(mc.ratings(m)) for m in range(len(mc))],
+            [list(other.ratings(m)) for m in range(len(mc))],
+        )
+
+    def test_processes(self):
+        broken = Pokemon("ARCANINE", 19, [4, 8, 4])
+        matchups = [(a, b) for a in self.lucky + [broken] for b in self.lucky + self.pokemons]
+        mc = MonteCarlo(matchups, 0, trials=50, seed=3, processes=1)
+        min_parallel, chunk_matchups = montecarlo.MIN_PARALLEL, montecarlo.CHUNK_MATCHUPS
+        montecarlo.MIN_PARALLEL, montecarlo.CHUNK_MATCHUPS = 0, 3
+        try:
+            pooled = MonteCarlo(matchups, 0, trials=50, seed=3, processes=2)
+        finally:
+            montecarlo.MIN_PARALLEL, montecarlo.CHUNK_MATCHUPS = min_parallel, chunk_matchups
+        self.assertEqual(pooled.battles, mc.battles)
+        self.assertEqual(sorted(pooled.errors), [8, 9, 10, 11])
+        for m in range(len(mc)):
+            self.assertEqual(pooled.ratings(m), mc.ratings(m))
+            self.assertEqual(pooled.wins(m), mc.wins(m))
+
+    def test_errors(self):
+        broken = Pokemon("ARCANINE", 19, [4, 8, 4])
+        mc = MonteCarlo([(self.pokemons[0], self.pokemons[1]), (broken, self.pokemons[1])], 1, 10)
+        self.assertEqual(list(mc.errors), [1])
+
+    def test_percentiles(self):
+        self.assertEqual(percentiles(range(100), (0, 5, 50, 100)), [0, 5, 50, 99])
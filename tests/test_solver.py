@@ -0,0 +1,113 @@
+import sys
+import unittest
+from math import floor
+
+from pygopvp import solver as solver_module
+from pygopvp.battle import Battle
+from pygopvp.model import Move, Pokemon
+from pygopvp.solver import ATT, DEF, SearchLimit, Solver
+
+
+class TestSolver(unittest.TestCase):
+    def setUp(self):
+        data = [
+            ("ARCANINE", 19, [4, 8, 4], "FIRE_FANG_FAST", "WILD_CHARGE"),
+            ("MARACTUS", 24.5, [3, 14, 11], "POISON_JAB_FAST", "PETAL_BLIZZARD"),
+            ("POLIWHIRL", 40, [15, 15, 15], "MUD_SHOT_FAST", "BUBBLE_BEAM"),
+        ]
+        self.pokemons = [
+            Pokemon(name, level, IVs, [Move(fast), Move(charged)])
+            for name, level, IVs, fast, charged in data
+        ]
+        # only the fast move: no choices
+        self.fast_only = [
+            Pokemon(name, level, IVs, [Move(fast)]) for name, level, IVs, fast, _ in data
+        ]
+
+    def test_fast_only(self):
+        # the same battle of Battle
+        pokemons = self.fast_only
+        for pokemona in pokemons:
+            for pokemonb in pokemons:
+                battle = Battle([pokemona, pokemonb], 1)
+                battle.resolve()
+                self.assertEqual(Solver([pokemona, pokemonb]).solve(), battle.rate(0))
+
+    def test_solve(self):
+        for pokemona in self.pokemons[:2]:  # the POLIWHIRL mirror is a long search
+            for pokemonb, weak in zip(self.pokemons, self.fast_only):
+                for shields in ((0, 0), (1, 2)):
+                    solver = Solver([pokemona, pokemonb], shields)
+                    rating = solver.solve()
+                    self.assertEqual(rating, floor(solver.value(solver.start)))
+                    # the first pokemon can play as Battle against a fast only opponent
+                    battle = Battle([pokemona, weak], shields)
+                    battle.resolve()
+                    rating = Solver([pokemona, weak], shields).solve()
+                    self.assertGreaterEqual(rating, battle.rate(0))
+
+    def test_line(self):
+        solver = Solver(self.pokemons[1:], 1)
+        events = solver.line()
+        self.assertTrue(events)
+        turns = [event[0] for event in events]
+        self.assertEqual(turns, sorted(turns))
+        shields = [0, 0]
+        for _, pokemon, move, shielded in events:
+            self.assertIn(move, solver.specs[pokemon].charged)
+            shields[pokemon ^ 1] += shielded
+        self.assertLessEqual(max(shields), 1)
+        fast_moves = (solver.specs[0].fast, solver.specs[1].fast)
+        self.assertEqual(solver.best_moves(solver.start), fast_moves)
+
+    def test_no_recursion(self):
+        limit = sys.getrecursionlimit()
+        sys.setrecursionlimit(100)
+        try:
+            rating = Solver(self.pokemons[1:], 1).solve()
+        finally:
+            sys.setrecursionlimit(limit)
+        self.assertEqual(rating, Solver(self.pokemons[1:], 1).solve())
+
+    def test_max_bounds(self):
+        solver = Solver(self.pokemons[1:], 1)
+        max_bounds = solver_module.MAX_BOUNDS
+        solver_module.MAX_BOUNDS = 64
+        try:
+            bounded = Solver(self.pokemons[1:], 1)
+            self.assertEqual(bounded.solve(), solver.solve())
+            self.assertEqual(bounded.line(), solver.line())
+        finally:
+            solver_module.MAX_BOUNDS = max_bounds
+        self.assertLessEqual(len(bounded.bounds), 64)
+
+    def test_buffs(self):
+        # ACID_SPRAY and ICY_WIND lower the defense and attack of the opponent, as in Battle
+        solver = Solver(self.pokemons[:2])
+        current = list(solver.start)
+        solver._apply_buffs(current, 0, Move("ACID_SPRAY"))
+        self.assertEqual(current[ATT : DEF + 2], [4, 4, 4, 2])
+        solver._apply_buffs(current, 1, Move("ICY_WIND"))
+        self.assertEqual(current[ATT : DEF + 2], [3, 4, 4, 2])
+
+    def test_max_nodes(self):
+        exact = Solver(self.pokemons[1:], 1, max_nodes=None)
+        rating = exact.solve()
+        self.assertTrue(exact.exact)
+        self.assertEqual(exact.rating_range, (rating, rating))
+        solver = Solver(self.pokemons[1:], 1, max_nodes=20)
+        # the rating of Battle, within the range found
+        battle = Battle(self.pokemons[1:], 1)
+        battle.resolve()
+        self.assertEqual(solver.solve(), battle.rate(0))
+        self.assertFalse(solver.exact)
+        low, high = solver.rating_range
+        self.assertLessEqual(low, rating)
+        self.assertLessEqual(rating, high)
+        self.assertLessEqual(solver.nodes, 21)
+        with self.assertRaises(SearchLimit):
+            solver.line()
+        # each call has its own budget
+        solver = Solver(self.pokemons[1:], 1, max_nodes=exact.nodes)
+        self.assertEqual(solver.solve(), rating)
+        self.assertEqual(solver.line(), exact.line())
@@ -0,0 +1,57 @@
+import os
+import tempfile
+import unittest
+
+from pygopvp import ivs, spreads
+from pygopvp.model import BasePokemon
+from pygopvp.utils import LEAGUES
+
+
+def _stats(name):
+    base = BasePokemon(name)
+    return (base.baseAttack, base.baseDefense, base.baseStamina)
+
+
+class TestSpreads(unittest.TestCase):
+    def setUp(self):
+        self.temdir = tempfile.TemporaryDirectory()
+        self.origin_DATA_DIR = spreads.DATA_DIR
+        spreads.DATA_DIR = self.temdir.name
+        spreads._close()
+
+    def tearDown(self):
+        spreads._close()
+        spreads.DATA_DIR = self.origin_DATA_DIR
+        self.temdir.cleanup()
+
+    def test_precompute(self):
+        self.assertIsNone(spreads.lookup(_stats("ARCANINE"), 1500))
+        count = spreads.precompute(["ARCANINE", "MEWTWO"], processes=2)
+        self.assertEqual(count, 2 * (len(LEAGUES) - 1) * len(spreads.LOWER_IVS))
+        self.assertTrue(os.path.isfile(spreads._filepath()))
+        for name in ("ARCANINE", "MEWTWO"):
+            for lowerIV in spreads.LOWER_IVS:
+                self.assertEqual(
+                    spreads.lookup(_stats(name), 1500, lowerIV),
+                    ivs.find_max(_stats(name), 1500, lowerIV),
+                )
+        self.assertIsNone(spreads.lookup(_stats("ARCANINE"), 1400))
+        self.assertIsNone(spreads.lookup(_stats("SLOWBRO"), 1500))
+        self.assertEqual(
+            spreads.find_max(_stats("SLOWBRO"), 1500), ivs.find_max(_stats("SLOWBRO"), 1500)
+        )
+        # other species are added, the ones already computed are kept
+        count = spreads.precompute(["SLOWBRO"], processes=1)
+        self.assertEqual(count, (len(LEAGUES) - 1) * len(spreads.LOWER_IVS))
+        for name in ("ARCANINE", "MEWTWO", "SLOWBRO"):
+            self.assertEqual(
+                spreads.lookup(_stats(name), 1500), ivs.find_max(_stats(name), 1500)
+            )
+        # an outdated table is emptied
+        spreads.VERSION += 1
+        try:
+            spreads.precompute(["SLOWBRO"], processes=1)
+            self.assertIsNone(spreads.lookup(_stats("ARCANINE"), 1500))
+            self.assertIsNotNone(spreads.lookup(_stats("SLOWBRO"), 1500))
+        finally:
+            spreads.VERSION -= 1
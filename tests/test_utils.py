@@ -1,10 +1,37 @@
 import tempfile
+import threading
 import unittest
 import os
+from http.server import BaseHTTPRequestHandler, HTTPServer
 
 import pygopvp.utils as utils
 
 
+class _Handler(BaseHTTPRequestHandler):
+    """Serve `body` with an ETag, reply 304 to matching conditional requests"""
+
+    body = b"[]"
+    etag = '"1"'
+    last_modified = "Sat, 01 Jan 2022 00:00:00 GMT"
+    requests = []
+
+    def do_GET(self):
+        self.requests.append(dict(self.headers))
+        if self.headers.get("If-None-Match") == self.etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("ETag", self.etag)
+        self.send_header("Last-Modified", self.last_modified)
+        self.send_header("Content-Length", str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, *args):
+        pass
+
+
 class TestUtils(unittest.TestCase):
     def setUp(self):
         utils.write_cache()  # preserve old cache
@@ -14,6 +41,7 @@ class TestUtils(unittest.TestCase):
         utils.start_cache()
 
     def tearDown(self):
+        utils.write_cache()
         self.temdir.cleanup()
         utils.DATA_DIR = self.origin_DATA_DIR
 
@@ -43,3 +71,52 @@ class TestUtils(unittest.TestCase):
         utils.write_cache()
         # File written
         self.assertGreater(len(os.listdir(self.temdir.name)), 0)
+        stats = utils.cache_stats()
+        self.assertEqual(stats["entries"], 1)
+        self.assertEqual(stats["misses"], 0)  # new store
+        self.assertEqual(utils.json_cache(sum, 1, 2), 3)
+        self.assertEqual(self._called, 1)
+
+    def test_versioned_cache(self):
+        self._called = 0
+
+        def sum(a: int, b: int):
+            self._called += 1
+            return a + b
+
+        self.assertEqual(utils.versioned_cache("v1", sum, 1, 2), 3)
+        self.assertEqual(utils.versioned_cache("v1", sum, 1, 2), 3)
+        self.assertEqual(self._called, 1)  # cached
+        self.assertEqual(utils.versioned_cache("v2", sum, 1, 2), 3)
+        self.assertEqual(self._called, 2)  # new version, called again
+        self.assertEqual(utils.versioned_cache("v2", sum, 1, 2), 3)
+        self.assertEqual(self._called, 2)
+        utils.write_cache()
+        utils.start_cache()
+        self.assertEqual(utils.versioned_cache("v2", sum, 1, 2), 3)
+        self.assertEqual(self._called, 2)  # read from file
+
+    def test_download(self):
+        server = HTTPServer(("127.0.0.1", 0), _Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        url = "http://127.0.0.1:{}/file.json".format(server.server_port)
+        filepath = os.path.join(self.temdir.name, "file.json")
+        self.assertTrue(utils.download(url, filepath))
+        with open(filepath, "rb") as fp:
+            self.assertEqual(fp.read(), b"[]")
+        self.assertNotIn("If-None-Match", _Handler.requests[-1])
+        # not modified
+        self.assertFalse(utils.download(url, filepath))
+        self.assertEqual(_Handler.requests[-1]["If-None-Match"], '"1"')
+        self.assertEqual(_Handler.requests[-1]["If-Modified-Since"], _Handler.last_modified)
+        # modified
+        _Handler.body, _Handler.etag = b"[1]", '"2"'
+        self.assertTrue(utils.download(url, filepath))
+        with open(filepath, "rb") as fp:
+            self.assertEqual(fp.read(), b"[1]")
+        # file removed, full download
+        os.unlink(filepath)
+        self.assertTrue(utils.download(url, filepath))
+        self.assertNotIn("If-None-Match", _Handler.requests[-1])